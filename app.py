@@ -1,452 +1,1249 @@
-from flask import Flask, render_template, request
+import os
+
+# eventlet and gevent run every handler on one OS thread, so the threading locks that
+# serialize each room only hold between greenlets once the standard library is patched,
+# which has to happen before anything else imports it.
+ASYNC_MODE = os.environ.get('BINGO_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, Response, abort, jsonify, make_response, render_template, request, send_from_directory, url_for
 from flask_socketio import SocketIO, join_room, leave_room, emit
+import atexit
+import logging
+import mimetypes
 import random
+import secrets
 import string
+import threading
+import time
+from assets import DIST_DIR, IMMUTABLE_CACHE_CONTROL, load_manifest, pick_encoding
+from bingo_bot import choose_number, is_bot, new_bot_sid, random_board
+from bingo_engine import BoardEngine, InvalidBoard, validate_board
+from game_log import configure_logging, dropped_records, elapsed_ms, log_event
+from game_rules import (
+    all_boards_submitted, apply_number_call, can_start_game, everyone_wants_rematch, move_seat, new_room, reset_game,
+    room_state, seat_player, start_game, unseat_player, wants_rematch
+)
+from metrics import MetricsRegistry, instrument_socketio
+from rate_limit import EventLimits, RateLimiter, protect_socketio
+from results_store import ResultsStore
+from room_log import RoomLog, replay
+from room_registry import RoomRegistry
+from room_store import RedisRoomStore
+from spectators import SpectatorFeed, spectator_channel
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key!' # IMPORTANT: Change this to a strong, random key in production!
-socketio = SocketIO(app)
+# Seconds a disconnected player's slot is held for a rejoin before the game is ended.
+app.config['RECONNECT_GRACE_SECONDS'] = 30
+# How often the background reaper looks for expired held slots and idle rooms.
+app.config['REAPER_INTERVAL_SECONDS'] = 5
+# Rooms untouched for this many seconds are evicted, by state: waiting for a game
+# to start, in the middle of a game, or finished with nobody asking to play again.
+app.config['ROOM_IDLE_TTL_SECONDS'] = {'waiting': 15 * 60, 'in_game': 30 * 60, 'finished': 10 * 60}
+# Players per room: create_room may ask for any size in this range; 2 if it doesn't say.
+app.config['MIN_PLAYERS'] = 2
+app.config['MAX_PLAYERS'] = 8
+# Spectators get one coalesced update per watched room at most this often, so a
+# crowd of watchers costs the players nothing on their turns.
+app.config['SPECTATOR_FLUSH_INTERVAL_SECONDS'] = 0.25
+# The computer player (add_bot) waits this long before calling, so its turns read like
+# a person's, and picks numbers with this strategy from bingo_bot.STRATEGIES.
+app.config['BOT_MOVE_DELAY_SECONDS'] = 1.0
+app.config['BOT_STRATEGY'] = 'lines'
+# Hard cap on live rooms; create_room is answered with room_limit_reached beyond it.
+app.config['MAX_ROOMS'] = int(os.environ.get('BINGO_MAX_ROOMS', 10000))
+# Set BINGO_REDIS_URL to run more than one worker: rooms are then kept in Redis and
+# Socket.IO broadcasts are relayed through it so every worker's clients receive them.
+app.config['REDIS_URL'] = os.environ.get('BINGO_REDIS_URL')
+# BINGO_ASYNC_MODE picks the Socket.IO async mode: 'threading' (the default), or
+# 'eventlet'/'gevent', for which the standard library is monkey-patched at the top of
+# this module so the per-room locks serialize greenlets too.
+app.config['ASYNC_MODE'] = ASYNC_MODE
+# BINGO_LOG_DEBUG=1 logs every event (including DEBUG ones such as submitted boards)
+# as plain print-style lines. Otherwise events are written as JSON lines and the
+# high-frequency ones are sampled: keep 1 in N records per level.
+app.config['LOG_DEBUG'] = os.environ.get('BINGO_LOG_DEBUG', '') not in ('', '0')
+app.config['LOG_SAMPLE_EVERY'] = {logging.DEBUG: 100, logging.INFO: 20}
+# Finished games are recorded in this SQLite file (BINGO_RESULTS_DB='' turns it off).
+# Writes are batched on a background thread: at most RESULTS_BATCH_SIZE games per
+# transaction, waiting up to RESULTS_BATCH_WAIT_SECONDS to fill a batch.
+app.config['RESULTS_DB'] = os.environ.get('BINGO_RESULTS_DB', os.path.join(app.instance_path, 'bingo_results.sqlite3'))
+app.config['RESULTS_BATCH_SIZE'] = 100
+app.config['RESULTS_BATCH_WAIT_SECONDS'] = 0.5
+# Every room change is appended to a per-room event log in this directory (see room_log;
+# BINGO_ROOM_LOG_DIR='' turns it off). Replaying the logs restores the rooms after a
+# restart, and `python room_log.py <room_id>` shows how any game unfolded. Records are
+# written on a background thread every ROOM_LOG_BATCH_WAIT_SECONDS (with BINGO_REDIS_URL,
+# synchronously, so workers sharing a room keep its log in order).
+app.config['ROOM_LOG_DIR'] = os.environ.get('BINGO_ROOM_LOG_DIR', os.path.join(app.instance_path, 'room_logs'))
+app.config['ROOM_LOG_BATCH_WAIT_SECONDS'] = 0.05
+# Logs of deleted rooms are kept for this many days (BINGO_ROOM_LOG_KEEP_DAYS), then deleted.
+app.config['ROOM_LOG_KEEP_DAYS'] = float(os.environ.get('BINGO_ROOM_LOG_KEEP_DAYS', 30))
+configure_logging(debug=app.config['LOG_DEBUG'], sample_every=app.config['LOG_SAMPLE_EVERY'])
+socketio = SocketIO(app, message_queue=app.config['REDIS_URL'], async_mode=app.config['ASYNC_MODE'])
+
+# Token buckets per event, as (events per second, burst), for each SID and for each
+# remote address. Events over either budget are answered with rate_limited before
+# their handler runs. BINGO_RATE_LIMIT=0 turns the limiter off.
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('BINGO_RATE_LIMIT', '1') != '0'
+app.config['RATE_LIMITS'] = {
+    'default': {'sid': (10, 20), 'address': (100, 200)},
+    'create_room': {'sid': (0.2, 3), 'address': (2, 20)},
+    'join_room': {'sid': (1, 5), 'address': (5, 30)},
+    'watch_room': {'sid': (1, 5), 'address': (5, 30)},
+    'rejoin_game_room': {'sid': (1, 5), 'address': (5, 30)},
+    'board_submitted': {'sid': (1, 5), 'address': (20, 50)},
+    'call_number_from_board': {'sid': (5, 10), 'address': (50, 100)}
+}
+# Joins and watches that name a room which doesn't exist also spend this budget per
+# address, so room IDs can't be guessed: 10 misses, then one more every 30 seconds.
+app.config['JOIN_FAILURE_LIMIT'] = (1 / 30, 10)
+# Most buckets each limiter keeps; the least recently used are evicted beyond it.
+app.config['RATE_LIMIT_MAX_KEYS'] = 100000
+
+# Every @socketio.on handler below is timed and every emitted event counted for
+# /metrics. BINGO_METRICS=0 turns the instrumentation off; the gauges stay.
+app.config['METRICS_ENABLED'] = os.environ.get('BINGO_METRICS', '1') != '0'
+metrics = MetricsRegistry()
+rate_limited = metrics.counter(
+    'bingo_events_rate_limited_total', "Events rejected by the rate limiter, by event and budget.", ('event', 'scope'))
+
+def reject_rate_limited(event, scope, retry_after, first):
+    """Answers an over-limit event. Only the first rejection in a row is sent back and logged."""
+    rate_limited.inc(event, scope)
+    if first:
+        emit('rate_limited', {'event': event, 'retry_after': round(retry_after, 2)}, to=request.sid)
+        log_event(logging.WARNING, 'rate_limited', "Rate limited {limited_event} from {sid} at {address} ({scope} budget).",
+                  sid=request.sid, address=request.remote_addr, limited_event=event, scope=scope)
+
+event_limits = EventLimits(app.config['RATE_LIMITS'], max_keys=app.config['RATE_LIMIT_MAX_KEYS'])
+event_limits.enabled = app.config['RATE_LIMIT_ENABLED']
+join_failures = RateLimiter(*app.config['JOIN_FAILURE_LIMIT'], max_keys=app.config['RATE_LIMIT_MAX_KEYS'])
+# Installed first so rejected events skip the handler timing below as well.
+protect_socketio(socketio, event_limits, reject_rate_limited)
+if app.config['METRICS_ENABLED']:
+    instrument_socketio(socketio, metrics)
 
 # Dictionary to store active rooms and their game data
 # Each room will contain:
-# 'members': list of SIDs in the room
-# 'boards': dictionary mapping SID to player's board (list of 25 numbers)
+# 'members': list of SIDs in the room, in join order, which is also the turn order.
+#            Computer players have pseudo-SIDs starting with 'bot:' (see bingo_bot).
+# 'max_players': how many players the room admits (MIN_PLAYERS to MAX_PLAYERS)
 # 'called_numbers': set of numbers that have been called
 # 'current_turn_sid': SID of the player whose turn it is
 # 'host_sid': SID of the player who created the room
-# 'marked_boards': dictionary mapping SID to player's marked board (5x5 2D boolean array)
+# 'engines': dictionary mapping SID to the player's BoardEngine: their validated board as
+#            25 bytes with its inverse index, the marked cells as a bitmask and the line
+#            counters. Players who have not submitted a board yet have no entry.
 # 'bingo_progress': dictionary mapping SID to number of completed lines for each player
 # 'bingo_string': dictionary mapping SID to the 'B', 'BI', 'BIN', 'BING', 'BINGO' string progress
 # 'player_names': dictionary mapping SID to player's chosen name
 # 'play_again_requests': dictionary mapping SID to boolean (True if requested)
 # 'play_again_responses': dictionary mapping SID to 'accepted'/'rejected' (for pending requests)
-rooms = {}
+# 'protocol_versions': dictionary mapping SID to the broadcast protocol version the client speaks
+# 'seq': sequence number of the last protocol 2 game broadcast (never reset, only increases)
+# 'winner_sid': SID of the winner of the current game, or None
+# 'called_sequence': the current game's called numbers in calling order, for the results store
+# 'started_at': time.time() the current game started, or None before it starts
+# 'last_called_number': the most recently called number, or None
+# 'reconnect_tokens': dictionary mapping a player's secret reconnect token to their current SID
+# 'disconnected': dictionary mapping SID of a disconnected player to the time.time() their slot expires
+# 'last_activity': time.time() of the last write to the room (stamped by the registry)
+# 'spectators': how many clients are watching the room on its spectator channel
+# 'created_at': time.time() the room was created; event log records count milliseconds from it
+# 'seats': dictionary mapping SID to the seat number the room's event log knows the player by
+# 'next_seat': seat number the next player to join gets
+# 'departed': {name, lines, won} of the players who left the current game before it ended
+# The registry also indexes SID -> room ID and host SID -> room ID for O(1) lookups.
+# Rooms are loaded with registry.get() and written back with registry.save() once changed.
+registry = RoomRegistry(RedisRoomStore.from_url(app.config['REDIS_URL']) if app.config['REDIS_URL'] else None)
+
+# Protocol 2 sends delta-encoded number_called/bingo_win broadcasts; clients that
+# don't declare a version get the original full-state payloads (protocol 1).
+PROTOCOL_VERSION = 2
+DELTA_PROTOCOL_VERSION = 2
+SUPPORTED_PROTOCOL_VERSIONS = (1, 2)
+
+def count_connected_sids():
+    """Returns how many clients are connected to this worker."""
+    return len(socketio.server.manager.rooms.get('/', {}).get(None, {}))
+
+metrics.gauge('bingo_rooms_active', "Rooms that currently exist.", lambda: len(registry))
+metrics.gauge('bingo_connected_sids', "Socket.IO clients connected to this worker.", count_connected_sids)
+metrics.gauge('bingo_games_in_progress', "Rooms with a started game that has no winner yet.",
+              lambda: registry.count_in_game())
+metrics.gauge('bingo_log_records_dropped', "Log records dropped because the log queue was full.", dropped_records)
+if app.config['RESULTS_DB']:
+    os.makedirs(os.path.dirname(os.path.abspath(app.config['RESULTS_DB'])), exist_ok=True)
+    results_store = ResultsStore(app.config['RESULTS_DB'], batch_size=app.config['RESULTS_BATCH_SIZE'],
+                                 batch_wait=app.config['RESULTS_BATCH_WAIT_SECONDS'])
+    atexit.register(results_store.close)
+    metrics.gauge('bingo_results_pending', "Finished games waiting to be written to the results store.", results_store.pending)
+    metrics.gauge('bingo_results_dropped', "Finished games dropped because the results queue was full.", lambda: results_store.dropped)
+else:
+    results_store = None
+if app.config['ROOM_LOG_DIR']:
+    room_log = RoomLog(app.config['ROOM_LOG_DIR'], background=not app.config['REDIS_URL'],
+                       batch_wait=app.config['ROOM_LOG_BATCH_WAIT_SECONDS'],
+                       keep_closed_seconds=app.config['ROOM_LOG_KEEP_DAYS'] * 86400)
+    atexit.register(room_log.close)
+    metrics.gauge('bingo_room_log_pending', "Room log records waiting to be written.", room_log.pending)
+    metrics.gauge('bingo_room_log_write_errors', "Room log writes that failed.", lambda: room_log.write_errors)
+else:
+    room_log = None
+metrics.gauge('bingo_rate_limit_buckets', "Token buckets held by the rate limiters.",
+              lambda: event_limits.size() + len(join_failures))
+rooms_evicted = metrics.counter('bingo_rooms_evicted_total', "Idle rooms evicted by the reaper, by state.", ('state',))
+
+room_reaper_started = False
+room_reaper_lock = threading.Lock()
+spectator_feed_started = False
+# SID -> room ID of the clients watching a room on this worker.
+spectating = {}
+# Makes the MAX_ROOMS check and the room creation one step within this worker.
+room_creation_lock = threading.Lock()
+# Deals the computer players' boards and makes their choices between equally good numbers.
+bot_random = random.Random()
 
 def generate_room_id(length=8):
     """Generates a unique random alphanumeric room ID."""
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
-def get_bingo_string(completed_lines):
-    """Converts the number of completed lines into a BINGO string."""
-    bingo_letters = "BINGO"
-    return bingo_letters[:completed_lines]
+def leave_current_room(sid):
+    """Takes a SID out of whatever room it is indexed to, as part_from_room does."""
+    room_id = registry.room_id_for_sid(sid)
+    with registry.locked(room_id) as room_data:
+        if room_data is None:
+            return None
+        leave_room(room_id, sid=sid)
+        part_from_room(room_id, room_data, sid, 'left the room')
+        return room_id
+
+def delete_room(room_id, room_data):
+    """Deletes a room, tells its spectators it closed and archives its event log."""
+    registry.delete_room(room_id, room_data)
+    refresh_spectators(room_id, room_data)
+    if room_log is not None:
+        room_log.archive(room_id, room_data['created_at'])
+
+def log_room_event(room_id, room_data, code, *fields):
+    """Appends a record to the room's event log; see room_log for the codes and their fields."""
+    if room_log is not None:
+        room_log.append(room_id, room_data['created_at'], code, *fields)
+
+def has_human_players(room_data):
+    """False once only computer players are left, which is when a room is deleted."""
+    return any(not is_bot(sid) for sid in room_data['members'])
+
+def rebind_player_state(room_id, room_data, old_sid, new_sid):
+    """Moves a player's slot from their old SID to the SID they reconnected with."""
+    registry.rebind_member(room_id, room_data, old_sid, new_sid)
+    move_seat(room_data, old_sid, new_sid)
+
+def new_reconnect_token():
+    """Creates the secret token a player presents to reclaim their slot after a disconnect."""
+    return secrets.token_urlsafe(16)
+
+def seat_new_player(room_id, room_data, sid, player_name, protocol_version, reconnect_token=None):
+    """Seats a player who is already a member of the room and logs it."""
+    seat = seat_player(room_data, sid, player_name, protocol_version, reconnect_token)
+    log_room_event(room_id, room_data, 'J', seat, sid, protocol_version, reconnect_token, player_name)
+
+def client_protocol_version(data):
+    """The protocol version a client declared, or 1 if it declared none or one this server doesn't speak."""
+    version = data.get('protocol_version')
+    return version if type(version) is int and version in SUPPORTED_PROTOCOL_VERSIONS else 1
+
+def room_protocol_version(room_data):
+    """Returns the newest broadcast protocol every member of the room understands."""
+    versions = room_data['protocol_versions']
+    return min((versions.get(sid, 1) for sid in room_data['members']), default=1)
+
+def build_game_snapshot(room_id, room_data):
+    """Builds the full game state a client needs to resynchronise after missing a delta."""
+    return {
+        'room_id': room_id,
+        'seq': room_data['seq'],
+        'game_started': room_data['current_turn_sid'] is not None,
+        'current_turn': room_data['current_turn_sid'],
+        'called_numbers': list(room_data['called_numbers']),
+        'boards': {sid: room_data['engines'][sid].numbers() for sid in room_data['members'] if sid in room_data['engines']},
+        'bingo_progress': {sid: room_data['bingo_progress'].get(sid, 0) for sid in room_data['members']},
+        'bingo_string': {sid: room_data['bingo_string'].get(sid, "") for sid in room_data['members']},
+        'player_names': room_data['player_names'],
+        'winner_sid': room_data['winner_sid']
+    }
+
+def emit_number_called(room_id, room_data, number, next_turn_sid, changed_progress, seq):
+    """
+    Broadcasts a called number. Protocol 1 resends the full game state; protocol 2
+    sends only the number, the next turn and the progress that changed, tagged
+    with a sequence number so clients can detect gaps.
+    """
+    if room_protocol_version(room_data) >= DELTA_PROTOCOL_VERSION:
+        payload = {
+            'seq': seq,
+            'number': number,
+            'next_turn': next_turn_sid
+        }
+        if changed_progress:
+            payload['progress'] = changed_progress
+        socketio.emit('number_called', payload, to=room_id)
+        return
+
+    socketio.emit('number_called', {
+        'number': number,
+        'next_turn': next_turn_sid,
+        'called_numbers': list(room_data['called_numbers']),
+        'bingo_progress' : {
+            sid: room_data['bingo_progress'][sid] for sid in room_data['members']
+        },
+        'bingo_string': {
+            sid: room_data['bingo_string'][sid] for sid in room_data['members']
+        },
+        'player_names': room_data['player_names']
+    }, to=room_id)
+
+def emit_bingo_win(room_id, room_data, winner_sid, seq):
+    """
+    Broadcasts the end of a game. Protocol 2 clients already hold every board,
+    the called numbers and the progress, so only the winner is sent.
+    """
+    if room_protocol_version(room_data) >= DELTA_PROTOCOL_VERSION:
+        socketio.emit('bingo_win', {'seq': seq, 'winner_sid': winner_sid}, to=room_id)
+        return
+
+    socketio.emit('bingo_win', {
+        'winner_sid': winner_sid,
+        'final_boards': {sid: room_data['engines'][sid].numbers() for sid in room_data['members']},
+        'final_marked_boards': {sid: room_data['engines'][sid].marked_grid() for sid in room_data['members']},
+        'bingo_progress': {sid: room_data['bingo_progress'][sid] for sid in room_data['members']},
+        'bingo_string': {sid: room_data['bingo_string'][sid] for sid in room_data['members']},
+        'called_numbers_final': list(room_data['called_numbers']),
+        'player_names': room_data['player_names']
+    }, to=room_id)
+
+def spectator_snapshot(room_id):
+    """Builds the state a spectator starts from, or returns None once the room is gone."""
+    room_data = registry.get(room_id)
+    if room_data is None:
+        return None
+    snapshot = build_game_snapshot(room_id, room_data)
+    snapshot['spectators'] = room_data['spectators']
+    return snapshot
+
+spectator_feed = SpectatorFeed(
+    emit=lambda event, payload, channel: socketio.emit(event, payload, to=channel),
+    snapshot=spectator_snapshot
+)
+
+def refresh_spectators(room_id, room_data):
+    """Sends the room's spectators a full snapshot on the next flush, after a change deltas don't cover."""
+    if room_data.get('spectators'):
+        spectator_feed.invalidate(room_id)
+
+# Built by `python assets.py`: content-hashed, pre-compressed copies of static/ that
+# /assets/ serves with a one-year immutable cache. Without a build, /static/ is used.
+asset_manifest = load_manifest()
+# Hashed file name -> its manifest entry, for the /assets/ route.
+asset_files = {entry['file']: entry for entry in asset_manifest.values()}
+
+def asset_url(name):
+    """URL of a static file: its hashed /assets/ copy if built, else its /static/ path."""
+    entry = asset_manifest.get(name)
+    if entry is None:
+        return url_for('static', filename=name)
+    return url_for('hashed_asset', filename=entry['file'])
+
+def asset_variant(name, kind):
+    """URL of a built variant of an asset (such as 'webp' for an image), or None."""
+    variant = asset_manifest.get(name, {}).get('variants', {}).get(kind)
+    return url_for('hashed_asset', filename=variant) if variant else None
+
+@app.context_processor
+def asset_helpers():
+    return {'asset_url': asset_url, 'asset_variant': asset_variant}
 
 @app.route('/')
 def index():
     """Renders the main HTML page for the game."""
-    return render_template('index.html')
+    # The page itself is small and revalidated on every visit; what it links to is cached for good.
+    response = make_response(render_template('index.html'))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/leaderboard')
+def leaderboard():
+    """Top players by wins as JSON; ?limit= picks how many (at most 100)."""
+    if results_store is None:
+        abort(404)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    return jsonify({'players': results_store.leaderboard(limit)})
+
+@app.route('/players/<path:player_name>')
+def player_stats(player_name):
+    """A player's totals and recent games as JSON."""
+    stats = results_store.player_stats(player_name) if results_store is not None else None
+    if stats is None:
+        abort(404)
+    return jsonify(stats)
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    """Serves a built asset, pre-compressed if the client accepts it, as immutable."""
+    entry = asset_files.get(filename)
+    if entry is None:
+        abort(404)
+    picked = pick_encoding(entry, request.headers.get('Accept-Encoding'))
+    if picked is None:
+        abort(406)
+    encoding, suffix = picked
+    # Each encoding is a different representation, so it gets its own ETag.
+    etag = entry['etag'][:16] + (f"-{encoding}" if encoding else "")
+    response = send_from_directory(
+        DIST_DIR, filename + suffix,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        download_name=os.path.basename(filename), etag=etag, conditional=True
+    )
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if entry['encodings']:
+        response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Serves handler timings, event counts and room gauges in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @socketio.on('create_room')
 def handle_create_room(data):
     """Handles a client's request to create a new game room."""
     player_name = data.get('player_name', 'Player 1')
-    room_id = generate_room_id()
-    rooms[room_id] = {
-        'members': [request.sid],
-        'boards': {},
-        'called_numbers': set(),
-        'current_turn_sid': None,
-        'host_sid': request.sid,
-        'marked_boards': {},
-        'bingo_progress': {request.sid: 0},
-        'bingo_string': {request.sid: ""},
-        'player_names': {request.sid: player_name},
-        'play_again_requests': {}, # Initialize play again requests
-        'play_again_responses': {} # Initialize play again responses
-    }
+    max_players = data.get('max_players', app.config['MIN_PLAYERS'])
+    if type(max_players) is not int or not app.config['MIN_PLAYERS'] <= max_players <= app.config['MAX_PLAYERS']:
+        emit('invalid_player_count', {
+            'message': f"Rooms hold between {app.config['MIN_PLAYERS']} and {app.config['MAX_PLAYERS']} players."
+        }, to=request.sid)
+        return
+    if registry.room_id_for_sid(request.sid):
+        leave_current_room(request.sid)
+    with room_creation_lock:
+        if len(registry) >= app.config['MAX_ROOMS']:
+            emit('room_limit_reached', {
+                'max_rooms': app.config['MAX_ROOMS'],
+                'message': 'The server has reached its room limit. Please try again in a few minutes.'
+            }, to=request.sid)
+            log_event(logging.WARNING, 'room_limit_reached', "Room creation rejected for {sid}: {max_rooms} rooms already exist.",
+                      sid=request.sid, max_rooms=app.config['MAX_ROOMS'])
+            return
+        room_id = generate_room_id()
+        while room_id in registry:
+            room_id = generate_room_id()
+        room_data = new_room(max_players, time.time())
+        room_data['host_sid'] = request.sid
+        reconnect_token = new_reconnect_token()
+        log_room_event(room_id, room_data, 'O', room_data['created_at'], max_players)
+        seat_new_player(room_id, room_data, request.sid, player_name, client_protocol_version(data), reconnect_token)
+        log_room_event(room_id, room_data, 'H', room_data['seats'][request.sid])
+        registry.create_room(room_id, room_data)
+    ensure_room_reaper_started()
     join_room(room_id)
-    emit('room_created', {'room_id': room_id}, to=request.sid)
-    print(f"Room created: {room_id} by {request.sid} ({player_name})")
+    emit('room_created', {'room_id': room_id, 'reconnect_token': reconnect_token, 'max_players': max_players}, to=request.sid)
+    log_event(logging.INFO, 'room_created', "Room created: {room_id} by {sid} ({player_name})",
+              room_id=room_id, sid=request.sid, player_name=player_name, max_players=max_players)
 
 @socketio.on('join_room')
 def handle_join_room(data):
     """Handles a client's request to join an existing game room."""
     room_id = data.get('room_id')
     player_name = data.get('player_name', 'Player 2')
-    if room_id in rooms:
-        if len(rooms[room_id]['members']) < 2:
-            join_room(room_id)
-            joiner_sid = request.sid
-            rooms[room_id]['members'].append(joiner_sid)
-            rooms[room_id]['bingo_progress'][joiner_sid] = 0
-            rooms[room_id]['bingo_string'][joiner_sid] = ""
-            rooms[room_id]['player_names'][joiner_sid] = player_name
-            emit('room_joined', {'room_id': room_id}, to=request.sid)
-
-            # Notify the host that a user has joined, including the new player's name
-            # This is now the only notification on join, boards_received will be sent later
-            emit('user_joined', {
-                'sid': joiner_sid,
-                'player_name': player_name
-            }, to=room_id, skip_sid=joiner_sid) # Send to host only
-            print(f"Player {joiner_sid} ({player_name}) joined room: {room_id}")
+    if join_attempts_blocked('join_room'):
+        return
+    # A refused join must not cost the player the room they are in.
+    if join_refused(room_id, registry.get(room_id)):
+        return
+    if registry.room_id_for_sid(request.sid):
+        # Leave the previous room first so two rooms' locks are never held at once.
+        leave_current_room(request.sid)
+    with registry.locked(room_id) as room_data:
+        # The room may have filled up, started or closed while the player was leaving theirs.
+        if join_refused(room_id, room_data):
+            return
+        joiner_sid = request.sid
+        join_room(room_id)
+        registry.add_member(room_id, room_data, joiner_sid)
+        reconnect_token = new_reconnect_token()
+        seat_new_player(room_id, room_data, joiner_sid, player_name, client_protocol_version(data), reconnect_token)
+        registry.save(room_id, room_data)
+        emit('room_joined', {
+            'room_id': room_id,
+            'reconnect_token': reconnect_token,
+            'max_players': room_data['max_players'],
+            'player_names': room_data['player_names']
+        }, to=request.sid)
 
-        else:
-            emit('room_full', {'room_id': room_id}, to=request.sid)
-    else:
+        # Notify the players already in the room that a user has joined, including the new player's name
+        # This is now the only notification on join, boards_received will be sent later
+        emit('user_joined', {
+            'sid': joiner_sid,
+            'player_name': player_name,
+            'player_count': len(room_data['members'])
+        }, to=room_id, skip_sid=joiner_sid)
+        refresh_spectators(room_id, room_data)
+        log_event(logging.INFO, 'room_joined', "Player {sid} ({player_name}) joined room: {room_id}",
+                  room_id=room_id, sid=joiner_sid, player_name=player_name)
+
+def join_refused(room_id, room_data):
+    """Tells the client why it cannot join room_id and returns True, or returns False if it can."""
+    if room_data is None:
         emit('invalid_room', {'room_id': room_id}, to=request.sid)
+        record_failed_join()
+    elif request.sid in room_data['members']:
+        emit('already_in_room', {'room_id': room_id}, to=request.sid)
+    # A finished game is waiting on its rematch; its players have boards the newcomer lacks.
+    elif room_state(room_data) != 'waiting':
+        emit('game_already_started', {'room_id': room_id}, to=request.sid)
+    elif len(room_data['members']) >= room_data['max_players']:
+        emit('room_full', {'room_id': room_id}, to=request.sid)
+    else:
+        return False
+    return True
+
+def join_attempts_blocked(event):
+    """Rejects a join or watch from an address that has named too many rooms that don't exist."""
+    if not event_limits.enabled:
+        return False
+    wait = join_failures.wait_time(request.remote_addr)
+    if wait > 0:
+        reject_rate_limited(event, 'failed_joins', wait, True)
+        return True
+    return False
+
+def record_failed_join():
+    if event_limits.enabled:
+        join_failures.allow(request.remote_addr)
+
+@socketio.on('add_bot')
+def handle_add_bot():
+    """
+    Handles the host adding a computer player to their waiting room. The bot joins
+    like anyone else, with a board already submitted, and takes its turns from a
+    background task.
+    """
+    room_id = registry.room_id_for_host(request.sid)
+    with registry.locked(room_id) as room_data:
+        if room_data is None or room_state(room_data) != 'waiting':
+            log_event(logging.WARNING, 'add_bot_failed', "Attempt to add a computer player failed for {sid} in room {room_id}.",
+                      room_id=room_id, sid=request.sid)
+            return
+        if len(room_data['members']) >= room_data['max_players']:
+            emit('room_full', {'room_id': room_id}, to=request.sid)
+            return
+        bot_sid = new_bot_sid()
+        bot_count = sum(1 for sid in room_data['members'] if is_bot(sid))
+        player_name = "Computer" if bot_count == 0 else f"Computer {bot_count + 1}"
+        registry.add_member(room_id, room_data, bot_sid)
+        seat_new_player(room_id, room_data, bot_sid, player_name, PROTOCOL_VERSION)
+        deal_bot_board(room_id, room_data, bot_sid)
+        registry.save(room_id, room_data)
+        emit('user_joined', {
+            'sid': bot_sid,
+            'player_name': player_name,
+            'player_count': len(room_data['members'])
+        }, to=room_id)
+        refresh_spectators(room_id, room_data)
+        log_event(logging.INFO, 'bot_added', "Computer player {bot_sid} added to room {room_id} by {sid}",
+                  room_id=room_id, sid=request.sid, bot_sid=bot_sid)
+        if all_boards_submitted(room_data):
+            emit('boards_received', {'boards': {sid: room_data['engines'][sid].numbers() for sid in room_data['members']}},
+                 to=room_id)
+
+def deal_bot_board(room_id, room_data, bot_sid):
+    """Gives a computer player a random board and logs it."""
+    room_data['engines'][bot_sid] = engine = BoardEngine(random_board(bot_random))
+    log_room_event(room_id, room_data, 'B', room_data['seats'][bot_sid], engine.board.hex())
 
 @socketio.on('board_submitted')
 def handle_board_submitted(data):
     """Handles a player submitting their Bingo board."""
-    room_id = None
-    for r_id, room_data in rooms.items():
-        if request.sid in room_data['members']:
-            room_id = r_id
-            break
-    if room_id:
-        rooms[room_id]['boards'][request.sid] = data['board']
-        rooms[room_id]['marked_boards'][request.sid] = [[False]*5 for _ in range(5)]
-        print(f"Board submitted by {request.sid} in room {room_id}: {data['board']}")
-
-        # Only emit boards_received when BOTH players have submitted their boards
-        if len(rooms[room_id]['members']) == 2 and len(rooms[room_id]['boards']) == 2:
-            boards_data = {sid: rooms[room_id]['boards'][sid] for sid in rooms[room_id]['members']}
-            emit('boards_received', {'boards': boards_data}, to=room_id)
+    room_id = registry.room_id_for_sid(request.sid)
+    try:
+        board = validate_board(data.get('board'))
+    except InvalidBoard as error:
+        emit('invalid_board', {'message': str(error)}, to=request.sid)
+        log_event(logging.WARNING, 'invalid_board', "Rejected board from {sid} in room {room_id}: {reason}",
+                  room_id=room_id, sid=request.sid, reason=str(error))
+        return
+    with registry.locked(room_id) as room_data:
+        if room_data and room_state(room_data) != 'waiting':
+            # Swapping a board mid-game would drop its marks and change what the others were shown.
+            emit('invalid_board', {'message': "Boards can only be changed before the game starts."}, to=request.sid)
+            log_event(logging.WARNING, 'invalid_board', "Rejected board from {sid} in room {room_id}: {reason}",
+                      room_id=room_id, sid=request.sid, reason='game not waiting')
+        elif room_data:
+            room_data['engines'][request.sid] = BoardEngine(board)
+            registry.save(room_id, room_data)
+            log_room_event(room_id, room_data, 'B', room_data['seats'][request.sid], board.hex())
+            # The full board is only worth logging when debugging.
+            log_event(logging.DEBUG, 'board_submitted', "Board submitted by {sid} in room {room_id}: {board}",
+                      room_id=room_id, sid=request.sid, board=list(board))
+
+            # Only emit boards_received once EVERY player has submitted their board
+            if all_boards_submitted(room_data):
+                boards_data = {sid: room_data['engines'][sid].numbers() for sid in room_data['members']}
+                emit('boards_received', {'boards': boards_data}, to=room_id)
 
 @socketio.on('start_game_button_clicked')
 def handle_start_game_button_clicked():
     """Handles the host clicking the 'Start Game' button."""
-    room_id = None
-    for r_id, room_data in rooms.items():
-        if request.sid == room_data.get('host_sid'):
-            room_id = r_id
-            break
-    if room_id and len(rooms[room_id]['members']) == 2 and len(rooms[room_id]['boards']) == 2:
-        rooms[room_id]['current_turn_sid'] = random.choice(rooms[room_id]['members'])
-        print(f"Game started in room {room_id}. {rooms[room_id]['current_turn_sid']} has first turn.")
-        emit('game_start_signal', {
-            'current_turn': rooms[room_id]['current_turn_sid'],
-            'player_names': rooms[room_id]['player_names']
-        }, to=room_id)
-    else:
-        print(f"Attempt to start game failed for {request.sid} in room {room_id}.")
+    room_id = registry.room_id_for_host(request.sid)
+    with registry.locked(room_id) as room_data:
+        if room_data and can_start_game(room_data):
+            # The seed is logged, so a replay draws the same first player.
+            seed = secrets.randbits(64)
+            start_game(room_data, seed, time.time())
+            registry.save(room_id, room_data)
+            log_room_event(room_id, room_data, 'S', seed, room_data['started_at'])
+            log_event(logging.INFO, 'game_started', "Game started in room {room_id}. {first_turn} has first turn.",
+                      room_id=room_id, sid=request.sid, first_turn=room_data['current_turn_sid'])
+            emit('game_start_signal', {
+                'current_turn': room_data['current_turn_sid'],
+                'turn_order': room_data['members'],
+                'player_names': room_data['player_names'],
+                'seq': room_data['seq']
+            }, to=room_id)
+            refresh_spectators(room_id, room_data)
+            schedule_bot_turn(room_id, room_data)
+        else:
+            log_event(logging.WARNING, 'start_game_failed', "Attempt to start game failed for {sid} in room {room_id}.",
+                      room_id=room_id, sid=request.sid)
 
 @socketio.on('call_number_from_board')
 def handle_call_number_from_board(data):
     """Handles a player calling a number from their board."""
-    room_id = None
-    for r_id, room_data in rooms.items():
-        if request.sid in room_data['members']:
-            room_id = r_id
-            break
-
-    if room_id:
-        room_data = rooms[room_id]
-        number_to_call = data['number']
-
-        if request.sid != room_data['current_turn_sid']:
-            emit('message', {'text': "It's not your turn!"}, to=request.sid)
-            print(f"Player {request.sid} tried to call number out of turn in room {room_id}")
+    call_number(registry.room_id_for_sid(request.sid), request.sid, data['number'], time.perf_counter())
+
+def call_number(room_id, caller_sid, number_to_call, started, expected_seq=None):
+    """
+    Applies a number called by a player or a computer player and broadcasts the
+    result. expected_seq is passed on to apply_number_call.
+    """
+    # The check-then-add on called_numbers and the turn switch run as one atomic
+    # room update, so two workers can never double-call a number.
+    with registry.lock(room_id):
+        outcome = registry.update(
+            room_id, lambda room_data: apply_number_call(room_data, caller_sid, number_to_call, expected_seq)
+        ) if room_id else None
+        if outcome is None:
+            log_event(logging.WARNING, 'call_number_failed', "Call number from board failed: Room not found for {sid}",
+                      sid=caller_sid)
             return
 
-        if number_to_call in room_data['called_numbers']:
-            emit('message', {'text': f"Number {number_to_call} has already been called."}, to=request.sid)
-            print(f"Player {request.sid} tried to call already called number {number_to_call} in room {room_id}")
+        if 'error' in outcome:
+            if not is_bot(caller_sid):
+                socketio.emit('message', {'text': outcome['error']}, to=caller_sid)
+            log_event(logging.DEBUG, 'call_rejected', "Player {sid} tried to call number {number} ({reason}) in room {room_id}",
+                      sampled=True, room_id=room_id, sid=caller_sid, number=number_to_call, reason=outcome['reason'])
             return
 
-        room_data['called_numbers'].add(number_to_call)
-        print(f"Player {request.sid} called number {number_to_call} in room {room_id}")
-
-        for member_sid in room_data['members']:
-            board_values = room_data['boards'][member_sid]
-            marked_board = room_data['marked_boards'][member_sid]
-            for i in range(5):
-                for j in range(5):
-                    if board_values[i*5 + j] == number_to_call:
-                        marked_board[i][j] = True
-                        break
-
-        winners = check_bingo(room_data)
-
-        next_turn_sid = [sid for sid in room_data['members'] if sid != request.sid][0]
-        room_data['current_turn_sid'] = next_turn_sid
-
-        emit('number_called', {
-            'number': number_to_call,
-            'next_turn': next_turn_sid,
-            'called_numbers': list(room_data['called_numbers']),
-            'bingo_progress' : {
-                sid: room_data['bingo_progress'][sid] for sid in room_data['members']
-            },
-            'bingo_string': {
-                sid: room_data['bingo_string'][sid] for sid in room_data['members']
-            },
-            'player_names': room_data['player_names']
-        }, to=room_id)
+        room_data = outcome['room_data']
+        log_room_event(room_id, room_data, 'C', room_data['seats'][caller_sid], number_to_call)
+        if outcome['winners']:
+            log_room_event(room_id, room_data, 'W', room_data['seats'][room_data['winner_sid']])
+        emit_number_called(room_id, room_data, number_to_call, outcome['next_turn_sid'], outcome['changed_progress'], outcome['seq'])
+        if room_data['spectators']:
+            spectator_feed.record_call(room_id, outcome['seq'], number_to_call, outcome['next_turn_sid'], outcome['changed_progress'])
+        log_event(logging.INFO, 'number_called', "Player {sid} called number {number} in room {room_id}",
+                  sampled=True, room_id=room_id, sid=caller_sid, number=number_to_call, duration_ms=elapsed_ms(started))
 
+        winners = outcome['winners']
         if winners:
-            final_boards_data = {sid: room_data['boards'][sid] for sid in room_data['members']}
-            final_marked_boards_data = {sid: room_data['marked_boards'][sid] for sid in room_data['members']}
-            final_bingo_progress = {sid: room_data['bingo_progress'][sid] for sid in room_data['members']}
-            final_bingo_string = {sid: room_data['bingo_string'][sid] for sid in room_data['members']}
-
+            winner_sid = room_data['winner_sid']
             if len(winners) == 1:
-                winner_sid = winners[0]
-                emit('bingo_win', {
-                    'winner_sid': winner_sid,
-                    'final_boards': final_boards_data,
-                    'final_marked_boards': final_marked_boards_data,
-                    'bingo_progress': final_bingo_progress,
-                    'bingo_string': final_bingo_string,
-                    'called_numbers_final': list(room_data['called_numbers']),
-                    'player_names': room_data['player_names']
-                }, to=room_id)
-                print(f"BINGO! Player {winner_sid} won in room {room_id}.")
-                # Do NOT delete room here, allow for play again
-            elif len(winners) == 2:
-                winner_sid = request.sid # Current player is declared winner in simultaneous bingo
-                emit('bingo_win', {
-                    'winner_sid': winner_sid,
-                    'final_boards': final_boards_data,
-                    'final_marked_boards': final_marked_boards_data,
-                    'bingo_progress': final_bingo_progress,
-                    'bingo_string': final_bingo_string,
-                    'called_numbers_final': list(room_data['called_numbers']),
-                    'player_names': room_data['player_names']
-                }, to=room_id)
-                print(f"BINGO! Both players won simultaneously in room {room_id}. Current player {winner_sid} is declared winner.")
-                # Do NOT delete room here, allow for play again
+                log_event(logging.INFO, 'bingo_win', "BINGO! Player {winner_sid} won in room {room_id}.",
+                          room_id=room_id, sid=caller_sid, winner_sid=winner_sid, duration_ms=elapsed_ms(started))
+            else:
+                log_event(logging.INFO, 'bingo_win', "BINGO! {winner_count} players won simultaneously in room {room_id}. Player {winner_sid} is declared winner.",
+                          room_id=room_id, sid=caller_sid, winner_sid=winner_sid, winner_count=len(winners),
+                          duration_ms=elapsed_ms(started))
+            emit_bingo_win(room_id, room_data, winner_sid, outcome['win_seq'])
+            record_result(room_id, room_data, 'bingo')
+            if room_data['spectators']:
+                spectator_feed.record_win(room_id, outcome['win_seq'], winner_sid)
+            # Do NOT delete room here, allow for play again
+        else:
+            schedule_bot_turn(room_id, room_data)
 
-    else:
-        print(f"Call number from board failed: Room not found for {request.sid}")
+def schedule_bot_turn(room_id, room_data):
+    """Has the computer player take its turn shortly if the game is waiting on one."""
+    bot_sid = room_data['current_turn_sid']
+    if room_state(room_data) == 'in_game' and is_bot(bot_sid):
+        socketio.start_background_task(play_bot_turn, room_id, bot_sid, room_data['seq'])
+
+def play_bot_turn(room_id, bot_sid, seq):
+    """
+    Background task: after the move delay, picks the bot's number from the room as
+    it is then and calls it. Nothing happens if the game moved on in the meantime
+    (the room is gone, reset or someone else's turn); seq is re-checked under the
+    room lock by apply_number_call.
+    """
+    socketio.sleep(app.config['BOT_MOVE_DELAY_SECONDS'])
+    started = time.perf_counter()
+    room_data = registry.get(room_id)
+    if room_data is None or room_data['seq'] != seq or room_data['current_turn_sid'] != bot_sid:
+        return
+    number = choose_number(room_data['engines'][bot_sid], bot_random, app.config['BOT_STRATEGY'])
+    call_number(room_id, bot_sid, number, started, expected_seq=seq)
 
-def check_bingo(room_data):
+def record_result(room_id, room_data, outcome):
     """
-    Checks all players' boards for Bingo lines, updates their progress,
-    and determines the 'B-I-N-G-O' string.
+    Queues a finished game for the results store: everyone still in the room plus
+    the players who departed from it mid-game.
+    Computer players are left out; they all share one name and would add up into a
+    single leaderboard entry.
     """
-    winning_sids = []
-    for player_sid in room_data['members']:
-        marked_board = room_data['marked_boards'][player_sid]
-        completed_lines = 0
-
-        # Check rows
-        for row in marked_board:
-            if all(row):
-                completed_lines += 1
-        # Check columns
-        for col_idx in range(5):
-            if all(marked_board[row_idx][col_idx] for row_idx in range(5)):
-                completed_lines += 1
-        # Check diagonals
-        if all(marked_board[i][i] for i in range(5)):
-            completed_lines += 1
-        if all(marked_board[i][4-i] for i in range(5)):
-            completed_lines += 1
-
-        room_data['bingo_progress'][player_sid] = completed_lines
-
-        bingo_string = ""
-        if completed_lines >= 1:
-            bingo_string = "B"
-        if completed_lines >= 2:
-            bingo_string = "BI"
-        if completed_lines >= 3:
-            bingo_string = "BIN"
-        if completed_lines >= 4:
-            bingo_string = "BING"
-        if completed_lines >= 5:
-            bingo_string = "BINGO"
-        room_data['bingo_string'][player_sid] = bingo_string
-
-        if completed_lines >= 5:
-            winning_sids.append(player_sid)
-    return winning_sids
+    if results_store is None:
+        return
+    winner_sid = room_data['winner_sid']
+    players = [{
+        'name': room_data['player_names'].get(sid, 'Player'),
+        'lines': room_data['bingo_progress'].get(sid, 0),
+        'won': sid == winner_sid
+    } for sid in room_data['members'] if not is_bot(sid)]
+    results_store.record_game({
+        'room_id': room_id,
+        'outcome': outcome,
+        'winner_name': room_data['player_names'].get(winner_sid) if winner_sid else None,
+        'called_numbers': list(room_data['called_sequence']),
+        'started_at': room_data['started_at'],
+        'finished_at': time.time(),
+        'players': players + room_data['departed']
+    })
+
+@socketio.on('request_game_snapshot')
+def handle_request_game_snapshot():
+    """Sends the full game state to a client that detected a gap in the delta sequence."""
+    room_id = registry.room_id_for_sid(request.sid)
+    room_data = registry.get(room_id)
+    if room_data:
+        emit('game_snapshot', build_game_snapshot(room_id, room_data), to=request.sid)
+    else:
+        log_event(logging.WARNING, 'game_snapshot_failed', "Game snapshot request failed: Room not found for {sid}",
+                  sid=request.sid)
 
 @socketio.on('request_play_again')
 def handle_request_play_again():
     """Handles a player requesting to play again."""
-    room_id = None
-    for r_id, room_data in rooms.items():
-        if request.sid in room_data['members']:
-            room_id = r_id
-            break
-
-    if room_id:
-        room_data = rooms[room_id]
-        room_data['play_again_requests'][request.sid] = True
-        requester_name = room_data['player_names'].get(request.sid, 'Player')
-        print(f"Player {request.sid} ({requester_name}) requested to play again in room {room_id}.")
-
-        other_player_sid = [sid for sid in room_data['members'] if sid != request.sid]
-
-        if other_player_sid:
-            other_player_sid = other_player_sid[0]
-            # Check if the other player has also requested
-            if room_data['play_again_requests'].get(other_player_sid):
-                # Both requested simultaneously, auto-accept
-                print(f"Both players requested to play again in room {room_id}. Auto-accepting.")
-                reset_game_state(room_id)
-                emit('game_reset_for_play_again', {'room_id': room_id, 'player_names': room_data['player_names']}, to=room_id)
+    room_id = registry.room_id_for_sid(request.sid)
+
+    with registry.locked(room_id) as room_data:
+        if room_data:
+            room_data['play_again_requests'][request.sid] = True
+            log_room_event(room_id, room_data, 'P', room_data['seats'][request.sid])
+            accept_rematch_for_bots(room_id, room_data)
+            requester_name = room_data['player_names'].get(request.sid, 'Player')
+            log_event(logging.INFO, 'play_again_requested', "Player {sid} ({player_name}) requested to play again in room {room_id}.",
+                      room_id=room_id, sid=request.sid, player_name=requester_name)
+
+            other_player_sids = [sid for sid in room_data['members'] if sid != request.sid]
+
+            if other_player_sids:
+                # Check if every other player has also requested or accepted
+                if everyone_wants_rematch(room_data):
+                    log_event(logging.INFO, 'play_again_accepted', "All players requested to play again in room {room_id}. Auto-accepting.",
+                              room_id=room_id, sid=request.sid)
+                    reset_game_state(room_id, room_data)
+                    emit('game_reset_for_play_again', {'room_id': room_id, 'player_names': room_data['player_names']}, to=room_id)
+                    refresh_spectators(room_id, room_data)
+                else:
+                    # Ask every player who hasn't agreed yet
+                    for other_player_sid in other_player_sids:
+                        if not wants_rematch(room_data, other_player_sid):
+                            emit('play_again_requested', {
+                                'requester_sid': request.sid,
+                                'requester_name': requester_name
+                            }, to=other_player_sid)
             else:
-                # Notify the other player of the request
-                emit('play_again_requested', {
-                    'requester_sid': request.sid,
-                    'requester_name': requester_name
-                }, to=other_player_sid)
-        else:
-            # Should not happen in a 2-player game, but handle for robustness
-            print(f"No other player in room {room_id} for play again request.")
+                # Everyone else has left; nobody to play again with
+                log_event(logging.WARNING, 'play_again_failed', "No other player in room {room_id} for play again request.",
+                          room_id=room_id, sid=request.sid)
+            registry.save(room_id, room_data)
 
 @socketio.on('respond_play_again')
 def handle_respond_play_again(data):
     """Handles a player responding to a 'Play Again' request."""
-    room_id = None
-    for r_id, room_data in rooms.items():
-        if request.sid in room_data['members']:
-            room_id = r_id
-            break
-
-    if room_id:
-        room_data = rooms[room_id]
-        response = data.get('response') # 'accept' or 'reject'
-        requester_sid = data.get('requester_sid') # The SID of the player who initiated the request
-
-        room_data['play_again_responses'][request.sid] = response
-        responder_name = room_data['player_names'].get(request.sid, 'Player')
-        print(f"Player {request.sid} ({responder_name}) responded '{response}' to play again in room {room_id}.")
-
-        other_player_sid = [sid for sid in room_data['members'] if sid != request.sid]
-
-        if other_player_sid:
-            other_player_sid = other_player_sid[0]
-
-            if response == 'accept':
-                # Check if the other player also accepted or requested
-                if room_data['play_again_responses'].get(other_player_sid) == 'accept' or \
-                   room_data['play_again_requests'].get(other_player_sid): # If other player already requested
-                    print(f"Both players ready to play again in room {room_id}. Resetting game.")
-                    reset_game_state(room_id)
-                    emit('game_reset_for_play_again', {'room_id': room_id, 'player_names': room_data['player_names']}, to=room_id)
-                else:
-                    # Inform the requester that the other player accepted, but is waiting for their action
-                    emit('play_again_response_status', {
-                        'status': 'accepted_waiting',
-                        'responder_name': responder_name
+    room_id = registry.room_id_for_sid(request.sid)
+
+    with registry.locked(room_id) as room_data:
+        if room_data:
+            response = data.get('response') # 'accept' or 'reject'
+            requester_sid = data.get('requester_sid') # The SID of the player who initiated the request
+
+            room_data['play_again_responses'][request.sid] = response
+            log_room_event(room_id, room_data, 'A', room_data['seats'][request.sid], response)
+            responder_name = room_data['player_names'].get(request.sid, 'Player')
+            log_event(logging.INFO, 'play_again_response', "Player {sid} ({player_name}) responded '{response}' to play again in room {room_id}.",
+                      room_id=room_id, sid=request.sid, player_name=responder_name, response=response)
+
+            other_player_sids = [sid for sid in room_data['members'] if sid != request.sid]
+
+            if other_player_sids:
+                if response == 'accept':
+                    # Reset once every player has requested or accepted
+                    if everyone_wants_rematch(room_data):
+                        log_event(logging.INFO, 'play_again_accepted', "All players ready to play again in room {room_id}. Resetting game.",
+                                  room_id=room_id, sid=request.sid)
+                        reset_game_state(room_id, room_data)
+                        emit('game_reset_for_play_again', {'room_id': room_id, 'player_names': room_data['player_names']}, to=room_id)
+                        refresh_spectators(room_id, room_data)
+                    else:
+                        # Inform the requester that this player accepted, but others are still to answer
+                        emit('play_again_response_status', {
+                            'status': 'accepted_waiting',
+                            'responder_name': responder_name
+                        }, to=requester_sid)
+                elif response == 'reject':
+                    # Notify the requester that their request was rejected
+                    emit('play_again_rejected', {
+                        'rejecter_name': responder_name
                     }, to=requester_sid)
-            elif response == 'reject':
-                # Notify the requester that their request was rejected
-                emit('play_again_rejected', {
-                    'rejecter_name': responder_name
-                }, to=requester_sid)
-
-                # Remove the rejecting player from the room and clean up
-                leave_room(room_id)
-                if request.sid in room_data['members']:
-                    room_data['members'].remove(request.sid)
-                if request.sid in room_data['boards']:
-                    del room_data['boards'][request.sid]
-                if request.sid in room_data['marked_boards']:
-                    del room_data['marked_boards'][request.sid]
-                if request.sid in room_data['bingo_progress']:
-                    del room_data['bingo_progress'][request.sid]
-                if request.sid in room_data['bingo_string']:
-                    del room_data['bingo_string'][request.sid]
-                if request.sid in room_data['player_names']:
-                    del room_data['player_names'][request.sid]
-                
-                # Clear any pending play again states for the room
-                room_data['play_again_requests'] = {}
-                room_data['play_again_responses'] = {}
-
-                print(f"Player {request.sid} ({responder_name}) rejected play again and left room {room_id}.")
-
-                if not room_data['members']:
-                    print(f"Room {room_id} is empty after rejection, deleting.")
-                    del rooms[room_id]
-                else:
-                    # If one player rejects, the other player wins by default (similar to disconnect)
-                    remaining_sid = room_data['members'][0]
-                    remaining_player_name = room_data['player_names'].get(remaining_sid, 'You')
-                    emit('game_over', {
-                        'message': f'Opponent ({responder_name}) rejected play again and left the room. Game ended.',
-                        'winner_sid': remaining_sid,
-                        'final_boards': {}, # No final boards to show as game is not played
-                        'final_marked_boards': {},
-                        'bingo_progress': {},
-                        'bingo_string': {},
-                        'called_numbers_final': [],
-                        'player_names': room_data['player_names']
-                    }, to=remaining_sid)
+
+                    # Remove the rejecting player from the room and clean up
+                    leave_room(room_id)
+                    remove_player(room_id, room_data, request.sid)
+
+                    log_event(logging.INFO, 'play_again_rejected', "Player {sid} ({player_name}) rejected play again and left room {room_id}.",
+                              room_id=room_id, sid=request.sid, player_name=responder_name)
+
+                    if not has_human_players(room_data):
+                        log_event(logging.INFO, 'room_deleted', "Room {room_id} is empty after rejection, deleting.",
+                                  room_id=room_id)
+                        delete_room(room_id, room_data)
+                        return
+                    elif len(room_data['members']) >= 2:
+                        # The others stay together and can ask each other again
+                        registry.save(room_id, room_data)
+                        announce_player_left(room_id, room_data, request.sid, responder_name)
+                        return
+                    else:
+                        # If one player rejects, the last player wins by default (similar to disconnect)
+                        remaining_sid = room_data['members'][0]
+                        emit('game_over', {
+                            'message': f'Opponent ({responder_name}) rejected play again and left the room. Game ended.',
+                            'winner_sid': remaining_sid,
+                            'final_boards': {}, # No final boards to show as game is not played
+                            'final_marked_boards': {},
+                            'bingo_progress': {},
+                            'bingo_string': {},
+                            'called_numbers_final': [],
+                            'player_names': room_data['player_names']
+                        }, to=remaining_sid)
+            else:
+                log_event(logging.WARNING, 'play_again_failed', "No other player to respond to in room {room_id}.",
+                          room_id=room_id, sid=request.sid)
+            registry.save(room_id, room_data)
         else:
-            print(f"No other player to respond to in room {room_id}.")
-    else:
-        print(f"Respond play again failed: Room not found for {request.sid}")
+            log_event(logging.WARNING, 'play_again_failed', "Respond play again failed: Room not found for {sid}",
+                      sid=request.sid)
 
 
-def reset_game_state(room_id):
-    """Resets the game state for a given room, keeping members and names."""
-    if room_id in rooms:
-        room_data = rooms[room_id]
-        room_data['boards'] = {}
-        room_data['called_numbers'] = set()
-        room_data['current_turn_sid'] = None
-        room_data['marked_boards'] = {}
+def accept_rematch_for_bots(room_id, room_data):
+    """Computer players agree to every rematch."""
+    for sid in room_data['members']:
+        if is_bot(sid):
+            room_data['play_again_responses'][sid] = 'accept'
+            log_room_event(room_id, room_data, 'A', room_data['seats'][sid], 'accept')
+
+
+def reset_game_state(room_id, room_data):
+    """
+    Resets the game state for a given room, keeping members and names. Computer
+    players are dealt a new board straight away. The caller saves the room.
+    """
+    if room_data is not None:
+        reset_game(room_data)
+        log_room_event(room_id, room_data, 'X')
         for sid in room_data['members']:
-            room_data['bingo_progress'][sid] = 0
-            room_data['bingo_string'][sid] = ""
-        room_data['play_again_requests'] = {} # Clear requests
-        room_data['play_again_responses'] = {} # Clear responses
-        print(f"Game state reset for room {room_id}.")
+            if is_bot(sid):
+                deal_bot_board(room_id, room_data, sid)
+        log_event(logging.INFO, 'game_reset', "Game state reset for room {room_id}.", room_id=room_id)
+
+
+@socketio.on('rejoin_game_room')
+def handle_rejoin_game_room(data):
+    """Handles a player reclaiming their slot with the reconnect token they were issued."""
+    room_id = data.get('room_id')
+    token = data.get('reconnect_token')
+    current_room_id = registry.room_id_for_sid(request.sid)
+    if current_room_id and current_room_id != room_id:
+        leave_current_room(request.sid)
+    with registry.locked(room_id) as room_data:
+        old_sid = room_data['reconnect_tokens'].get(token) if room_data and token else None
+        if old_sid is None:
+            emit('rejoin_game_room_failed', {
+                'room_id': room_id,
+                'message': 'Your seat in this room has expired or the room no longer exists.'
+            }, to=request.sid)
+            log_event(logging.WARNING, 'rejoin_failed', "Rejoin failed for {sid} in room {room_id}: unknown room or token.",
+                      room_id=room_id, sid=request.sid)
+            return
+
+        if old_sid != request.sid:
+            leave_room(room_id, sid=old_sid)
+            rebind_player_state(room_id, room_data, old_sid, request.sid)
+        room_data['disconnected'].pop(request.sid, None)
+        rejoin_record = [room_data['seats'][request.sid], request.sid]
+        if 'protocol_version' in data:
+            room_data['protocol_versions'][request.sid] = client_protocol_version(data)
+            rejoin_record.append(room_data['protocol_versions'][request.sid])
+        registry.save(room_id, room_data)
+        log_room_event(room_id, room_data, 'K', *rejoin_record)
+        join_room(room_id)
+
+        player_name = room_data['player_names'].get(request.sid, 'Player')
+        log_event(logging.INFO, 'player_rejoined', "Player {sid} ({player_name}) rejoined room {room_id} (was {old_sid}).",
+                  room_id=room_id, sid=request.sid, player_name=player_name, old_sid=old_sid)
+
+        # Replay the stored game state so the client can rebuild its view in one message.
+        payload = build_game_snapshot(room_id, room_data)
+        payload.update({
+            'is_host': room_data['host_sid'] == request.sid,
+            'marked_boards': {sid: room_data['engines'][sid].marked_grid() for sid in payload['boards']},
+            'boards_submitted': all_boards_submitted(room_data),
+            'last_called_number': room_data['last_called_number'],
+            'reconnect_token': token
+        })
+        emit('rejoin_game_room_success', payload, to=request.sid)
+        refresh_spectators(room_id, room_data)
+        emit('player_rejoined', {
+            'old_sid': old_sid,
+            'sid': request.sid,
+            'player_name': player_name
+        }, to=room_id, skip_sid=request.sid)
+
+
+def remove_player(room_id, room_data, sid):
+    """
+    Takes a player out of a room: their membership, per-player state and place in
+    the turn order. Their turn passes to the next player and, if they hosted the
+    room, the host role passes to the longest-standing human player. The caller saves.
+    """
+    seat = room_data['seats'].get(sid)
+    was_host = room_data['host_sid'] == sid
+    unseat_player(room_data, sid)
+    registry.remove_member(room_id, room_data, sid)
+    if seat is not None:
+        log_room_event(room_id, room_data, 'L', seat)
+    if was_host:
+        new_host_sid = next((member for member in room_data['members'] if not is_bot(member)), None)
+        if new_host_sid:
+            registry.assign_host(room_id, room_data, new_host_sid)
+            log_room_event(room_id, room_data, 'H', room_data['seats'][new_host_sid])
+
+
+def announce_player_left(room_id, room_data, sid, player_name):
+    """Tells the players who remain that someone left and the game carries on without them."""
+    socketio.emit('player_left', {
+        'sid': sid,
+        'player_name': player_name,
+        'current_turn': room_data['current_turn_sid'],
+        'host_sid': room_data['host_sid'],
+        'turn_order': room_data['members']
+    }, to=room_id)
+    refresh_spectators(room_id, room_data)
+    # The turn may have passed to a computer player.
+    schedule_bot_turn(room_id, room_data)
+    # The player who left may have been the last one without a board.
+    if room_state(room_data) == 'waiting' and all_boards_submitted(room_data):
+        socketio.emit('boards_received', {
+            'boards': {member: room_data['engines'][member].numbers() for member in room_data['members']}
+        }, to=room_id)
+
+
+def drop_player(room_id, sid, expired_before=None):
+    """
+    Removes a disconnected player from their room for good, as part_from_room does.
+    With expired_before, the player is only dropped if their held slot is still
+    waiting and expired before that time.
+    """
+    with registry.locked(room_id) as room_data:
+        if room_data is None or sid not in room_data['members']:
+            return
+        if expired_before is not None and room_data['disconnected'].get(sid, expired_before + 1) > expired_before:
+            return
+        part_from_room(room_id, room_data, sid, 'disconnected')
+
+
+def part_from_room(room_id, room_data, sid, departure):
+    """
+    Takes a player who is gone for good out of a room, under its lock. If two or
+    more players remain the game carries on without them; a last remaining player
+    wins by default and the room is deleted, as it is when only computer players
+    remain. departure ('disconnected', 'left the room') goes into that player's
+    game_over message.
+    """
+    player_name = room_data['player_names'].get(sid, 'Opponent')
+    game_in_progress = room_state(room_data) == 'in_game'
+    remove_player(room_id, room_data, sid)
+    log_event(logging.INFO, 'player_left', "Player {sid} ({player_name}) left room {room_id}.",
+              room_id=room_id, sid=sid, player_name=player_name)
+
+    if not has_human_players(room_data):
+        log_event(logging.INFO, 'room_deleted', "Room {room_id} is empty, deleting.", room_id=room_id)
+        delete_room(room_id, room_data)
+        return
+
+    if len(room_data['members']) >= 2:
+        registry.save(room_id, room_data)
+        announce_player_left(room_id, room_data, sid, player_name)
+        return
+
+    remaining_sid = room_data['members'][0]
+    remaining_player_name = room_data['player_names'].get(remaining_sid, 'You')
+    log_event(logging.INFO, 'game_over', "Player {sid} ({player_name}) remains in room {room_id}. Notifying game over.",
+              room_id=room_id, sid=remaining_sid, player_name=remaining_player_name)
+
+    # Prepare final board states and marked boards for the remaining player
+    # Expand the compact boards and marked bitmasks into the JSON shapes the clients render.
+    engines = room_data['engines']
+    final_boards_data = {sid: engines[sid].numbers() if sid in engines else [] for sid in room_data['members']}
+    final_marked_boards_data = {
+        sid: engines[sid].marked_grid() if sid in engines else [[False]*5 for _ in range(5)]
+        for sid in room_data['members']
+    }
+    final_bingo_progress = {sid: room_data['bingo_progress'].get(sid, 0) for sid in room_data['members']}
+    final_bingo_string = {sid: room_data['bingo_string'].get(sid, "") for sid in room_data['members']}
+
+    socketio.emit('game_over', {
+        'message': f'Opponent ({player_name}) {departure}. Game ended.',
+        'winner_sid': remaining_sid,
+        'final_boards': final_boards_data,
+        'final_marked_boards': final_marked_boards_data,
+        'bingo_progress': final_bingo_progress,
+        'bingo_string': final_bingo_string,
+        'called_numbers_final': list(room_data['called_numbers']),
+        'player_names': room_data['player_names']
+    }, to=remaining_sid)
+    if game_in_progress:
+        room_data['winner_sid'] = remaining_sid
+        record_result(room_id, room_data, 'forfeit')
+    delete_room(room_id, room_data)
+
+
+def reap_expired_slots(now=None):
+    """Drops every held player slot whose reconnect grace period has run out."""
+    if now is None:
+        now = time.time()
+    # Only the rooms with a seat due are loaded, not every room.
+    for room_id in registry.expiring_room_ids(now):
+        room_data = registry.get(room_id)
+        if room_data is None:
+            continue
+        for sid, expires_at in list(room_data['disconnected'].items()):
+            if expires_at <= now:
+                log_event(logging.INFO, 'reconnect_expired', "Reconnect grace period expired for {sid} in room {room_id}.",
+                          room_id=room_id, sid=sid)
+                drop_player(room_id, sid, expired_before=now)
+
+
+def is_idle(room_data, now):
+    ttl = app.config['ROOM_IDLE_TTL_SECONDS'][room_state(room_data)]
+    return now - room_data.get('last_activity', now) >= ttl
+
+
+def reap_idle_rooms(now=None):
+    """
+    Evicts rooms nobody has touched for longer than the idle TTL of their state,
+    such as a room whose host never got a joiner or whose players vanished
+    without a disconnect event. Members still connected get 'room_expired'.
+    """
+    if now is None:
+        now = time.time()
+    # The registry files rooms by state and last activity, so only rooms past their TTL are loaded.
+    idle_room_ids = [room_id for state, ttl in app.config['ROOM_IDLE_TTL_SECONDS'].items()
+                     for room_id in registry.idle_room_ids(state, now - ttl)]
+    for room_id in idle_room_ids:
+        with registry.locked(room_id) as room_data:
+            # Re-check under the lock: an event may have touched the room meanwhile.
+            if room_data is None or not is_idle(room_data, now):
+                continue
+            state = room_state(room_data)
+            delete_room(room_id, room_data)
+        rooms_evicted.inc(state)
+        log_event(logging.INFO, 'room_expired', "Room {room_id} was idle too long while {state}, evicting.",
+                  room_id=room_id, state=state, idle_seconds=round(now - room_data['last_activity'], 1))
+        socketio.emit('room_expired', {
+            'room_id': room_id,
+            'message': 'This room was closed after being inactive for too long.'
+        }, to=room_id)
+        socketio.close_room(room_id)
+
+
+def room_reaper_loop():
+    """Background task that periodically reaps expired player slots, idle rooms and refilled rate-limit buckets."""
+    while True:
+        socketio.sleep(app.config['REAPER_INTERVAL_SECONDS'])
+        reap_expired_slots()
+        reap_idle_rooms()
+        event_limits.sweep()
+        join_failures.sweep()
+
+
+def ensure_room_reaper_started():
+    """Starts the room reaper the first time a room is created or a slot is held."""
+    global room_reaper_started
+    with room_reaper_lock:
+        if room_reaper_started:
+            return
+        room_reaper_started = True
+    socketio.start_background_task(room_reaper_loop)
+
+
+def spectator_feed_loop():
+    """Background task that sends spectators their coalesced updates."""
+    while True:
+        socketio.sleep(app.config['SPECTATOR_FLUSH_INTERVAL_SECONDS'])
+        spectator_feed.flush()
+
+
+def ensure_spectator_feed_started():
+    """Starts the spectator feed the first time anyone watches a room."""
+    global spectator_feed_started
+    with room_reaper_lock:
+        if spectator_feed_started:
+            return
+        spectator_feed_started = True
+    socketio.start_background_task(spectator_feed_loop)
+
+
+@socketio.on('watch_room')
+def handle_watch_room(data):
+    """
+    Lets a client watch a room read-only. They get one snapshot now and coalesced
+    spectator_update deltas afterwards; watchers never count towards max_players.
+    """
+    room_id = data.get('room_id')
+    if join_attempts_blocked('watch_room'):
+        return
+    stop_watching(request.sid)
+    with registry.locked(room_id) as room_data:
+        if room_data is None:
+            emit('invalid_room', {'room_id': room_id}, to=request.sid)
+            record_failed_join()
+            return
+        # Joined before the snapshot is taken, under the room lock, so no call falls between them.
+        join_room(spectator_channel(room_id))
+        spectating[request.sid] = room_id
+        room_data['spectators'] += 1
+        registry.save(room_id, room_data)
+        snapshot = build_game_snapshot(room_id, room_data)
+        snapshot['spectators'] = room_data['spectators']
+    ensure_spectator_feed_started()
+    emit('spectator_snapshot', snapshot, to=request.sid)
+    log_event(logging.INFO, 'spectator_joined', "{sid} is watching room {room_id} ({spectators} spectators).",
+              sampled=True, room_id=room_id, sid=request.sid, spectators=snapshot['spectators'])
+
+
+@socketio.on('stop_watching')
+def handle_stop_watching():
+    """Stops sending a spectator updates for the room they watch."""
+    stop_watching(request.sid)
+
+
+def stop_watching(sid):
+    """Takes a SID off the spectator channel of the room it watches, if any."""
+    room_id = spectating.pop(sid, None)
+    if room_id is None:
+        return
+    leave_room(spectator_channel(room_id), sid=sid)
+    with registry.locked(room_id) as room_data:
+        if room_data:
+            room_data['spectators'] = max(0, room_data['spectators'] - 1)
+            registry.save(room_id, room_data)
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    """Handles a client disconnecting from the server."""
-    for room_id, room_data in list(rooms.items()):
-        if request.sid in room_data['members']:
+    """
+    Handles a client disconnecting from the server. The player's slot is held for
+    the reconnect grace period so a dropped connection or page navigation can
+    rejoin with its reconnect token; the reaper ends the game if it never does.
+    """
+    stop_watching(request.sid)
+    event_limits.forget_sid(request.sid)
+    room_id = registry.room_id_for_sid(request.sid)
+    grace_seconds = app.config['RECONNECT_GRACE_SECONDS']
+    if room_id and grace_seconds <= 0:
+        drop_player(room_id, request.sid)
+        return
+
+    with registry.locked(room_id) as room_data:
+        if room_data:
             player_name = room_data['player_names'].get(request.sid, 'Opponent')
-            room_data['members'].remove(request.sid)
-            print(f"Player {request.sid} ({player_name}) disconnected from room {room_id}.")
-
-            # Clean up player-specific data
-            if request.sid in room_data['boards']:
-                del room_data['boards'][request.sid]
-            if request.sid in room_data['marked_boards']:
-                del room_data['marked_boards'][request.sid]
-            if request.sid in room_data['bingo_progress']:
-                del room_data['bingo_progress'][request.sid]
-            if request.sid in room_data['bingo_string']:
-                del room_data['bingo_string'][request.sid]
-            if request.sid in room_data['player_names']:
-                del room_data['player_names'][request.sid]
-            if request.sid in room_data['play_again_requests']: # Clean up play again requests
-                del room_data['play_again_requests'][request.sid]
-            if request.sid in room_data['play_again_responses']: # Clean up play again responses
-                del room_data['play_again_responses'][request.sid]
-
-
-            if not room_data['members']:
-                print(f"Room {room_id} is empty, deleting.")
-                del rooms[room_id]
-            else:
-                remaining_sid = room_data['members'][0]
-                remaining_player_name = room_data['player_names'].get(remaining_sid, 'You')
-                print(f"Player {remaining_sid} ({remaining_player_name}) remains in room {room_id}. Notifying game over.")
-
-                # Prepare final board states and marked boards for the remaining player
-                final_boards_data = {sid: room_data['boards'].get(sid, []) for sid in room_data['members']}
-                final_marked_boards_data = {sid: room_data['marked_boards'].get(sid, [[False]*5 for _ in range(5)]) for sid in room_data['members']}
-                final_bingo_progress = {sid: room_data['bingo_progress'].get(sid, 0) for sid in room_data['members']}
-                final_bingo_string = {sid: room_data['bingo_string'].get(sid, "") for sid in room_data['members']}
-
-                # Clear any pending play again states for the room
-                room_data['play_again_requests'] = {}
-                room_data['play_again_responses'] = {}
-
-                emit('game_over', {
-                    'message': f'Opponent ({player_name}) disconnected. Game ended.',
-                    'winner_sid': remaining_sid,
-                    'final_boards': final_boards_data,
-                    'final_marked_boards': final_marked_boards_data,
-                    'bingo_progress': final_bingo_progress,
-                    'bingo_string': final_bingo_string,
-                    'called_numbers_final': list(room_data['called_numbers']),
-                    'player_names': room_data['player_names']
-                }, to=remaining_sid)
-                del rooms[room_id]
-            break
+            expires_at = room_data['disconnected'][request.sid] = time.time() + grace_seconds
+            registry.save(room_id, room_data)
+            log_room_event(room_id, room_data, 'D', room_data['seats'][request.sid], expires_at)
+            ensure_room_reaper_started()
+            log_event(logging.INFO, 'player_disconnected', "Player {sid} ({player_name}) disconnected from room {room_id}. Holding slot for {grace_seconds}s.",
+                      room_id=room_id, sid=request.sid, player_name=player_name, grace_seconds=grace_seconds)
+            emit('player_disconnected', {
+                'sid': request.sid,
+                'player_name': player_name,
+                'grace_seconds': grace_seconds
+            }, to=room_id, skip_sid=request.sid)
+
+def recover_rooms(now=None):
+    """
+    Rebuilds the rooms whose logs are still open, i.e. the rooms a restart lost.
+    Every human player's seat is held for the reconnect grace period so they can
+    rejoin with their token; rooms nobody can come back to have their logs archived.
+
+    Only the process that serves the rooms may call this, once, at startup: see
+    __main__ below and post_worker_init in gunicorn.conf.py. Rooms kept in Redis
+    outlive a restart on their own, so nothing is replayed then.
+    """
+    if room_log is None or app.config['REDIS_URL']:
+        return
+    if now is None:
+        now = time.time()
+    grace_seconds = app.config['RECONNECT_GRACE_SECONDS']
+    started = time.perf_counter()
+    recovered = 0
+    for room_id in room_log.room_ids():
+        try:
+            room_data = replay(room_log.read(room_id))
+        except (ValueError, KeyError, IndexError, TypeError) as exc:
+            log_event(logging.ERROR, 'room_log_unreadable', "Could not replay the log of room {room_id}: {error}",
+                      room_id=room_id, error=repr(exc))
+            continue
+        if room_data is None or registry.get(room_id) is not None or not has_human_players(room_data):
+            if room_data is not None:
+                room_log.archive(room_id, room_data['created_at'])
+            continue
+        room_data['last_activity'] = now
+        for sid in room_data['members']:
+            if not is_bot(sid):
+                room_data['disconnected'][sid] = now + grace_seconds
+                log_room_event(room_id, room_data, 'D', room_data['seats'][sid], now + grace_seconds)
+        registry.create_room(room_id, room_data)
+        schedule_bot_turn(room_id, room_data)
+        recovered += 1
+    if recovered:
+        ensure_room_reaper_started()
+    log_event(logging.INFO, 'rooms_recovered', "Recovered {count} rooms from their logs in {duration_ms}ms.",
+              count=recovered, duration_ms=elapsed_ms(started))
 
 if __name__ == '__main__':
+    # debug=True runs this module again in a reloader child, which is the process that serves.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        recover_rooms()
     socketio.run(app, host='0.0.0.0', debug=True)
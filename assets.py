@@ -0,0 +1,194 @@
+"""
+Static asset build and serving.
+
+Running this module copies every file under static/ into static/dist/ under a
+content-hashed name (css/index.css -> css/index.3f2a9c1d.css) and writes
+manifest.json mapping the original names to the hashed ones. Text assets also
+get pre-compressed .gz and .br copies; the title PNG is scaled to the size it is
+shown at and saved as an optimised PNG plus a WebP variant.
+
+A hashed name changes whenever the content does, so /assets/ responses are
+cached for a year as immutable. Templates call asset_url(), which falls back
+to the plain /static/ URL for anything not in the manifest, so the app also
+runs without a build.
+
+Build before deploying:
+    python assets.py
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # Optional: without it no .br copies are built
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: without it images are copied as they are
+    Image = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Only text compresses; images and MP3s are already compressed.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt')
+# The title image is drawn 300px wide; twice that keeps it sharp on high-DPI screens.
+IMAGE_MAX_WIDTH = 600
+WEBP_QUALITY = 82
+
+# Preferred first when a client weights several the same.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# The uncompressed file is acceptable unless refused, but loses to any coding the client lists.
+IDENTITY_DEFAULT_Q = 0.001
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_name(name, digest):
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest[:8]}{extension}"
+
+
+def optimise_image(data, image_format):
+    """Scales an image down to IMAGE_MAX_WIDTH and re-encodes it in image_format ('PNG' or 'WEBP')."""
+    image = Image.open(io.BytesIO(data))
+    if image.width > IMAGE_MAX_WIDTH:
+        height = round(image.height * IMAGE_MAX_WIDTH / image.width)
+        image = image.resize((IMAGE_MAX_WIDTH, height), Image.LANCZOS)
+    output = io.BytesIO()
+    if image_format == 'WEBP':
+        image.save(output, 'WEBP', quality=WEBP_QUALITY, method=6)
+    else:
+        image.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+def write_asset(name, data, manifest):
+    """Writes data under its hashed name (plus compressed copies) and records it in the manifest."""
+    digest = content_hash(data)
+    target = hashed_name(name, digest)
+    path = os.path.join(DIST_DIR, target)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    encodings = []
+    if name.endswith(COMPRESSIBLE_EXTENSIONS):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        encodings.append('gzip')
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+            encodings.append('br')
+    manifest[name] = {'file': target, 'etag': digest, 'size': len(data), 'encodings': encodings}
+    return manifest[name]
+
+
+def source_files():
+    """Yields the path of every static file relative to static/, skipping the build output."""
+    for directory, subdirectories, files in os.walk(STATIC_DIR):
+        if os.path.abspath(directory) == DIST_DIR:
+            subdirectories[:] = []
+            continue
+        subdirectories.sort()
+        for filename in sorted(files):
+            yield os.path.relpath(os.path.join(directory, filename), STATIC_DIR).replace(os.sep, '/')
+
+
+def build():
+    """Rebuilds static/dist/ from static/ and returns the manifest."""
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+    manifest = {}
+    for name in source_files():
+        with open(os.path.join(STATIC_DIR, name), 'rb') as f:
+            data = f.read()
+        if name.endswith('.png') and Image is not None:
+            optimised = optimise_image(data, 'PNG')
+            entry = write_asset(name, optimised, manifest)
+            webp_name = os.path.splitext(name)[0] + '.webp'
+            entry['variants'] = {'webp': write_asset(webp_name, optimise_image(data, 'WEBP'), manifest)['file']}
+        else:
+            write_asset(name, data, manifest)
+    with open(os.path.join(DIST_DIR, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(dist_dir=DIST_DIR):
+    """Returns the build manifest, or an empty one if the assets have not been built."""
+    try:
+        with open(os.path.join(dist_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def parse_accept_encoding(header):
+    """{coding: q-value} from an Accept-Encoding header, leaving out codings with an unreadable q-value."""
+    weights = {}
+    for part in (header or '').split(','):
+        coding, *params = [piece.strip() for piece in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None and 0 <= q <= 1:
+            weights[coding.lower()] = q
+    return weights
+
+
+def pick_encoding(entry, accept_encoding):
+    """
+    Returns (encoding, suffix) of the copy the client weights highest: a
+    pre-compressed one, (None, '') for the file itself, or None if the client
+    refuses every copy there is. A q-value of 0 refuses a coding, and '*' stands
+    for every coding the header doesn't name, identity included.
+    """
+    weights = parse_accept_encoding(accept_encoding)
+    if 'identity' in weights:
+        identity_q = weights['identity']
+    else:
+        identity_q = IDENTITY_DEFAULT_Q if weights.get('*', 1) else 0
+    best, best_q = None, 0
+    for encoding, suffix in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0))
+        if encoding in entry['encodings'] and q > best_q:
+            best, best_q = (encoding, suffix), q
+    if identity_q > best_q:
+        best = (None, '')
+    return best
+
+
+def main():
+    if brotli is None:
+        print("brotli is not installed: building without .br copies", file=sys.stderr)
+    if Image is None:
+        print("Pillow is not installed: images are copied without WebP or optimised PNG variants", file=sys.stderr)
+    manifest = build()
+    source_bytes = sum(entry['size'] for name, entry in manifest.items() if not name.endswith('.webp'))
+    print(f"built {len(manifest)} assets into {os.path.relpath(DIST_DIR, ROOT)}/ "
+          f"({source_bytes / 1024:.0f} KiB before compression)")
+
+
+if __name__ == '__main__':
+    main()
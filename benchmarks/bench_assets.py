@@ -0,0 +1,102 @@
+"""
+Bytes and requests a browser needs to load the index page, with the static
+files served plainly from /static/ and with the hashed, pre-compressed build
+served from /assets/.
+
+A first visit fetches the page and everything it links to (the WebP title
+image where one is offered), accepting br and gzip. A repeat visit skips
+whatever was cached as immutable and revalidates the rest with If-None-Match.
+
+Run from the repository root (builds static/dist/ if it is missing):
+    python benchmarks/bench_assets.py
+"""
+import re
+import sys
+
+from common import bingo_app
+import assets
+
+ACCEPT = {'Accept-Encoding': 'br, gzip'}
+# Accept-Encoding header -> (status, Content-Encoding) expected for an asset with .br and .gz copies.
+NEGOTIATION = {
+    'br;q=0, gzip': (200, 'gzip'),
+    'gzip;q=0.5, br;q=0.4': (200, 'gzip'),
+    'gzip;q=0.5, identity': (200, None),
+    '*': (200, 'br'),
+    'identity;q=0': (406, None),
+    '*;q=0': (406, None),
+}
+LOCAL_URL = re.compile(r'(?:src|href|srcset)="(/(?:static|assets)/[^"]+)"')
+
+
+def linked_urls(html):
+    """Local URLs the page loads, taking the WebP <source> in place of its <img> fallback."""
+    urls = LOCAL_URL.findall(html)
+    webp = [url for url in urls if url.endswith('.webp')]
+    if webp:
+        urls = [url for url in urls if not url.endswith('.png')]
+    return urls
+
+
+def visit(client):
+    """Returns ((first bytes, first requests), (repeat bytes, repeat requests))."""
+    page = client.get('/', headers=ACCEPT)
+    responses = {'/': page}
+    for url in linked_urls(page.get_data(as_text=True)):
+        response = client.get(url, headers=ACCEPT)
+        assert response.status_code == 200, (url, response.status_code)
+        responses[url] = response
+    first = (sum(len(response.get_data()) for response in responses.values()), len(responses))
+
+    repeat_bytes = repeat_requests = 0
+    for url, response in responses.items():
+        if 'immutable' in response.headers.get('Cache-Control', ''):
+            continue
+        headers = dict(ACCEPT)
+        if response.headers.get('ETag'):
+            headers['If-None-Match'] = response.headers['ETag']
+        revalidated = client.get(url, headers=headers)
+        repeat_bytes += len(revalidated.get_data())
+        repeat_requests += 1
+    return first, (repeat_bytes, repeat_requests)
+
+
+def check_negotiation(client, manifest):
+    """Returns the Accept-Encoding headers whose response differs from NEGOTIATION."""
+    entry = next(entry for entry in manifest.values() if set(entry['encodings']) >= {'br', 'gzip'})
+    wrong = []
+    for header, expected in NEGOTIATION.items():
+        response = client.get(f"/assets/{entry['file']}", headers={'Accept-Encoding': header})
+        if (response.status_code, response.headers.get('Content-Encoding')) != expected:
+            wrong.append(header)
+    return wrong
+
+
+def use_manifest(manifest):
+    bingo_app.asset_manifest = manifest
+    bingo_app.asset_files = {entry['file']: entry for entry in manifest.values()}
+
+
+def main():
+    manifest = assets.load_manifest() or assets.build()
+    client = bingo_app.app.test_client()
+
+    results = {}
+    for label, current in (('plain /static/', {}), ('built /assets/', manifest)):
+        use_manifest(current)
+        results[label] = visit(client)
+        (first_bytes, first_requests), (repeat_bytes, repeat_requests) = results[label]
+        print(f"{label}: first visit {first_bytes / 1024:8.1f} KiB in {first_requests} requests, "
+              f"repeat visit {repeat_bytes / 1024:6.1f} KiB in {repeat_requests} requests")
+
+    plain, built = results['plain /static/'], results['built /assets/']
+    print(f"first visit {1 - built[0][0] / plain[0][0]:.0%} fewer bytes, "
+          f"repeat visit {plain[1][1] - built[1][1]} fewer requests")
+    wrong = check_negotiation(client, manifest)
+    print(f"Accept-Encoding negotiation: {len(NEGOTIATION) - len(wrong)} of {len(NEGOTIATION)} headers as expected"
+          + (f" (wrong: {', '.join(wrong)})" if wrong else ""))
+    sys.exit(0 if built[0][0] < plain[0][0] and built[1][1] <= 1 and not wrong else 1)
+
+
+if __name__ == '__main__':
+    main()
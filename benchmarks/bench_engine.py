@@ -0,0 +1,104 @@
+"""
+Microbenchmarks comparing the original nested-loop marking + full check_bingo
+rescan with the incremental BoardEngine.
+
+Run from the repository root:
+    python benchmarks/bench_engine.py [--games N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bingo_engine import BoardEngine  # noqa: E402
+
+
+def legacy_mark(board_values, marked_board, number):
+    """The per-call marking loop the handler used before BoardEngine."""
+    for i in range(5):
+        for j in range(5):
+            if board_values[i*5 + j] == number:
+                marked_board[i][j] = True
+                break
+
+
+def legacy_completed_lines(marked_board):
+    """The full 12-line rescan check_bingo used before BoardEngine."""
+    completed_lines = 0
+    for row in marked_board:
+        if all(row):
+            completed_lines += 1
+    for col_idx in range(5):
+        if all(marked_board[row_idx][col_idx] for row_idx in range(5)):
+            completed_lines += 1
+    if all(marked_board[i][i] for i in range(5)):
+        completed_lines += 1
+    if all(marked_board[i][4-i] for i in range(5)):
+        completed_lines += 1
+    return completed_lines
+
+
+def make_games(count, seed=1234):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        boards = [rng.sample(range(1, 26), 25) for _ in range(2)]
+        calls = rng.sample(range(1, 26), 25)
+        games.append((boards, calls))
+    return games
+
+
+def play_legacy(games):
+    for boards, calls in games:
+        marked = [[[False]*5 for _ in range(5)] for _ in boards]
+        for number in calls:
+            for board, marked_board in zip(boards, marked):
+                legacy_mark(board, marked_board, number)
+            for marked_board in marked:
+                legacy_completed_lines(marked_board)
+
+
+def play_engine(games):
+    for boards, calls in games:
+        engines = [BoardEngine(board) for board in boards]
+        for number in calls:
+            for engine in engines:
+                engine.mark(number)
+            for engine in engines:
+                engine.completed_lines
+
+
+def verify(games):
+    """Checks that both implementations agree on every intermediate state."""
+    for boards, calls in games:
+        marked = [[[False]*5 for _ in range(5)] for _ in boards]
+        engines = [BoardEngine(board) for board in boards]
+        for number in calls:
+            for board, marked_board, engine in zip(boards, marked, engines):
+                legacy_mark(board, marked_board, number)
+                engine.mark(number)
+                assert engine.completed_lines == legacy_completed_lines(marked_board)
+                assert engine.marked_grid() == marked_board
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    games = make_games(args.games)
+    verify(games[:200])
+
+    calls = args.games * 25
+    for name, func in (('legacy', play_legacy), ('engine', play_engine)):
+        best = min(timeit.repeat(lambda: func(games), number=1, repeat=args.repeat))
+        print(f"{name:>7}: {best * 1e3:8.1f} ms for {args.games} games "
+              f"({best / calls * 1e6:.2f} us per call)")
+
+
+if __name__ == '__main__':
+    main()
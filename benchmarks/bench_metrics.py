@@ -0,0 +1,156 @@
+"""
+Measures what the /metrics instrumentation costs.
+
+First times a no-op handler with and without the timing wrapper, then plays
+the same load with BINGO_METRICS=0 and BINGO_METRICS=1 (alternating runs of
+load_games.py in fresh processes) and compares the median throughput and
+latency. Finally times a /metrics scrape with --rooms games in progress, in
+the in-memory store and in a (fake) Redis store.
+
+Run from the repository root:
+    python benchmarks/bench_metrics.py [--games N] [--runs N] [--rooms N] [--max-overhead FRACTION]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import bingo_app  # noqa: E402
+from game_rules import new_room, seat_player, start_game  # noqa: E402
+from metrics import MetricsRegistry, instrument_socketio  # noqa: E402
+from room_registry import RoomRegistry  # noqa: E402
+from room_store import RedisRoomStore  # noqa: E402
+
+CALLS = 200000
+
+
+class FakeServer:
+    def emit(self, event, *args, **kwargs):
+        pass
+
+
+class FakeSocketIO:
+    """Just enough of SocketIO for instrument_socketio: on() returns a registrar."""
+
+    def __init__(self):
+        self.server = FakeServer()
+        self.handlers = {}
+
+    def on(self, message, namespace=None):
+        def register(handler):
+            self.handlers[message] = handler
+            return handler
+        return register
+
+
+def wrapper_overhead_ns():
+    """Returns (plain, instrumented) nanoseconds per call of a no-op handler."""
+    def noop(data):
+        return data
+
+    plain = FakeSocketIO()
+    plain.on('event')(noop)
+    instrumented = FakeSocketIO()
+    instrument_socketio(instrumented, MetricsRegistry())
+    instrumented.on('event')(noop)
+
+    timings = []
+    for socketio in (plain, instrumented):
+        handler = socketio.handlers['event']
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            handler(None)
+        timings.append((time.perf_counter() - started) / CALLS * 1e9)
+    return timings
+
+
+def run_load(games, metrics_enabled):
+    env = dict(os.environ, BINGO_METRICS='1' if metrics_enabled else '0')
+    output = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'load_games.py'),
+         '--games', str(games), '--json', '-'],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def fill_rooms(registry, count, rng):
+    """Creates count two-player rooms with a started game."""
+    for index in range(count):
+        room_data = new_room(2, time.time())
+        for seat in range(2):
+            sid = f"sid{index:06d}{seat}"
+            seat_player(room_data, sid, f"Player {seat}", 2)
+            room_data['engines'][sid] = bingo_app.BoardEngine(bytes(rng.sample(range(1, 26), 25)))
+        room_data['host_sid'] = room_data['members'][0]
+        start_game(room_data, rng.getrandbits(64), time.time())
+        registry.create_room(f"room{index:06d}", room_data)
+
+
+def scrape_ms(registry, rooms, repeat=20):
+    """Fastest /metrics scrape in milliseconds with rooms games in progress, and the in-progress gauge it read."""
+    bingo_app.registry = registry
+    fill_rooms(registry, rooms, random.Random(0))
+    client = bingo_app.app.test_client()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = client.get('/metrics').get_data(as_text=True)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    gauge = next(line for line in body.splitlines() if line.startswith('bingo_games_in_progress '))
+    return best * 1000, int(float(gauge.split()[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--rooms', type=int, default=5000, help="games in progress during the timed scrape")
+    parser.add_argument('--max-overhead', type=float, default=0.10,
+                        help="fail if instrumentation costs more than this fraction of throughput")
+    args = parser.parse_args()
+
+    plain_ns, instrumented_ns = wrapper_overhead_ns()
+    print(f"no-op handler: {plain_ns:.0f}ns plain, {instrumented_ns:.0f}ns instrumented "
+          f"(+{instrumented_ns - plain_ns:.0f}ns per event)")
+
+    results = {False: [], True: []}
+    for _ in range(args.runs):
+        for enabled in (False, True):
+            results[enabled].append(run_load(args.games, enabled))
+
+    summary = {}
+    for enabled, runs in results.items():
+        summary[enabled] = {
+            'games_per_second': statistics.median(run['games_per_second'] for run in runs),
+            'p50': statistics.median(run['latency_ms']['p50'] for run in runs),
+            'p95': statistics.median(run['latency_ms']['p95'] for run in runs)
+        }
+        label = "metrics on " if enabled else "metrics off"
+        print(f"{label}: {summary[enabled]['games_per_second']:8.2f} games/s  "
+              f"p50 {summary[enabled]['p50']:.3f}ms  p95 {summary[enabled]['p95']:.3f}ms "
+              f"(median of {args.runs} runs of {args.games} games)")
+
+    overhead = 1 - summary[True]['games_per_second'] / summary[False]['games_per_second']
+    print(f"throughput overhead: {overhead:+.1%}")
+
+    import fakeredis
+    counted = True
+    for label, registry in (('memory', RoomRegistry()), ('redis', RoomRegistry(RedisRoomStore(fakeredis.FakeRedis())))):
+        milliseconds, in_progress = scrape_ms(registry, args.rooms)
+        print(f"/metrics scrape with {args.rooms} games in progress ({label} store): {milliseconds:.2f}ms, "
+              f"bingo_games_in_progress {in_progress}")
+        counted = counted and in_progress == args.rooms
+    sys.exit(1 if overhead > args.max_overhead or not counted else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Measures the bytes broadcast to players over a 24-call game for each
+number_called/bingo_win protocol version.
+
+Run from the repository root:
+    python benchmarks/bench_protocol.py
+"""
+import json
+import random
+
+from common import play_calls, two_player_room
+
+CALLS = 24
+
+
+def play_game(protocol_version, seed=7):
+    """Plays one game with two test clients and returns {event: bytes} seen by both players."""
+    rng = random.Random(seed)
+    _, host, joiner, _ = two_player_room(protocol_version)
+    sizes = {}
+    for _, host_events, joiner_events in play_calls(rng, host, joiner, CALLS):
+        for event in host_events + joiner_events:
+            sizes[event['name']] = sizes.get(event['name'], 0) + len(json.dumps(event['args']))
+
+    host.disconnect()
+    joiner.disconnect()
+    return sizes
+
+
+def main():
+    results = {}
+    for version in (1, 2):
+        sizes = play_game(version)
+        results[version] = sum(sizes.values())
+        detail = ", ".join(f"{name}={size}" for name, size in sorted(sizes.items()))
+        print(f"protocol {version}: {results[version]:6d} bytes ({detail})")
+    print(f"delta encoding sends {results[2] / results[1]:.1%} of the full-state bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Flood protection: one client spamming create_room with the limiter off and
+on (rooms allocated and cost per event), a bot cycling through fresh
+connections to guess room IDs (how many guesses reach a room lookup), and the
+memory bound of a limiter fed far more keys than it may hold.
+
+Run from the repository root:
+    python benchmarks/bench_rate_limit.py [--flood N] [--guessers N]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from common import bingo_app, events_named
+from rate_limit import RateLimiter
+
+
+def count_events(received, name):
+    return len(events_named(received, name))
+
+
+def flood_create_room(count, limited):
+    """Returns (rooms created, rate_limited replies, microseconds per event) for count create_room events."""
+    bingo_app.event_limits.enabled = limited
+    rooms_before = len(bingo_app.registry)
+    client = bingo_app.socketio.test_client(bingo_app.app)
+    created = replies = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        client.emit('create_room', {'player_name': 'Spammer'})
+        received = client.get_received()
+        created += count_events(received, 'room_created')
+        replies += count_events(received, 'rate_limited')
+    per_event_us = (time.perf_counter() - started) / count * 1e6
+    client.disconnect()
+    bingo_app.reap_expired_slots(now=float('inf'))
+    assert len(bingo_app.registry) == rooms_before
+    return created, replies, per_event_us
+
+
+def guess_room_ids(guessers, guesses_each, rng):
+    """A bot reconnecting guessers times from one address. Returns (attempts, lookups that ran)."""
+    bingo_app.event_limits.enabled = True
+    attempts = lookups = 0
+    for _ in range(guessers):
+        client = bingo_app.socketio.test_client(bingo_app.app)
+        for _ in range(guesses_each):
+            room_id = ''.join(rng.choices(string.ascii_lowercase + string.digits, k=8))
+            client.emit('join_room', {'room_id': room_id, 'player_name': 'Guesser'})
+            attempts += 1
+        lookups += count_events(client.get_received(), 'invalid_room')
+        client.disconnect()
+    return attempts, lookups
+
+
+def limiter_memory(keys, max_keys):
+    """Feeds keys distinct keys through a limiter. Returns (buckets held, after sweep, ns per allow)."""
+    limiter = RateLimiter(rate=1, burst=5, max_keys=max_keys)
+    now = time.monotonic()
+    started = time.perf_counter()
+    for key in range(keys):
+        limiter.allow(key, now)
+    per_call_ns = (time.perf_counter() - started) / keys * 1e9
+    held = len(limiter)
+    limiter.sweep(now + limiter.burst / limiter.rate)
+    return held, len(limiter), per_call_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--flood', type=int, default=2000, help="create_room events in the flood")
+    parser.add_argument('--guessers', type=int, default=100, help="connections the room-ID guesser cycles through")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    ok = True
+
+    for limited in (False, True):
+        created, replies, per_event_us = flood_create_room(args.flood, limited)
+        print(f"create_room flood, limiter {'on ' if limited else 'off'}: {created} rooms created, "
+              f"{replies} rate_limited replies, {per_event_us:.1f}us per event")
+    burst = bingo_app.app.config['RATE_LIMITS']['create_room']['sid'][1]
+    ok = ok and created <= burst and replies == 1
+
+    attempts, lookups = guess_room_ids(args.guessers, 10, random.Random(args.seed))
+    failure_burst = bingo_app.app.config['JOIN_FAILURE_LIMIT'][1]
+    print(f"room ID guessing from one address: {lookups} of {attempts} guesses looked up "
+          f"(failure budget {failure_burst})")
+    ok = ok and lookups <= failure_burst + 1
+
+    max_keys = 10000
+    held, after_sweep, per_call_ns = limiter_memory(200000, max_keys)
+    print(f"200000 distinct keys through a limiter capped at {max_keys}: {held} buckets held, "
+          f"{after_sweep} after sweeping refilled ones, {per_call_ns:.0f}ns per allow()")
+    ok = ok and held <= max_keys and after_sweep == 0
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Results store costs: what a handler pays to record a finished game (queueing
+it vs inserting and committing it in place), how fast the batching writer
+drains a backlog, and leaderboard reads from the in-memory totals vs an
+aggregate query over every game. Also checks that the two leaderboards agree.
+
+Run from the repository root:
+    python benchmarks/bench_results_store.py [--games N] [--players N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import ResultsStore, connect, player_summary  # noqa: E402
+
+AGGREGATE_QUERY = (
+    "SELECT player_name, COUNT(*), SUM(won), SUM(lines) FROM game_players GROUP BY player_name"
+)
+
+
+def make_games(count, player_count, rng):
+    """Synthetic two-player games between a pool of player_count names."""
+    names = [f"player{index}" for index in range(player_count)]
+    games = []
+    for index in range(count):
+        pair = rng.sample(names, 2)
+        winner = rng.choice(pair)
+        games.append({
+            'room_id': f"room{index}",
+            'outcome': 'bingo',
+            'winner_name': winner,
+            'called_numbers': rng.sample(range(1, 26), rng.randint(12, 25)),
+            'started_at': time.time() - 60,
+            'finished_at': time.time(),
+            'players': [{'name': name, 'lines': 5 if name == winner else rng.randint(0, 4), 'won': name == winner}
+                        for name in pair]
+        })
+    return games
+
+
+def per_game_commit_us(games, path):
+    """Microseconds per game when the caller inserts and commits each game itself."""
+    ResultsStore(path).close()  # creates the schema
+    connection = connect(path)
+    started = time.perf_counter()
+    for game in games:
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO games (room_id, outcome, winner_name, called_numbers, started_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (game['room_id'], game['outcome'], game['winner_name'],
+                 ",".join(map(str, game['called_numbers'])), game['started_at'], game['finished_at'])
+            )
+            connection.executemany(
+                "INSERT INTO game_players (game_id, player_name, lines, won) VALUES (?, ?, ?, ?)",
+                [(cursor.lastrowid, player['name'], player['lines'], int(player['won'])) for player in game['players']]
+            )
+    elapsed = time.perf_counter() - started
+    connection.close()
+    return elapsed / len(games) * 1e6
+
+
+def aggregate_leaderboard(path, limit):
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(AGGREGATE_QUERY).fetchall()
+    finally:
+        connection.close()
+    ranked = sorted(rows, key=lambda row: (-row[2], -row[2] / row[1], row[0]))
+    return [player_summary(name, [games, wins, lines]) for name, games, wins, lines in ranked[:limit]]
+
+
+def time_per_call_us(function, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = make_games(args.games, args.players, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        sync_us = per_game_commit_us(games[:1000], os.path.join(directory, 'sync.sqlite3'))
+
+        path = os.path.join(directory, 'results.sqlite3')
+        store = ResultsStore(path, queue_size=args.games + 1)
+        started = time.perf_counter()
+        for game in games:
+            store.record_game(game)
+        enqueue_us = (time.perf_counter() - started) / len(games) * 1e6
+        store.close()
+        drained = time.perf_counter() - started
+        print(f"recording a game in the handler: {enqueue_us:.1f}us queued vs {sync_us:.1f}us committed in place")
+        print(f"writer drained {store.written} games in {drained:.2f}s ({store.written / drained:.0f} games/s) "
+              f"in {store.batches} transactions, {store.dropped} dropped")
+
+        cached_us = time_per_call_us(lambda: store.leaderboard(20), 1000)
+        aggregate_us = time_per_call_us(lambda: aggregate_leaderboard(path, 20), 20)
+        print(f"leaderboard of {len(store.totals)} players: {cached_us:.1f}us from the cache vs "
+              f"{aggregate_us:.0f}us aggregating {store.written} games")
+
+        agree = store.leaderboard(20) == aggregate_leaderboard(path, 20)
+        print(f"cached leaderboard matches the aggregate query: {'ok' if agree else 'FAILED'}")
+    ok = agree and store.written == len(games) and enqueue_us < sync_us
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Create-and-abandon churn: each cycle opens rooms and leaves them in every state
+(host waiting alone, game in progress, game finished) with clients that vanish
+without a disconnect event reaching the server. The idle-room reaper is then
+run with the clock moved past the idle TTLs. Traced memory and the room count
+should stay flat from cycle to cycle; --no-reap shows what happens without it.
+Then times a reaper pass over --rooms live rooms of which none is due, counting
+the rooms it loads, and checks that MAX_ROOMS rejects creation with
+room_limit_reached.
+
+Run from the repository root:
+    python benchmarks/bench_room_churn.py [--cycles N] [--rooms N] [--no-reap] [--store memory|redis]
+
+--store redis uses fakeredis, so no server is needed.
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from common import bingo_app, client_sid, events_named, play_calls, two_player_room
+from flask_socketio.test_client import SocketIOTestClient
+from room_registry import RoomRegistry
+
+STATES = ('waiting', 'in_game', 'finished')
+
+
+def abandon(client):
+    """
+    Forgets a client the way a dead transport would: the server stops tracking
+    its connection but the disconnect handler never runs, so its room stays.
+    """
+    server = bingo_app.socketio.server
+    server.manager.disconnect(client_sid(client), '/')
+    server.environ.pop(client.eio_sid, None)
+    SocketIOTestClient.clients.pop(client.eio_sid, None)
+
+
+def open_room(rng, state):
+    """Creates a room, drives it into state and abandons its clients."""
+    if state == 'waiting':
+        host = bingo_app.socketio.test_client(bingo_app.app)
+        host.emit('create_room', {'player_name': 'Host', 'protocol_version': 2})
+        host.get_received()
+        abandon(host)
+        return
+    _, host, joiner, _ = two_player_room()
+    for _ in play_calls(rng, host, joiner, 6 if state == 'in_game' else 25):
+        pass
+    abandon(host)
+    abandon(joiner)
+
+
+def traced_kb():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] // 1024
+
+
+def quiet_reaper_pass(rooms, rng, repeat=5):
+    """
+    Opens rooms that are not due yet, half of them holding a disconnected player's
+    seat, and returns (fastest reaper pass in ms, rooms it loaded), then evicts them.
+    """
+    for i in range(rooms):
+        open_room(rng, STATES[i % len(STATES)])
+    for room_id in bingo_app.registry.room_ids()[::2]:
+        with bingo_app.registry.locked(room_id) as room_data:
+            room_data['disconnected'][room_data['members'][0]] = time.time() + 3600
+            bingo_app.registry.save(room_id, room_data)
+    store = bingo_app.registry.store
+    loads = [0]
+    load = store.load
+
+    def counting_load(room_id):
+        loads[0] += 1
+        return load(room_id)
+
+    store.load = counting_load
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        bingo_app.reap_expired_slots()
+        bingo_app.reap_idle_rooms()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    store.load = load
+    idle_for = max(bingo_app.app.config['ROOM_IDLE_TTL_SECONDS'].values()) + 1
+    bingo_app.reap_idle_rooms(now=time.time() + idle_for)
+    return best * 1000, loads[0] // repeat
+
+
+def check_room_cap():
+    """Returns True if creating a room beyond MAX_ROOMS is rejected with room_limit_reached."""
+    socketio, app = bingo_app.socketio, bingo_app.app
+    saved_cap = app.config['MAX_ROOMS']
+    app.config['MAX_ROOMS'] = len(bingo_app.registry) + 1
+    first = socketio.test_client(app)
+    second = socketio.test_client(app)
+    try:
+        first.emit('create_room', {'player_name': 'A'})
+        second.emit('create_room', {'player_name': 'B'})
+        return (bool(events_named(first.get_received(), 'room_created'))
+                and bool(events_named(second.get_received(), 'room_limit_reached')))
+    finally:
+        app.config['MAX_ROOMS'] = saved_cap
+        first.disconnect()
+        second.disconnect()
+        bingo_app.reap_expired_slots(now=float('inf'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--rooms', type=int, default=150, help="rooms abandoned per cycle")
+    parser.add_argument('--no-reap', action='store_true', help="skip the reaper to show the leak")
+    parser.add_argument('--store', choices=('memory', 'redis'), default='memory')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.store == 'redis':
+        import fakeredis
+        from room_store import RedisRoomStore
+        bingo_app.registry = RoomRegistry(RedisRoomStore(fakeredis.FakeRedis()))
+    rng = random.Random(args.seed)
+    idle_for = max(bingo_app.app.config['ROOM_IDLE_TTL_SECONDS'].values()) + 1
+
+    tracemalloc.start()
+    samples = []
+    for cycle in range(args.cycles):
+        for i in range(args.rooms):
+            open_room(rng, STATES[i % len(STATES)])
+        if not args.no_reap:
+            bingo_app.reap_idle_rooms(now=time.time() + idle_for)
+        samples.append((len(bingo_app.registry), traced_kb()))
+        print(f"cycle {cycle + 1:3d}: {samples[-1][0]:6d} rooms, {samples[-1][1]:8d} KiB traced")
+    tracemalloc.stop()
+
+    # The first cycle warms up caches and interned strings; compare against the second.
+    baseline_kb = samples[min(1, len(samples) - 1)][1]
+    growth_kb = samples[-1][1] - baseline_kb
+    flat = samples[-1][0] == 0 and growth_kb <= max(256, baseline_kb // 10)
+    print(f"traced memory growth after warm-up: {growth_kb:+d} KiB, {samples[-1][0]} rooms left "
+          f"-> {'flat' if flat else 'GROWING'}")
+
+    pass_ms, loaded = quiet_reaper_pass(args.rooms, rng)
+    print(f"reaper pass over {args.rooms} live rooms, none due ({args.store} store): "
+          f"{pass_ms:.2f}ms, {loaded} rooms loaded")
+
+    cap_ok = check_room_cap()
+    print(f"MAX_ROOMS rejection with room_limit_reached: {'ok' if cap_ok else 'FAILED'}")
+    sys.exit(0 if flat and cap_ok and loaded == 0 else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+"""
+Room event logs: checks that replaying a room's log rebuilds the room the app
+holds after every event of real games (joins, boards, calls, wins, rematches,
+disconnects, rejoins and leaves), then compares the log with a full snapshot
+dump of every room (room_store.serialize_room) on both sides of a restart: the
+cost of recording one event, the bytes on disk, and the time to load N
+mid-game rooms back.
+
+Run from the repository root:
+    python benchmarks/bench_room_log.py [--games N] [--rooms N] [--calls N]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# The app must log to a scratch directory.
+LOG_DIR = tempfile.mkdtemp(prefix='bingo-room-logs-')
+os.environ['BINGO_ROOM_LOG_DIR'] = LOG_DIR
+
+from common import bingo_app, client_sid  # noqa: E402
+from bingo_bot import choose_number, random_board  # noqa: E402
+from game_rules import apply_number_call, new_room, seat_player, start_game  # noqa: E402
+from room_log import RoomLog, read_records, replay  # noqa: E402
+from room_store import deserialize_room, serialize_room  # noqa: E402
+
+UNLOGGED_KEYS = ('last_activity', 'spectators')
+
+
+def comparable(room_data):
+    """A room as plain data, without the keys the log leaves out."""
+    doc = json.loads(serialize_room(room_data))
+    for key in UNLOGGED_KEYS:
+        doc.pop(key, None)
+    return doc
+
+
+def check_replay(room_id):
+    """True if replaying the room's log gives the room the registry holds."""
+    bingo_app.room_log.flush()
+    replayed = replay(bingo_app.room_log.read(room_id))
+    return replayed is not None and comparable(replayed) == comparable(bingo_app.registry.get(room_id))
+
+
+def play_checked_game(rng):
+    """
+    Plays a three-player room through the app: a game to bingo, a rematch in which
+    one player drops and rejoins and another leaves for a room of their own, then
+    that game to bingo.
+    Returns (events, events whose replay matched the room).
+    """
+    clients = [bingo_app.socketio.test_client(bingo_app.app) for _ in range(3)]
+    events = matched = 0
+
+    def step(client, event, data=None):
+        nonlocal events, matched
+        client.emit(event, data or {})
+        events += 1
+        matched += check_replay(room_id)
+
+    clients[0].emit('create_room', {'player_name': 'Host', 'max_players': 3, 'protocol_version': 2})
+    created = next(e['args'][0] for e in clients[0].get_received() if e['name'] == 'room_created')
+    room_id = created['room_id']
+    tokens = {0: created['reconnect_token']}
+    for index in (1, 2):
+        step(clients[index], 'join_room', {'room_id': room_id, 'player_name': f"Guest {index}", 'protocol_version': 2})
+        tokens[index] = next(e['args'][0] for e in clients[index].get_received()
+                             if e['name'] == 'room_joined')['reconnect_token']
+
+    def play_to_bingo():
+        for client in clients:
+            step(client, 'board_submitted', {'board': list(random_board(rng))})
+        step(clients[0], 'start_game_button_clicked')
+        while True:
+            room_data = bingo_app.registry.get(room_id)
+            if room_data['winner_sid']:
+                return
+            turn_sid = room_data['current_turn_sid']
+            client = next(c for c in clients if client_sid(c) == turn_sid)
+            step(client, 'call_number_from_board',
+                 {'number': choose_number(room_data['engines'][turn_sid], rng, 'random')})
+
+    play_to_bingo()
+    step(clients[1], 'request_play_again')
+    for client in (clients[0], clients[2]):
+        step(client, 'respond_play_again', {'response': 'accept'})
+    step(clients[1], 'board_submitted', {'board': list(random_board(rng))})
+    clients[2].disconnect()
+    events += 1
+    matched += check_replay(room_id)
+    clients[2] = bingo_app.socketio.test_client(bingo_app.app)
+    step(clients[2], 'rejoin_game_room', {'room_id': room_id, 'reconnect_token': tokens[2], 'protocol_version': 2})
+    # Creating another room is how a player leaves this one.
+    step(clients[1], 'create_room', {'player_name': 'Guest 1'})
+    leaver = clients.pop(1)
+    play_to_bingo()
+    for client in clients + [leaver]:
+        client.get_received()
+        client.disconnect()
+    bingo_app.reap_expired_slots(now=float('inf'))
+    return events, matched
+
+
+def build_rooms(count, calls, rng):
+    """
+    Builds count two-player rooms through game_rules, each calls numbers into its
+    game, logging every step to a RoomLog the way the app does. Returns (rooms by
+    ID, the log, microseconds per appended record).
+    """
+    directory = tempfile.mkdtemp(prefix='bingo-recovery-')
+    log = RoomLog(directory, background=False)
+    rooms = {}
+    appended = 0
+    append_seconds = 0.0
+    for index in range(count):
+        room_id = f"room{index:06d}"
+        room_data = new_room(2, time.time())
+        records = [('O', room_data['created_at'], 2)]
+        for seat in range(2):
+            sid = f"sid{index:06d}{seat}".ljust(20, 'x')
+            token = f"token{index:06d}{seat}".ljust(22, 'x')
+            seat_player(room_data, sid, f"Player {seat}", 2, token)
+            records.append(('J', seat, sid, 2, token, f"Player {seat}"))
+        room_data['host_sid'] = room_data['members'][0]
+        records.append(('H', 0))
+        for seat, sid in enumerate(room_data['members']):
+            room_data['engines'][sid] = bingo_app.BoardEngine(random_board(rng))
+            records.append(('B', seat, room_data['engines'][sid].board.hex()))
+        seed = rng.getrandbits(64)
+        start_game(room_data, seed, time.time())
+        records.append(('S', seed, room_data['started_at']))
+        for _ in range(calls):
+            caller_sid = room_data['current_turn_sid']
+            number = choose_number(room_data['engines'][caller_sid], rng, 'random')
+            outcome = apply_number_call(room_data, caller_sid, number)
+            records.append(('C', room_data['seats'][caller_sid], number))
+            if outcome['winners']:
+                records.append(('W', room_data['seats'][room_data['winner_sid']]))
+                break
+        started = time.perf_counter()
+        for record in records:
+            log.append(room_id, room_data['created_at'], *record)
+        append_seconds += time.perf_counter() - started
+        appended += len(records)
+        rooms[room_id] = room_data
+    return rooms, log, append_seconds / appended * 1e6
+
+
+def queued_append_cost(count, rooms=500):
+    """
+    Microseconds per record spread over rooms with the writer thread: what a
+    handler spends queueing one, and what it takes until all of them are written.
+    """
+    directory = tempfile.mkdtemp(prefix='bingo-queued-')
+    log = RoomLog(directory)
+    created_at = time.time()
+    started = time.perf_counter()
+    for index in range(count):
+        log.append(f"room{index % rooms:06d}", created_at, 'C', index % 2, index % 25 + 1)
+    queued_seconds = time.perf_counter() - started
+    log.flush()
+    written_seconds = time.perf_counter() - started
+    log.close()
+    shutil.rmtree(directory)
+    return queued_seconds / count * 1e6, written_seconds / count * 1e6
+
+
+def snapshot_write_cost(rooms, path, samples):
+    """Microseconds to record one event by rewriting one room's snapshot, and by rewriting the full dump."""
+    room_data = next(iter(rooms.values()))
+    started = time.perf_counter()
+    for _ in range(samples):
+        with open(path, 'w') as f:
+            f.write(serialize_room(room_data))
+        os.replace(path, path + '.room')
+    per_room_us = (time.perf_counter() - started) / samples * 1e6
+    started = time.perf_counter()
+    dump_full_snapshot(rooms, path)
+    full_us = (time.perf_counter() - started) * 1e6
+    return per_room_us, full_us
+
+
+def dump_full_snapshot(rooms, path):
+    with open(path, 'w') as f:
+        json.dump({room_id: serialize_room(room_data) for room_id, room_data in rooms.items()}, f)
+
+
+def load_full_snapshot(path):
+    with open(path) as f:
+        return {room_id: deserialize_room(raw) for room_id, raw in json.load(f).items()}
+
+
+def load_logs(log):
+    return {room_id: replay(read_records(log.path(room_id))) for room_id in log.room_ids()}
+
+
+def best_of(repeat, fn, *args):
+    """(fastest seconds, result) over repeat runs of fn."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=20, help="rooms played through the app with replay checks")
+    parser.add_argument('--rooms', type=int, default=5000, help="mid-game rooms to recover")
+    parser.add_argument('--calls', type=int, default=12, help="numbers called in each of those rooms")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ok = True
+
+    events = matched = 0
+    for _ in range(args.games):
+        game_events, game_matched = play_checked_game(rng)
+        events += game_events
+        matched += game_matched
+    bingo_app.room_log.flush()
+    closed = len(os.listdir(bingo_app.room_log.closed_directory))
+    print(f"replay check: {matched} of {events} events over {args.games} rooms replayed to the live room; "
+          f"{closed} logs archived, {len(bingo_app.room_log.room_ids())} left open")
+    ok = ok and matched == events and closed == 2 * args.games
+
+    rooms, log, append_us = build_rooms(args.rooms, args.calls, rng)
+    snapshot_path = os.path.join(log.directory, 'snapshot.json')
+    per_room_us, full_us = snapshot_write_cost(rooms, snapshot_path, 2000)
+    dump_full_snapshot(rooms, snapshot_path)
+    records = sum(len(read_records(log.path(room_id))) for room_id in rooms)
+    queued_us, written_us = queued_append_cost(50000)
+    print(f"recording an event: queued append {queued_us:.1f}us ({written_us:.1f}us until written), "
+          f"synchronous append {append_us:.1f}us, rewriting the room's snapshot {per_room_us:.1f}us, "
+          f"rewriting the full dump of {args.rooms} rooms {full_us / 1000:.1f}ms")
+    log_bytes = sum(os.path.getsize(log.path(room_id)) for room_id in rooms)
+    print(f"on disk: {args.rooms} logs ({records} records) {log_bytes / 1e6:.2f}MB, "
+          f"full snapshot {os.path.getsize(snapshot_path) / 1e6:.2f}MB")
+
+    snapshot_seconds, from_snapshot = best_of(args.repeat, load_full_snapshot, snapshot_path)
+    log_seconds, from_logs = best_of(args.repeat, load_logs, log)
+    print(f"recovering {args.rooms} rooms: full snapshot {snapshot_seconds * 1000:.0f}ms "
+          f"({snapshot_seconds / args.rooms * 1e6:.1f}us/room), logs {log_seconds * 1000:.0f}ms "
+          f"({log_seconds / args.rooms * 1e6:.1f}us/room)")
+    same = all(comparable(from_logs[room_id]) == comparable(from_snapshot[room_id]) == comparable(rooms[room_id])
+               for room_id in rooms)
+    print(f"recovered rooms identical from both: {same}")
+    ok = ok and same
+
+    shutil.rmtree(log.directory)
+    shutil.rmtree(LOG_DIR)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
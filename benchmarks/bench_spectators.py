@@ -0,0 +1,130 @@
+"""
+Spectator fan-out: plays the same games in one room with no spectators and
+then with --spectators clients watching, and compares the players'
+call-to-broadcast latency. Spectators are sent coalesced updates from the feed's
+background task, so the players' latency should stay flat however many watch.
+
+Also checks that every spectator, including ones that join mid-game, can
+rebuild the called numbers from its one snapshot plus the deltas after it.
+
+Run from the repository root:
+    python benchmarks/bench_spectators.py [--spectators N] [--games N] [--call-interval SECONDS]
+"""
+import argparse
+import random
+import sys
+import time
+
+from common import bingo_app, client_sid, events_named, percentile, play_calls, two_player_room
+
+
+def play_game(rng, host, joiner, call_interval, latencies, on_call=None):
+    """Plays one game to bingo_win in the players' room, appending each call's latency in seconds."""
+    for index, (seconds, host_events, _) in enumerate(play_calls(rng, host, joiner)):
+        latencies.append(seconds)
+        if on_call:
+            on_call(index)
+        if events_named(host_events, 'bingo_win'):
+            break
+        # Players take a moment per turn, so the feed flushes several times a game.
+        time.sleep(call_interval)
+
+    # Both accept a rematch so the next game is played in the same, still watched, room.
+    host.emit('request_play_again')
+    joiner.emit('respond_play_again', {'response': 'accept', 'requester_sid': client_sid(host)})
+    host.get_received()
+    joiner.get_received()
+
+
+def replay_calls(received):
+    """
+    Rebuilds what one spectator knows: the called numbers of its last snapshot
+    plus every delta numbered after it. Returns (numbers, winner_sid, ok).
+    """
+    numbers, winner_sid, seq, ok = set(), None, None, True
+    for event in received:
+        payload = event['args'][0]
+        if event['name'] == 'spectator_snapshot':
+            numbers = set(payload['called_numbers'])
+            winner_sid, seq = payload['winner_sid'], payload['seq']
+        elif event['name'] == 'spectator_update' and seq is not None:
+            for call_seq, number in payload['calls']:
+                if call_seq > seq:
+                    ok = ok and call_seq == seq + 1
+                    numbers.add(number)
+                    seq = call_seq
+            if 'winner_sid' in payload and payload['seq'] > seq:
+                winner_sid, seq = payload['winner_sid'], payload['seq']
+    return numbers, winner_sid, ok and seq is not None
+
+
+def measure(games, call_interval, spectator_count, seed):
+    """Plays games watched by spectator_count spectators; returns (latencies, room state, spectators)."""
+    socketio, app = bingo_app.socketio, bingo_app.app
+    room_id, host, joiner, _ = two_player_room()
+    spectators = [socketio.test_client(app) for _ in range(spectator_count)]
+    # Half watch from the start, half join in the middle of the first game.
+    early, late = spectators[:spectator_count // 2], spectators[spectator_count // 2:]
+    for spectator in early:
+        spectator.emit('watch_room', {'room_id': room_id})
+
+    def join_late(index):
+        if index == 5:
+            for spectator in late:
+                spectator.emit('watch_room', {'room_id': room_id})
+
+    rng = random.Random(seed)
+    latencies = []
+    for game in range(games):
+        play_game(rng, host, joiner, call_interval, latencies, join_late if game == 0 else None)
+    # The last game's final calls and the rematch go out on the next flushes.
+    time.sleep(3 * bingo_app.app.config['SPECTATOR_FLUSH_INTERVAL_SECONDS'])
+    room_data = bingo_app.registry.get(room_id)
+    received = [spectator.get_received() for spectator in spectators]
+    for client in [host, joiner] + spectators:
+        client.disconnect()
+    bingo_app.reap_expired_slots(now=float('inf'))
+    return sorted(latencies), room_data, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--spectators', type=int, default=1000)
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--call-interval', type=float, default=0.05)
+    parser.add_argument('--max-slowdown', type=float, default=1.5,
+                        help="fail if p95 latency with spectators exceeds this multiple of the baseline")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    to_ms = 1000.0
+    results = {}
+    for count in (0, args.spectators):
+        started = time.perf_counter()
+        latencies, room_data, received = measure(args.games, args.call_interval, count, args.seed)
+        results[count] = latencies
+        print(f"{count:5d} spectators: p50 {percentile(latencies, 0.50) * to_ms:.3f}ms  "
+              f"p95 {percentile(latencies, 0.95) * to_ms:.3f}ms  p99 {percentile(latencies, 0.99) * to_ms:.3f}ms "
+              f"over {len(latencies)} calls in {time.perf_counter() - started:.1f}s")
+
+    # After the rematch the room has no called numbers and no winner; every spectator should agree.
+    consistent = 0
+    updates = 0
+    for events in received:
+        numbers, winner_sid, ok = replay_calls(events)
+        updates += len(events_named(events, 'spectator_update'))
+        consistent += ok and numbers == room_data['called_numbers'] and winner_sid == room_data['winner_sid']
+    print(f"{consistent}/{len(received)} spectators consistent with the room, "
+          f"{updates / max(1, len(received)):.1f} coalesced updates each for {len(results[args.spectators])} calls")
+
+    baseline_p95 = percentile(results[0], 0.95)
+    watched_p95 = percentile(results[args.spectators], 0.95)
+    # Sub-millisecond latencies jitter; allow a small absolute margin on top of the ratio.
+    flat = watched_p95 <= baseline_p95 * args.max_slowdown + 0.0005
+    print(f"p95 with {args.spectators} spectators: {watched_p95 / baseline_p95:.2f}x baseline -> "
+          f"{'flat' if flat else 'SLOWER'}")
+    sys.exit(0 if flat and consistent == len(received) else 1)
+
+
+if __name__ == '__main__':
+    main()
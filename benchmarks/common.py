@@ -0,0 +1,78 @@
+"""
+Helpers the benchmarks share for driving the app through Socket.IO test clients.
+Import it before anything that imports app: it keeps the synthetic rooms and
+games of a run out of the real room logs and leaderboard, sends the server's
+event log to /dev/null and turns the per-client rate limits off.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('BINGO_ROOM_LOG_DIR', '')
+os.environ.setdefault('BINGO_RESULTS_DB', '')
+
+import app as bingo_app  # noqa: E402
+from game_log import configure_logging  # noqa: E402
+
+# Still formatted and sampled as in production, so its cost stays in the measurements.
+configure_logging(sample_every=bingo_app.app.config['LOG_SAMPLE_EVERY'], stream=open(os.devnull, 'w'))
+# Every simulated client shares one address and acts far faster than a person.
+bingo_app.event_limits.enabled = False
+
+
+def client_sid(client):
+    return bingo_app.socketio.server.manager.sid_from_eio_sid(client.eio_sid, '/')
+
+
+def events_named(received, name):
+    return [event['args'][0] for event in received if event['name'] == name]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def two_player_room(protocol_version=2):
+    """
+    Creates a room with two test clients. Returns (room_id, host, joiner, the
+    joiner's reconnect token).
+    """
+    socketio, app = bingo_app.socketio, bingo_app.app
+    host = socketio.test_client(app)
+    joiner = socketio.test_client(app)
+    host.emit('create_room', {'player_name': 'Host', 'protocol_version': protocol_version})
+    room_id = events_named(host.get_received(), 'room_created')[0]['room_id']
+    joiner.emit('join_room', {'room_id': room_id, 'player_name': 'Joiner', 'protocol_version': protocol_version})
+    token = events_named(joiner.get_received(), 'room_joined')[0]['reconnect_token']
+    return room_id, host, joiner, token
+
+
+def play_calls(rng, host, joiner, calls=25):
+    """
+    Submits random boards for both players, starts the game and calls up to calls
+    distinct numbers in turn, stopping after bingo_win or a call nobody heard.
+    Yields (seconds until both players held the events, host events, joiner events)
+    for every call.
+    """
+    for client in (host, joiner):
+        client.emit('board_submitted', {'board': rng.sample(range(1, 26), 25)})
+    host.emit('start_game_button_clicked')
+    turn = events_named(host.get_received(), 'game_start_signal')[0]['current_turn']
+    joiner.get_received()
+
+    clients = {client_sid(host): host, client_sid(joiner): joiner}
+    for number in rng.sample(range(1, 26), calls):
+        started = time.perf_counter()
+        clients[turn].emit('call_number_from_board', {'number': number})
+        host_events = host.get_received()
+        joiner_events = joiner.get_received()
+        yield time.perf_counter() - started, host_events, joiner_events
+        called = events_named(host_events, 'number_called')
+        if not called or events_named(host_events, 'bingo_win'):
+            return
+        turn = called[0]['next_turn']
@@ -0,0 +1,176 @@
+"""
+Load generator for the real Socket.IO event flow: creates rooms with
+create_room/join_room, submits boards and plays every game through
+call_number_from_board until bingo_win, from several threads at once.
+
+Reports p50/p95/p99 call-to-broadcast latency (from emitting a call until both
+players hold the number_called broadcast), games per second and peak RSS, and
+can write them as JSON so runs can be compared.
+
+Run from the repository root:
+    python benchmarks/load_games.py [--games N] [--concurrency N] [--protocol 1|2]
+                                    [--store memory|redis] [--quick]
+                                    [--json PATH] [--baseline PATH]
+
+--quick plays a handful of games and is fast enough to run alongside tests.
+--json - prints the JSON to stdout instead of the summary.
+--baseline compares against an earlier --json file and exits 1 if p95 latency
+or games per second regressed by more than --tolerance.
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import threading
+import time
+
+from common import bingo_app, events_named, percentile, play_calls, two_player_room
+from room_registry import RoomRegistry
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (ru_maxrss is bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def play_game(rng, protocol_version, latencies):
+    """
+    Plays one game to bingo_win with two test clients, appending the latency of
+    every call in seconds. Returns True when the game ended with a winner.
+    """
+    _, host, joiner, _ = two_player_room(protocol_version)
+    try:
+        for seconds, host_events, joiner_events in play_calls(rng, host, joiner):
+            latencies.append(seconds)
+            if not events_named(host_events, 'number_called') or not events_named(joiner_events, 'number_called'):
+                return False
+            if events_named(host_events, 'bingo_win'):
+                return True
+        return False
+    finally:
+        host.disconnect()
+        joiner.disconnect()
+
+
+def run_load(games, concurrency, protocol_version, seed=0):
+    """Plays games across concurrency threads and returns the result dictionary."""
+    latencies = []
+    finished = [0]
+    failed = [0]
+    counter_lock = threading.Lock()
+    game_ids = iter(range(games))
+
+    def worker():
+        thread_latencies = []
+        while True:
+            with counter_lock:
+                game = next(game_ids, None)
+            if game is None:
+                break
+            ok = play_game(random.Random(seed * 1000003 + game), protocol_version, thread_latencies)
+            with counter_lock:
+                if ok:
+                    finished[0] += 1
+                else:
+                    failed[0] += 1
+        with counter_lock:
+            latencies.extend(thread_latencies)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Free the slots the disconnects left behind.
+    bingo_app.reap_expired_slots(now=float('inf'))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    to_ms = 1000.0
+    return {
+        'games': games,
+        'games_finished': finished[0],
+        'games_failed': failed[0],
+        'concurrency': concurrency,
+        'protocol_version': protocol_version,
+        'calls': len(latencies),
+        'elapsed_seconds': round(elapsed, 4),
+        'games_per_second': round(finished[0] / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * to_ms, 4),
+            'p95': round(percentile(latencies, 0.95) * to_ms, 4),
+            'p99': round(percentile(latencies, 0.99) * to_ms, 4),
+            'max': round(latencies[-1] * to_ms, 4) if latencies else 0.0,
+            'mean': round(sum(latencies) / len(latencies) * to_ms, 4) if latencies else 0.0
+        },
+        'peak_rss_kb': peak_rss_kb(),
+        'rooms_left': len(bingo_app.registry)
+    }
+
+
+def compare_to_baseline(result, baseline, tolerance):
+    """Returns a list of regressions of result against a baseline result."""
+    regressions = []
+    limit = baseline['latency_ms']['p95'] * (1 + tolerance)
+    if result['latency_ms']['p95'] > limit:
+        regressions.append(f"p95 latency {result['latency_ms']['p95']}ms > {limit:.4f}ms")
+    floor = baseline['games_per_second'] * (1 - tolerance)
+    if result['games_per_second'] < floor:
+        regressions.append(f"{result['games_per_second']} games/s < {floor:.2f} games/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--protocol', type=int, choices=(1, 2), default=2)
+    parser.add_argument('--store', choices=('memory', 'redis'), default='memory')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help="play 10 games on 2 threads")
+    parser.add_argument('--json', metavar='PATH', help="write results as JSON ('-' for stdout)")
+    parser.add_argument('--baseline', metavar='PATH', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.games, args.concurrency = 10, 2
+    if args.store == 'redis':
+        import fakeredis
+        from room_store import RedisRoomStore
+        bingo_app.registry = RoomRegistry(RedisRoomStore(fakeredis.FakeRedis()))
+
+    result = run_load(args.games, args.concurrency, args.protocol, seed=args.seed)
+    result['store'] = args.store
+
+    if args.json:
+        encoded = json.dumps(result, indent=2, sort_keys=True)
+        if args.json == '-':
+            print(encoded)
+        else:
+            with open(args.json, 'w') as f:
+                f.write(encoded + "\n")
+    if args.json != '-':
+        latency = result['latency_ms']
+        print(f"{result['games_finished']}/{result['games']} games on {result['concurrency']} threads "
+              f"({args.store} store, protocol {args.protocol}) in {result['elapsed_seconds']:.2f}s: "
+              f"{result['games_per_second']} games/s")
+        print(f"call-to-broadcast latency: p50 {latency['p50']:.3f}ms  p95 {latency['p95']:.3f}ms  "
+              f"p99 {latency['p99']:.3f}ms  max {latency['max']:.3f}ms over {result['calls']} calls")
+        print(f"peak RSS {result['peak_rss_kb'] / 1024:.1f} MiB, {result['rooms_left']} rooms left")
+
+    failed = result['games_failed'] > 0 or result['rooms_left'] > 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Headless games between computer players, played straight through the rules
+engine (no sockets, no rooms) across a process pool: how the bot strategies
+fare against each other and how many games and calls per second the engine
+sustains. Games are dealt in chunks with fixed seeds, so a run gives the same
+results whatever the number of workers.
+
+Run from the repository root:
+    python benchmarks/simulate_games.py [--games N] [--workers N] [--matchups lines:random,lines:lines]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bingo_bot import STRATEGIES, play_game  # noqa: E402
+from bingo_engine import WINNING_LINES  # noqa: E402
+
+
+def play_chunk(task):
+    """Plays count games of one matchup from one seed. Returns (matchup index, wins by seat, calls, shared wins)."""
+    matchup_index, strategies, seed, count = task
+    rng = random.Random(seed)
+    wins = [0] * len(strategies)
+    calls = shared_wins = 0
+    for _ in range(count):
+        room_data = play_game(strategies, rng)
+        wins[room_data['members'].index(room_data['winner_sid'])] += 1
+        calls += len(room_data['called_sequence'])
+        shared_wins += sum(lines >= WINNING_LINES for lines in room_data['bingo_progress'].values()) > 1
+    return matchup_index, wins, calls, shared_wins
+
+
+def parse_matchups(text):
+    matchups = [tuple(part.split(':')) for part in text.split(',')]
+    for strategies in matchups:
+        unknown = [name for name in strategies if name not in STRATEGIES]
+        if unknown or len(strategies) < 2:
+            raise argparse.ArgumentTypeError(
+                f"bad matchup {':'.join(strategies)}: use two or more of {', '.join(STRATEGIES)}")
+    return matchups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=200000, help="games per matchup")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk', type=int, default=5000, help="games per task handed to a worker")
+    parser.add_argument('--matchups', type=parse_matchups, default=parse_matchups('lines:random,lines:lines,random:random'),
+                        help="comma-separated strategy lists, one strategy per seat, such as lines:random:random")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    tasks = []
+    for matchup_index, strategies in enumerate(args.matchups):
+        for chunk_index, start in enumerate(range(0, args.games, args.chunk)):
+            seed = (args.seed * len(args.matchups) + matchup_index) * 1000003 + chunk_index
+            tasks.append((matchup_index, strategies, seed, min(args.chunk, args.games - start)))
+
+    totals = [[[0] * len(strategies), 0, 0] for strategies in args.matchups]
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for matchup_index, wins, calls, shared_wins in pool.imap_unordered(play_chunk, tasks):
+            total = totals[matchup_index]
+            total[0] = [seat + new for seat, new in zip(total[0], wins)]
+            total[1] += calls
+            total[2] += shared_wins
+    elapsed = time.perf_counter() - started
+
+    games = args.games * len(args.matchups)
+    all_calls = sum(total[1] for total in totals)
+    print(f"{games} games, {all_calls} calls in {elapsed:.1f}s on {args.workers} workers: "
+          f"{games / elapsed:.0f} games/s, {all_calls / elapsed:.0f} calls/s "
+          f"({games / elapsed / args.workers:.0f} games/s per worker)")
+    ok = True
+    for strategies, (wins, calls, shared_wins) in zip(args.matchups, totals):
+        rates = "  ".join(f"seat {seat} {name} {count / args.games:6.1%}"
+                          for seat, (name, count) in enumerate(zip(strategies, wins)))
+        print(f"{':'.join(strategies):>16}: {rates}  |  {calls / args.games:.2f} calls/game, "
+              f"{shared_wins / args.games:.2%} simultaneous wins")
+        ok = ok and sum(wins) == args.games
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Stress test for per-room locking: several threads fire call_number_from_board
+at one room from both players (in and out of turn, with repeated numbers)
+while another thread keeps disconnecting and rejoining one of the players.
+After every game the room's invariants are checked.
+
+Run from the repository root:
+    python benchmarks/stress_room_locks.py [--games N] [--threads N] [--store memory|redis]
+
+--store redis uses fakeredis, so no server is needed.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from common import bingo_app, events_named, two_player_room
+from bingo_engine import BoardEngine, LINES, BOARD_SIZE
+from room_registry import RoomRegistry
+
+
+def check_room_invariants(room_id, host_events):
+    """Returns a list of invariant violations for the room after a stressed game."""
+    problems = list(bingo_app.registry.check_consistency())
+    room_data = bingo_app.registry.get(room_id)
+    if room_data is None:
+        return problems + [f"room {room_id} disappeared"]
+
+    called = room_data['called_numbers']
+    broadcasts = events_named(host_events, 'number_called')
+    numbers = [payload['number'] for payload in broadcasts]
+    if len(numbers) != len(set(numbers)):
+        problems.append(f"a number was called twice: {sorted(numbers)}")
+    if set(numbers) != called:
+        problems.append(f"broadcast numbers {sorted(numbers)} != stored called numbers {sorted(called)}")
+
+    seqs = [event['args'][0]['seq'] for event in host_events if event['name'] in ('number_called', 'bingo_win')]
+    if sorted(seqs) != list(range(1, room_data['seq'] + 1)):
+        problems.append(f"broadcast sequence numbers are not contiguous: {sorted(seqs)}")
+    if seqs != sorted(seqs):
+        problems.append("broadcasts reached the host out of order")
+
+    for sid, engine in room_data['engines'].items():
+        if bin(engine.marked_mask).count('1') != len(called):
+            problems.append(f"board of {sid} has {bin(engine.marked_mask).count('1')} marks for {len(called)} calls")
+        expected = BoardEngine.from_state(engine.board, engine.marked_mask)
+        if expected.line_counts != engine.line_counts:
+            problems.append(f"line counters of {sid} drifted from its marked mask")
+        full_lines = sum(all(engine.is_marked(cell) for cell in line) for line in LINES)
+        if full_lines != engine.completed_lines or full_lines > 2 * BOARD_SIZE + 2:
+            problems.append(f"completed line count of {sid} is wrong")
+    if len(room_data['members']) != 2:
+        problems.append(f"room has {len(room_data['members'])} members")
+    return problems
+
+
+def stress_one_game(threads, seed):
+    rng = random.Random(seed)
+    socketio, app = bingo_app.socketio, bingo_app.app
+    room_id, host, joiner, token = two_player_room()
+    for client in (host, joiner):
+        client.emit('board_submitted', {'board': rng.sample(range(1, 26), 25)})
+    host.emit('start_game_button_clicked')
+    host.get_received()
+
+    current = {'joiner': joiner}
+    done = threading.Event()
+
+    def caller(thread_seed):
+        thread_rng = random.Random(thread_seed)
+        while not done.is_set():
+            client = host if thread_rng.random() < 0.5 else current['joiner']
+            try:
+                client.emit('call_number_from_board', {'number': thread_rng.randint(1, 25)})
+            except RuntimeError:
+                pass  # The joiner was disconnected between picking it and emitting
+            # RLock is not fair; without a pause the callers can starve the reconnector.
+            time.sleep(0.001)
+            room_data = bingo_app.registry.get(room_id)
+            if room_data is None or room_data['winner_sid'] or len(room_data['called_numbers']) == 25:
+                done.set()
+
+    def reconnector():
+        while not done.is_set():
+            old = current['joiner']
+            old.disconnect()
+            new = socketio.test_client(app)
+            new.emit('rejoin_game_room', {'room_id': room_id, 'reconnect_token': token, 'protocol_version': 2})
+            if not events_named(new.get_received(), 'rejoin_game_room_success'):
+                done.set()
+                raise AssertionError("rejoin failed during stress")
+            current['joiner'] = new
+            time.sleep(0.01)  # Let the callers make progress between reconnects
+
+    workers = [threading.Thread(target=caller, args=(seed * 100 + i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=reconnector))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    problems = check_room_invariants(room_id, host.get_received())
+    host.disconnect()
+    current['joiner'].disconnect()
+    bingo_app.reap_expired_slots(now=float('inf'))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--store', choices=('memory', 'redis'), default='memory')
+    args = parser.parse_args()
+
+    if args.store == 'redis':
+        import fakeredis
+        from room_store import RedisRoomStore
+        bingo_app.registry = RoomRegistry(RedisRoomStore(fakeredis.FakeRedis()))
+
+    failures = 0
+    for game in range(args.games):
+        problems = stress_one_game(args.threads, seed=game)
+        if problems:
+            failures += 1
+            print(f"game {game}: " + "; ".join(problems))
+    leftover = len(bingo_app.registry)
+    print(f"{args.games - failures}/{args.games} games kept their invariants "
+          f"({args.threads} caller threads, {args.store} store, {leftover} rooms left)")
+    sys.exit(1 if failures or leftover else 0)
+
+
+if __name__ == '__main__':
+    main()
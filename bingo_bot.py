@@ -0,0 +1,80 @@
+"""
+The computer player.
+
+A bot is a room member whose SID starts with BOT_SID_PREFIX. It plays through
+the same rules as everyone else (game_rules.apply_number_call); this module
+only decides which number it calls. Strategies look at the bot's own
+BoardEngine, whose unmarked cells are exactly the numbers not yet called.
+"""
+import secrets
+
+from bingo_engine import CELL_COUNT, LINES_THROUGH_CELL
+from game_rules import apply_number_call, new_game
+
+BOT_SID_PREFIX = 'bot:'
+
+# Weight of a line through the cell by how many of its cells are already marked:
+# a line one call from completion is worth more than every fresher line through the cell together.
+LINE_WEIGHTS = (1, 2, 4, 8, 32)
+
+
+def new_bot_sid():
+    return BOT_SID_PREFIX + secrets.token_hex(8)
+
+
+def is_bot(sid):
+    return isinstance(sid, str) and sid.startswith(BOT_SID_PREFIX)
+
+
+def random_board(rng):
+    """A board with the numbers 1-25 in random order, as validate_board returns it."""
+    return bytes(rng.sample(range(1, CELL_COUNT + 1), CELL_COUNT))
+
+
+def uncalled_numbers(engine):
+    mask = engine.marked_mask
+    return [engine.board[cell] for cell in range(CELL_COUNT) if not mask >> cell & 1]
+
+
+def pick_random(engine, rng):
+    return rng.choice(uncalled_numbers(engine))
+
+
+def pick_by_lines(engine, rng):
+    """Calls the number that advances the bot's own incomplete lines the most, at random among equals."""
+    line_counts, cell_of = engine.line_counts, engine.cell_of
+    best_score, best = -1, []
+    for number in uncalled_numbers(engine):
+        score = sum(LINE_WEIGHTS[line_counts[line_idx]] for line_idx in LINES_THROUGH_CELL[cell_of[number]])
+        if score > best_score:
+            best_score, best = score, [number]
+        elif score == best_score:
+            best.append(number)
+    return rng.choice(best)
+
+
+STRATEGIES = {
+    'random': pick_random,
+    'lines': pick_by_lines
+}
+
+
+def choose_number(engine, rng, strategy='lines'):
+    """The number a bot playing engine's board calls next; engine must have an uncalled number left."""
+    return STRATEGIES[strategy](engine, rng)
+
+
+def play_game(strategies, rng):
+    """
+    Plays one game between bots on random boards, one bot per strategy name in
+    turn order, starting with a random one. Returns the finished room dictionary;
+    its members are 'p0', 'p1', ... in the order of strategies.
+    """
+    players = [f"p{index}" for index in range(len(strategies))]
+    strategy_of = dict(zip(players, strategies))
+    room_data = new_game({player: random_board(rng) for player in players}, first_turn=rng.choice(players))
+    while not room_data['winner_sid']:
+        caller_sid = room_data['current_turn_sid']
+        number = choose_number(room_data['engines'][caller_sid], rng, strategy_of[caller_sid])
+        apply_number_call(room_data, caller_sid, number)
+    return room_data
@@ -0,0 +1,126 @@
+"""
+Incremental line tracking for a single 5x5 Bingo board.
+
+Instead of rescanning all 25 cells and rebuilding all 12 row/column/diagonal
+checks on every call, each board keeps a number -> cell index map, a 25-bit
+marked mask and one counter per line. Marking a number only touches the
+lines that pass through that cell.
+
+Boards are validated once when submitted and then held in a compact immutable
+form: 25 bytes of numbers in cell order plus the inverse 26-byte index from
+number to cell.
+"""
+
+BOARD_SIZE = 5
+CELL_COUNT = BOARD_SIZE * BOARD_SIZE
+
+# Cell indexes of every line: 5 rows, 5 columns and the 2 diagonals.
+LINES = (
+    [tuple(row * BOARD_SIZE + col for col in range(BOARD_SIZE)) for row in range(BOARD_SIZE)]
+    + [tuple(row * BOARD_SIZE + col for row in range(BOARD_SIZE)) for col in range(BOARD_SIZE)]
+    + [tuple(i * BOARD_SIZE + i for i in range(BOARD_SIZE))]
+    + [tuple(i * BOARD_SIZE + (BOARD_SIZE - 1 - i) for i in range(BOARD_SIZE))]
+)
+
+# For each cell, the indexes of the lines that pass through it.
+LINES_THROUGH_CELL = tuple(
+    tuple(line_idx for line_idx, line in enumerate(LINES) if cell in line)
+    for cell in range(CELL_COUNT)
+)
+
+# Completed line count -> 'B', 'BI', ... capped at 'BINGO'.
+BINGO_STRINGS = tuple("BINGO"[:min(count, 5)] for count in range(len(LINES) + 1))
+
+WINNING_LINES = 5
+
+ALL_NUMBERS = frozenset(range(1, CELL_COUNT + 1))
+
+
+class InvalidBoard(ValueError):
+    """Raised when a submitted board is not a permutation of 1-25."""
+
+
+def validate_board(board):
+    """
+    Checks that board holds exactly the numbers 1-25, once each, and returns it
+    as 25 bytes in cell order. Raises InvalidBoard otherwise.
+    """
+    if not isinstance(board, (list, tuple)) or len(board) != CELL_COUNT:
+        raise InvalidBoard(f"A board must have exactly {CELL_COUNT} numbers.")
+    # bool is an int subclass and JSON may deliver floats; only plain ints count.
+    if any(type(number) is not int for number in board):
+        raise InvalidBoard("Board entries must be whole numbers.")
+    if frozenset(board) != ALL_NUMBERS:
+        raise InvalidBoard(f"A board must contain every number from 1 to {CELL_COUNT} exactly once.")
+    return bytes(board)
+
+
+def is_valid_number(number):
+    """True if number is a plain int that can appear on a board."""
+    return type(number) is int and 1 <= number <= CELL_COUNT
+
+
+class BoardEngine:
+    """Tracks marked cells and completed lines for one player's board."""
+
+    __slots__ = ('board', 'cell_of', 'marked_mask', 'line_counts', 'completed_lines')
+
+    def __init__(self, board):
+        """board must already be valid (see validate_board); it is stored as bytes."""
+        self.board = bytes(board)
+        cell_of = bytearray(CELL_COUNT + 1)
+        for cell, number in enumerate(self.board):
+            cell_of[number] = cell
+        self.cell_of = bytes(cell_of)
+        self.marked_mask = 0
+        self.line_counts = [0] * len(LINES)
+        self.completed_lines = 0
+
+    @classmethod
+    def from_state(cls, board, marked_mask):
+        """Rebuilds an engine from a board and a previously saved marked mask."""
+        engine = cls(board)
+        for cell in range(CELL_COUNT):
+            if marked_mask >> cell & 1:
+                engine.mark(engine.board[cell])
+        return engine
+
+    def mark(self, number):
+        """
+        Marks the cell holding number (1-25, see is_valid_number).
+        Returns the cell index that was newly marked, or None if it already was.
+        """
+        cell = self.cell_of[number]
+        bit = 1 << cell
+        if self.marked_mask & bit:
+            return None
+        self.marked_mask |= bit
+        line_counts = self.line_counts
+        for line_idx in LINES_THROUGH_CELL[cell]:
+            line_counts[line_idx] += 1
+            if line_counts[line_idx] == BOARD_SIZE:
+                self.completed_lines += 1
+        return cell
+
+    @property
+    def bingo_string(self):
+        return BINGO_STRINGS[self.completed_lines]
+
+    @property
+    def has_won(self):
+        return self.completed_lines >= WINNING_LINES
+
+    def is_marked(self, cell):
+        return bool(self.marked_mask >> cell & 1)
+
+    def numbers(self):
+        """The board as the list of 25 numbers clients expect."""
+        return list(self.board)
+
+    def marked_grid(self):
+        """Expands the marked mask into the 5x5 boolean list-of-lists clients expect."""
+        mask = self.marked_mask
+        return [
+            [bool(mask >> (row * BOARD_SIZE + col) & 1) for col in range(BOARD_SIZE)]
+            for row in range(BOARD_SIZE)
+        ]
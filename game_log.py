@@ -0,0 +1,172 @@
+"""
+Structured, sampled logging for the game server.
+
+Handlers call log_event() with an event name, a message template and the
+structured fields it refers to (room_id, sid, duration_ms, ...). Records go
+onto an in-memory queue and a listener thread formats and writes them, so
+the request thread never waits on stdout. High-frequency events such as
+number calls are logged with sampled=True and only one record in every N is
+kept, with N chosen per level.
+
+By default each record is written as one JSON object per line. In debug mode
+every record is kept and written as its plain message, like the old print()
+output.
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+logger = logging.getLogger('bingo')
+
+# Keep 1 in N sampled records at each level; levels not listed are never sampled.
+DEFAULT_SAMPLE_EVERY = {logging.DEBUG: 100, logging.INFO: 20}
+
+
+class EventSampler:
+    """Counts sampled events per (event, level) and keeps every Nth one."""
+
+    def __init__(self, sample_every=None):
+        self.sample_every = dict(DEFAULT_SAMPLE_EVERY if sample_every is None else sample_every)
+        self.counters = {}
+
+    def rate(self, level):
+        return self.sample_every.get(level, 1)
+
+    def keep(self, event, level):
+        every = self.rate(level)
+        if every <= 1:
+            return True
+        counter = self.counters.get((event, level))
+        if counter is None:
+            counter = self.counters.setdefault((event, level), itertools.count())
+        return next(counter) % every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Writes a record as one JSON object: time, level, event, message and its fields."""
+
+    def format(self, record):
+        fields = getattr(record, 'fields', {})
+        doc = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'event': getattr(record, 'event', None),
+            'msg': render_message(record)
+        }
+        doc.update(fields)
+        if record.exc_info:
+            doc['exc'] = self.formatException(record.exc_info)
+        return json.dumps(doc, separators=(',', ':'), default=str)
+
+
+class PlainFormatter(logging.Formatter):
+    """Writes only the rendered message, matching the old print() output."""
+
+    def format(self, record):
+        message = render_message(record)
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the queue without formatting them (the listener thread does
+    that) and drops records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def render_message(record):
+    """Fills the record's message template from its structured fields."""
+    fields = getattr(record, 'fields', None)
+    if fields is None:
+        return record.getMessage()
+    try:
+        return record.msg.format(**fields)
+    except (KeyError, IndexError, ValueError):
+        return record.msg
+
+
+_sampler = EventSampler()
+_listener = None
+_queue_handler = None
+
+
+def configure_logging(debug=False, sample_every=None, stream=None, queue_size=10000):
+    """
+    (Re)configures the 'bingo' logger: a bounded queue drained by a listener
+    thread that writes JSON lines to stream (stdout by default). debug=True logs
+    DEBUG and up, keeps every record and writes plain messages.
+    """
+    global _sampler, _listener, _queue_handler
+    shutdown_logging()
+
+    _sampler = EventSampler({} if debug else sample_every)
+    output = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    output.setFormatter(PlainFormatter() if debug else JsonFormatter())
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_queue_handler)
+    logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    logger.propagate = False
+
+
+def shutdown_logging():
+    """Stops the listener thread after it has written everything queued so far."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records():
+    """Returns how many records were dropped because the queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def log_event(level, event, message, sampled=False, **fields):
+    """
+    Logs one event. message is a str.format template over fields and is only
+    rendered on the listener thread. With sampled=True the record may be
+    skipped; kept records carry sample_rate so counts can be scaled back up.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sampled:
+        if not _sampler.keep(event, level):
+            return
+        rate = _sampler.rate(level)
+        if rate > 1:
+            fields['sample_rate'] = rate
+    logger.log(level, message, extra={'event': event, 'fields': fields})
+
+
+def elapsed_ms(started):
+    """Milliseconds since a time.perf_counter() reading, for duration_ms fields."""
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,317 @@
+"""
+The game rules, free of Socket.IO and storage.
+
+Every function works on a room dictionary (see the schema comment in app.py)
+and nothing else. The handlers in app.py call them inside a room lock, keeping
+the registry's indexes in step themselves; room_log.replay() calls the same
+functions to rebuild a room from its event log. bingo_bot.play_game() and the
+simulator in benchmarks/ drive the game functions directly on dictionaries
+made by new_game().
+"""
+from bingo_engine import BoardEngine, is_valid_number
+
+# Per-player dictionaries in a room, keyed by SID.
+PLAYER_STATE_KEYS = (
+    'engines', 'bingo_progress', 'bingo_string', 'player_names', 'protocol_versions',
+    'play_again_requests', 'play_again_responses', 'disconnected', 'seats'
+)
+
+
+def new_room(max_players, created_at):
+    """An empty room; players are added with seat_player()."""
+    return {
+        'members': [],
+        'max_players': max_players,
+        'called_numbers': set(),
+        'current_turn_sid': None,
+        'host_sid': None,
+        'engines': {},
+        'bingo_progress': {},
+        'bingo_string': {},
+        'player_names': {},
+        'play_again_requests': {},
+        'play_again_responses': {},
+        'protocol_versions': {},
+        'seq': 0,
+        'called_sequence': [],
+        'started_at': None,
+        'winner_sid': None,
+        'last_called_number': None,
+        'reconnect_tokens': {},
+        'disconnected': {},
+        'spectators': 0,
+        'created_at': created_at,
+        'seats': {},
+        'next_seat': 0,
+        'departed': []
+    }
+
+
+def new_game(boards, first_turn=None):
+    """
+    Builds the game fields of a room for players whose boards are already
+    validated: boards maps each player ID to their board, in turn order. The
+    first player starts unless first_turn names another.
+    """
+    members = list(boards)
+    return {
+        'members': members,
+        'engines': {player: BoardEngine(board) for player, board in boards.items()},
+        'called_numbers': set(),
+        'called_sequence': [],
+        'last_called_number': None,
+        'current_turn_sid': first_turn if first_turn is not None else members[0],
+        'winner_sid': None,
+        'bingo_progress': {player: 0 for player in members},
+        'bingo_string': {player: "" for player in members},
+        'seq': 0
+    }
+
+
+def seat_player(room_data, sid, player_name, protocol_version, reconnect_token=None):
+    """
+    Adds a player at the end of the turn order with an empty board and gives them
+    the next seat number, which their event log records refer to. Returns the seat.
+    """
+    if sid not in room_data['members']:
+        room_data['members'].append(sid)
+    room_data['bingo_progress'][sid] = 0
+    room_data['bingo_string'][sid] = ""
+    room_data['player_names'][sid] = player_name
+    room_data['protocol_versions'][sid] = protocol_version
+    if reconnect_token is not None:
+        room_data['reconnect_tokens'][reconnect_token] = sid
+    seat = room_data['seats'][sid] = room_data['next_seat']
+    room_data['next_seat'] += 1
+    return seat
+
+
+def discard_player_state(room_data, sid):
+    """Removes every per-player entry a room holds for the given SID."""
+    for key in PLAYER_STATE_KEYS:
+        room_data[key].pop(sid, None)
+    for token, token_sid in list(room_data['reconnect_tokens'].items()):
+        if token_sid == sid:
+            del room_data['reconnect_tokens'][token]
+
+
+def unseat_player(room_data, sid):
+    """
+    Takes a player out of a room: their turn passes to the next player, their
+    membership and per-player state go, and any rematch answers are cleared since
+    the players they were given to have changed. A player who leaves a game in
+    progress is kept in 'departed' so the result still counts their loss.
+    Choosing a new host is left to the caller.
+    """
+    members = room_data['members']
+    if room_state(room_data) == 'in_game' and sid in room_data['engines']:
+        room_data['departed'].append({
+            'name': room_data['player_names'].get(sid, 'Player'),
+            'lines': room_data['bingo_progress'].get(sid, 0),
+            'won': False
+        })
+    if room_data['current_turn_sid'] == sid:
+        room_data['current_turn_sid'] = next_turn_after(room_data, sid) if len(members) > 1 else None
+    if sid in members:
+        members.remove(sid)
+    discard_player_state(room_data, sid)
+    room_data['play_again_requests'] = {}
+    room_data['play_again_responses'] = {}
+
+
+def move_seat(room_data, old_sid, new_sid):
+    """Moves a player's place, state, tokens, turn and win from their old SID to a new one."""
+    members = room_data['members']
+    if old_sid in members:
+        members[members.index(old_sid)] = new_sid
+    if room_data['host_sid'] == old_sid:
+        room_data['host_sid'] = new_sid
+    for key in PLAYER_STATE_KEYS:
+        if old_sid in room_data[key]:
+            room_data[key][new_sid] = room_data[key].pop(old_sid)
+    for token, token_sid in room_data['reconnect_tokens'].items():
+        if token_sid == old_sid:
+            room_data['reconnect_tokens'][token] = new_sid
+    if room_data['current_turn_sid'] == old_sid:
+        room_data['current_turn_sid'] = new_sid
+    if room_data['winner_sid'] == old_sid:
+        room_data['winner_sid'] = new_sid
+
+
+def can_start_game(room_data):
+    """True if the room is waiting for its game and every player has a board."""
+    return room_state(room_data) == 'waiting' and all_boards_submitted(room_data)
+
+
+def start_game(room_data, seed, started_at):
+    """
+    Starts the game. seed is a random 64-bit integer that picks the first
+    player, so replaying the recorded seed picks the same one; turns then
+    follow the join order from there.
+    """
+    members = room_data['members']
+    room_data['current_turn_sid'] = members[seed % len(members)]
+    room_data['started_at'] = started_at
+
+
+def reset_game(room_data):
+    """Clears the finished game for a rematch, keeping the players, names and tokens."""
+    room_data['called_numbers'] = set()
+    room_data['called_sequence'] = []
+    room_data['started_at'] = None
+    room_data['current_turn_sid'] = None
+    room_data['winner_sid'] = None
+    room_data['last_called_number'] = None
+    room_data['engines'] = {}
+    room_data['departed'] = []
+    for sid in room_data['members']:
+        room_data['bingo_progress'][sid] = 0
+        room_data['bingo_string'][sid] = ""
+    room_data['play_again_requests'] = {}
+    room_data['play_again_responses'] = {}
+
+
+def room_state(room_data):
+    """Returns 'waiting', 'in_game' or 'finished' for the room's current game."""
+    if room_data['winner_sid']:
+        return 'finished'
+    if room_data['current_turn_sid']:
+        return 'in_game'
+    return 'waiting'
+
+
+def all_boards_submitted(room_data):
+    """True once the room has at least two players and every one of them has a board."""
+    members = room_data['members']
+    return len(members) >= 2 and all(sid in room_data['engines'] for sid in members)
+
+
+def next_turn_after(room_data, sid):
+    """Returns the SID whose turn follows sid's in the room's join order."""
+    members = room_data['members']
+    return members[(members.index(sid) + 1) % len(members)]
+
+
+def resolve_winner(room_data, winners, caller_sid):
+    """
+    Picks one winner when several boards complete on the same call: the caller
+    if they are among them, otherwise the first winner in turn order after the
+    caller (the player who would have called next).
+    """
+    if caller_sid in winners:
+        return caller_sid
+    members = room_data['members']
+    start = members.index(caller_sid)
+    for offset in range(1, len(members)):
+        sid = members[(start + offset) % len(members)]
+        if sid in winners:
+            return sid
+    return winners[0]
+
+
+def next_seq(room_data):
+    """Advances and returns the room's broadcast sequence number."""
+    room_data['seq'] += 1
+    return room_data['seq']
+
+
+def apply_number_call(room_data, caller_sid, number_to_call, expected_seq=None):
+    """
+    Validates and applies one called number to a room: marks every board, updates
+    progress and passes the turn. Returns a dict describing the outcome, with an
+    'error' message instead when the call is not allowed. Runs inside an atomic
+    room update, so it only touches room_data.
+
+    A caller that chose its number from an earlier read of the room passes the
+    seq it read as expected_seq; the call is refused if the game has moved on.
+    """
+    if expected_seq is not None and expected_seq != room_data['seq']:
+        return {'error': "The game has moved on since that number was chosen.", 'reason': 'stale'}
+    # Once a game is won it is recorded; later calls must not reopen or re-award it.
+    if room_state(room_data) != 'in_game':
+        return {'error': "The game is not in progress.", 'reason': 'finished'}
+    if caller_sid != room_data['current_turn_sid']:
+        return {'error': "It's not your turn!", 'reason': 'out of turn'}
+    if not is_valid_number(number_to_call):
+        return {'error': "Numbers must be between 1 and 25.", 'reason': 'invalid number'}
+    if number_to_call in room_data['called_numbers']:
+        return {'error': f"Number {number_to_call} has already been called.", 'reason': 'already called'}
+    # Checked here, not in mark_number, so a refused call leaves the room untouched.
+    if not all_boards_submitted(room_data):
+        return {'error': "Not every player has a board.", 'reason': 'missing board'}
+
+    previous_progress = dict(room_data['bingo_progress'])
+    winners = mark_number(room_data, caller_sid, number_to_call)
+    outcome = {
+        'room_data': room_data,
+        'winners': winners,
+        'next_turn_sid': room_data['current_turn_sid'],
+        'changed_progress': {
+            sid: lines for sid, lines in room_data['bingo_progress'].items()
+            if previous_progress.get(sid) != lines
+        },
+        'seq': room_data['seq']
+    }
+    if winners:
+        declare_winner(room_data, resolve_winner(room_data, winners, caller_sid))
+        outcome['win_seq'] = room_data['seq']
+    return outcome
+
+
+def mark_number(room_data, caller_sid, number):
+    """
+    Applies a call already known to be allowed: records the number, marks every
+    board, updates progress, passes the turn and advances seq. Returns the SIDs
+    that have completed five lines; picking the winner is left to the caller.
+    """
+    return mark_numbers(room_data, [number], caller_sid)
+
+
+def mark_numbers(room_data, numbers, last_caller_sid):
+    """
+    mark_number() for a run of calls in one pass, the last of them made by
+    last_caller_sid. room_log.replay() applies the calls between two other
+    records this way: progress, the turn and seq only need settling once.
+    """
+    room_data['called_numbers'].update(numbers)
+    room_data['called_sequence'].extend(numbers)
+    room_data['last_called_number'] = numbers[-1]
+    for member_sid in room_data['members']:
+        mark = room_data['engines'][member_sid].mark
+        for number in numbers:
+            mark(number)
+    winners = check_bingo(room_data)
+    room_data['current_turn_sid'] = next_turn_after(room_data, last_caller_sid)
+    room_data['seq'] += len(numbers)
+    return winners
+
+
+def declare_winner(room_data, winner_sid):
+    room_data['winner_sid'] = winner_sid
+    next_seq(room_data)
+
+
+def check_bingo(room_data):
+    """
+    Reads each player's incrementally tracked line count, updates their progress
+    and 'B-I-N-G-O' string, and returns the SIDs that have completed five lines.
+    """
+    winning_sids = []
+    for player_sid in room_data['members']:
+        engine = room_data['engines'][player_sid]
+        room_data['bingo_progress'][player_sid] = engine.completed_lines
+        room_data['bingo_string'][player_sid] = engine.bingo_string
+        if engine.has_won:
+            winning_sids.append(player_sid)
+    return winning_sids
+
+
+def wants_rematch(room_data, sid):
+    """True if the player has asked for, or accepted, another game."""
+    return bool(room_data['play_again_requests'].get(sid)) or room_data['play_again_responses'].get(sid) == 'accept'
+
+
+def everyone_wants_rematch(room_data):
+    """True once every player in a room of at least two has agreed to play again."""
+    members = room_data['members']
+    return len(members) >= 2 and all(wants_rematch(room_data, sid) for sid in members)
@@ -0,0 +1,11 @@
+"""
+Gunicorn settings, read from the working directory by `gunicorn app:app`.
+"""
+
+
+def post_worker_init(worker):
+    # Without BINGO_REDIS_URL rooms live in a worker's memory, so only a lone worker
+    # can take back the rooms a restart lost; app.recover_rooms() does nothing with Redis.
+    if worker.cfg.workers == 1:
+        from app import recover_rooms
+        recover_rooms()
@@ -0,0 +1,193 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are updated on the request path, so each update is a
+dictionary lookup plus a few integer additions under a short lock. Gauges are
+callbacks that are only evaluated when /metrics is scraped. instrument_socketio()
+times every @socketio.on handler and counts every event the server emits.
+"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+# Upper bounds in seconds; handlers usually finish well under a millisecond.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(label_names, label_values):
+    if not label_names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return [(self.name, format_labels(self.label_names, labels), value) for labels, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket..., +Inf count, sum]
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self.values.get(label_values)
+            if row is None:
+                row = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(row)) for labels, row in self.values.items())
+        samples = []
+        for labels, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), row[:-1]):
+                cumulative += count
+                samples.append((
+                    f"{self.name}_bucket",
+                    format_labels(self.label_names + ('le',), labels + (bound,)),
+                    cumulative
+                ))
+            label_text = format_labels(self.label_names, labels)
+            samples.append((f"{self.name}_count", label_text, cumulative))
+            samples.append((f"{self.name}_sum", label_text, row[-1]))
+        return samples
+
+
+class Gauge:
+    """A value read from a callback each time the metrics are rendered."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def samples(self):
+        return [(self.name, "", self.read())]
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them as Prometheus text."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, label_names=()):
+        return self._add(Counter(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name, help_text, read):
+        return self._add(Gauge(name, help_text, read))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def positional_arg_limit(handler):
+    """Returns how many positional arguments handler accepts, or None if unlimited."""
+    parameters = inspect.signature(handler).parameters.values()
+    if any(p.kind is p.VAR_POSITIONAL for p in parameters):
+        return None
+    return sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in parameters)
+
+
+def instrument_socketio(socketio, metrics):
+    """
+    Makes every handler registered afterwards with @socketio.on record its
+    duration, call count and exception count, and counts emitted events by name.
+    Must be called before the handlers are defined.
+    """
+    durations = metrics.histogram(
+        'bingo_handler_duration_seconds', "Time spent in each Socket.IO event handler.", ('event',))
+    errors = metrics.counter(
+        'bingo_handler_errors_total', "Socket.IO event handlers that raised an exception.", ('event',))
+    emitted = metrics.counter(
+        'bingo_events_emitted_total', "Events emitted by the server, by event name.", ('event',))
+
+    original_on = socketio.on
+
+    def on(message, namespace=None):
+        register = original_on(message, namespace)
+
+        def decorator(handler):
+            arg_limit = positional_arg_limit(handler)
+
+            @functools.wraps(handler)
+            def timed_handler(*args):
+                # Drop arguments the handler doesn't take (such as the disconnect reason)
+                # here, so the server's retry-on-TypeError doesn't run it twice.
+                started = time.perf_counter()
+                try:
+                    return handler(*args[:arg_limit])
+                except Exception:
+                    errors.inc(message)
+                    raise
+                finally:
+                    durations.observe(time.perf_counter() - started, message)
+            register(timed_handler)
+            return handler
+        return decorator
+
+    socketio.on = on
+
+    original_emit = socketio.server.emit
+
+    @functools.wraps(original_emit)
+    def counted_emit(event, *args, **kwargs):
+        emitted.inc(event)
+        return original_emit(event, *args, **kwargs)
+
+    socketio.server.emit = counted_emit
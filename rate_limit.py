@@ -0,0 +1,163 @@
+"""
+Token-bucket rate limiting for the Socket.IO events.
+
+Every event type has a budget per SID and a budget per remote address: a rate
+of events per second and a burst. protect_socketio() checks both before a
+handler runs, so an over-limit event costs two dictionary lookups and never
+reaches the handler body.
+
+Buckets are kept in least-recently-used order and each limiter holds at most
+max_keys of them, evicting the stalest first. A bucket that has refilled is
+the same as no bucket, so sweep() drops those from the cold end.
+"""
+import collections
+import functools
+import threading
+import time
+
+from flask import request
+
+# Events the server itself raises; limiting them would only lose cleanup.
+UNLIMITED_EVENTS = ('connect', 'disconnect')
+
+
+class RateLimiter:
+    """A token bucket per key: rate tokens per second, holding at most burst."""
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time, rejected since the last allowed event]
+        self.buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, key, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.burst), now, False]
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def allow(self, key, now=None):
+        """
+        Takes a token for key. Returns (allowed, retry_after seconds, first), where
+        first is True for the first rejection after an allowed event.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._refill(key, now)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                bucket[2] = False
+                return True, 0.0, False
+            first = not bucket[2]
+            bucket[2] = True
+            return False, (1 - bucket[0]) / self.rate, first
+
+    def wait_time(self, key, now=None):
+        """Seconds until allow() would let key through (0.0 if it would now), without taking a token."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                return 0.0
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def forget(self, key):
+        with self._lock:
+            self.buckets.pop(key, None)
+
+    def sweep(self, now=None):
+        """Drops buckets that have refilled completely. Returns how many were dropped."""
+        now = time.monotonic() if now is None else now
+        full_after = self.burst / self.rate
+        removed = 0
+        with self._lock:
+            # Oldest first: stop at the first bucket touched too recently to be full.
+            while self.buckets:
+                key, bucket = next(iter(self.buckets.items()))
+                if now - bucket[1] < full_after:
+                    break
+                del self.buckets[key]
+                removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+class EventLimits:
+    """
+    A per-SID and a per-address RateLimiter for each event. budgets maps an
+    event name to {'sid': (rate, burst), 'address': (rate, burst)}; events not
+    listed use budgets['default'].
+    """
+
+    def __init__(self, budgets, max_keys=100000):
+        self.budgets = budgets
+        self.max_keys = max_keys
+        self.enabled = True
+        self.limiters = {}
+
+    def _limiters_for(self, event):
+        limiters = self.limiters.get(event)
+        if limiters is None:
+            budget = self.budgets.get(event, self.budgets['default'])
+            limiters = self.limiters.setdefault(event, tuple(
+                (scope, RateLimiter(*budget[scope], max_keys=self.max_keys)) for scope in ('sid', 'address')
+            ))
+        return limiters
+
+    def check(self, event, sid, address, now=None):
+        """Returns (allowed, scope, retry_after, first) for one event from sid at address."""
+        for scope, limiter in self._limiters_for(event):
+            allowed, retry_after, first = limiter.allow(sid if scope == 'sid' else address, now)
+            if not allowed:
+                return False, scope, retry_after, first
+        return True, None, 0.0, False
+
+    def forget_sid(self, sid):
+        for limiters in list(self.limiters.values()):
+            limiters[0][1].forget(sid)
+
+    def sweep(self, now=None):
+        return sum(limiter.sweep(now) for limiters in list(self.limiters.values()) for _, limiter in limiters)
+
+    def size(self):
+        """Number of buckets held across every event."""
+        return sum(len(limiter) for limiters in list(self.limiters.values()) for _, limiter in limiters)
+
+
+def protect_socketio(socketio, limits, on_reject):
+    """
+    Makes every handler registered afterwards with @socketio.on check limits
+    first. Over-limit events call on_reject(event, scope, retry_after, first)
+    instead of the handler. Must be called before the handlers are defined.
+    """
+    original_on = socketio.on
+
+    def on(message, namespace=None):
+        register = original_on(message, namespace)
+        if message in UNLIMITED_EVENTS:
+            return register
+
+        def decorator(handler):
+            @functools.wraps(handler)
+            def limited_handler(*args):
+                if limits.enabled:
+                    allowed, scope, retry_after, first = limits.check(message, request.sid, request.remote_addr)
+                    if not allowed:
+                        return on_reject(message, scope, retry_after, first)
+                return handler(*args)
+            register(limited_handler)
+            return handler
+        return decorator
+
+    socketio.on = on
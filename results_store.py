@@ -0,0 +1,208 @@
+"""
+Game history and leaderboard, kept in SQLite.
+
+Handlers hand a finished game to ResultsStore.record_game(), which only puts
+it on a bounded queue. A writer thread takes games off the queue in batches
+and inserts each batch in one transaction, so a handler never waits on disk.
+
+The leaderboard is served from per-player totals kept in memory. After every
+batch (and every refresh interval while idle) the writer folds the games
+added since the last game ID it has seen into those totals, which also picks
+up games written by other workers sharing the database file.
+"""
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,              -- 'bingo', or 'forfeit' when the others left
+    winner_name TEXT,
+    called_numbers TEXT NOT NULL,       -- comma-separated, in calling order
+    started_at REAL,
+    finished_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    player_name TEXT NOT NULL,
+    lines INTEGER NOT NULL,
+    won INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_players_by_game ON game_players(game_id);
+CREATE INDEX IF NOT EXISTS game_players_by_name ON game_players(player_name, game_id);
+"""
+
+# Sentinel that tells the writer thread to finish what is queued and stop.
+_STOP = object()
+
+
+def connect(path):
+    # The writer's connection is opened by whoever creates the store and then used only by its thread.
+    connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    # WAL lets the HTTP routes read while a batch is being written, including from other workers.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ResultsStore:
+    """
+    Records finished games and answers leaderboard and per-player queries.
+    A game is a dict: room_id, outcome, winner_name, called_numbers (list),
+    started_at, finished_at and players, a list of {name, lines, won} dicts.
+    """
+
+    def __init__(self, path, batch_size=100, batch_wait=0.5, refresh_interval=30.0, queue_size=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.refresh_interval = refresh_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        # player name -> [games, wins, lines]; read under _lock by the HTTP routes.
+        self.totals = {}
+        self.last_game_id = 0
+        self._ranking = None
+        self._lock = threading.Lock()
+
+        self._connection = connect(path)
+        self._connection.executescript(SCHEMA)
+        self._catch_up()
+        self._thread = threading.Thread(target=self._run, name='results-writer', daemon=True)
+        self._thread.start()
+
+    def record_game(self, game):
+        """Queues a finished game for writing. Never blocks; counts the game as dropped if the queue is full."""
+        try:
+            self.queue.put_nowait(game)
+        except queue.Full:
+            self.dropped += 1
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def close(self):
+        """Writes everything queued so far and stops the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.refresh_interval)
+            except queue.Empty:
+                self._catch_up()
+                continue
+            if first is _STOP:
+                break
+            batch, stopping = [first], False
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    game = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if game is _STOP:
+                    stopping = True
+                    break
+                batch.append(game)
+            self._write(batch)
+            self._catch_up()
+            if stopping:
+                break
+        self._connection.close()
+
+    def _write(self, batch):
+        """Inserts a batch of games in one transaction."""
+        with self._connection:
+            for game in batch:
+                cursor = self._connection.execute(
+                    "INSERT INTO games (room_id, outcome, winner_name, called_numbers, started_at, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (game['room_id'], game['outcome'], game['winner_name'],
+                     ",".join(str(number) for number in game['called_numbers']),
+                     game.get('started_at'), game['finished_at'])
+                )
+                self._connection.executemany(
+                    "INSERT INTO game_players (game_id, player_name, lines, won) VALUES (?, ?, ?, ?)",
+                    [(cursor.lastrowid, player['name'], player['lines'], int(player['won'])) for player in game['players']]
+                )
+        self.written += len(batch)
+        self.batches += 1
+
+    def _catch_up(self):
+        """Folds every game newer than last_game_id into the in-memory totals."""
+        rows = self._connection.execute(
+            "SELECT player_name, COUNT(*), SUM(won), SUM(lines), MAX(game_id) FROM game_players "
+            "WHERE game_id > ? GROUP BY player_name",
+            (self.last_game_id,)
+        ).fetchall()
+        if not rows:
+            return
+        with self._lock:
+            for name, games, wins, lines, max_game_id in rows:
+                entry = self.totals.setdefault(name, [0, 0, 0])
+                entry[0] += games
+                entry[1] += wins
+                entry[2] += lines
+                self.last_game_id = max(self.last_game_id, max_game_id)
+            self._ranking = None
+
+    def leaderboard(self, limit=20):
+        """Top players by wins, then win rate, from the in-memory totals."""
+        with self._lock:
+            if self._ranking is None:
+                self._ranking = sorted(
+                    self.totals.items(),
+                    key=lambda item: (-item[1][1], -item[1][1] / item[1][0], item[0])
+                )
+            top = [(name, list(totals)) for name, totals in self._ranking[:limit]]
+        return [player_summary(name, totals) for name, totals in top]
+
+    def player_stats(self, name, recent=10):
+        """A player's totals and their most recent games, or None if they have never finished one."""
+        with self._lock:
+            totals = self.totals.get(name)
+            totals = list(totals) if totals else None
+        if totals is None:
+            return None
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            rows = connection.execute(
+                "SELECT g.id, g.room_id, g.outcome, g.winner_name, g.called_numbers, g.finished_at, p.lines, p.won "
+                "FROM game_players p JOIN games g ON g.id = p.game_id "
+                "WHERE p.player_name = ? ORDER BY p.game_id DESC LIMIT ?",
+                (name, recent)
+            ).fetchall()
+        finally:
+            connection.close()
+        stats = player_summary(name, totals)
+        stats['recent_games'] = [{
+            'game_id': game_id,
+            'room_id': room_id,
+            'outcome': outcome,
+            'winner_name': winner_name,
+            'called_numbers': [int(number) for number in called.split(',') if number],
+            'finished_at': finished_at,
+            'lines': lines,
+            'won': bool(won)
+        } for game_id, room_id, outcome, winner_name, called, finished_at, lines, won in rows]
+        return stats
+
+
+def player_summary(name, totals):
+    games, wins, lines = totals
+    return {
+        'name': name,
+        'games': games,
+        'wins': wins,
+        'win_rate': round(wins / games, 3) if games else 0.0,
+        'average_lines': round(lines / games, 2) if games else 0.0
+    }
@@ -0,0 +1,339 @@
+"""
+Append-only event log per room, and replay.
+
+Every change to a room is appended to <directory>/<room_id>.log as one JSON
+array per line: [code, ms, ...fields], where ms counts milliseconds since the
+room was opened and players are referred to by their seat number (the order
+they were seated in) rather than their SID. When a room is deleted its log is
+moved to <directory>/closed/ and kept for later inspection, for
+keep_closed_seconds if one is given.
+
+Handlers only format a record and queue it; a writer thread appends whatever
+has queued up every batch_wait seconds, one write per room, so a handler
+never waits on disk. A crash loses at most the last batch_wait of records.
+Workers sharing rooms through Redis write synchronously instead, while they
+hold the room lock, so their records reach a log in the order they happened.
+
+    O  ms  created_at max_players          room opened
+    J  ms  seat sid protocol token name    player seated (token is null for bots)
+    H  ms  seat                            seat becomes the host
+    B  ms  seat board_hex                  board submitted
+    S  ms  seed started_at                 game started; the seed picks the first turn
+    C  ms  seat number                     number called
+    W  ms  seat                            seat declared the winner
+    P  ms  seat                            play again requested
+    A  ms  seat response                   play again answered
+    X  ms                                  game reset for a rematch
+    L  ms  seat                            player left the room
+    K  ms  seat sid [protocol]             player rejoined with a new SID
+    D  ms  seat expires_at                 player disconnected; seat held until expires_at
+
+replay() rebuilds the room from the records with the same game_rules
+functions the handlers use, so a log replayed to its end gives the room as it
+was (everything but 'last_activity' and 'spectators', which are not logged),
+and a prefix of it gives the room as it was at that point.
+
+Run `python room_log.py <room_id or log path> [--upto N] [--events]` to print
+a room's records or its state after the first N of them.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from bingo_engine import BoardEngine
+from game_rules import (
+    declare_winner, mark_numbers, move_seat, new_room, reset_game, seat_player, start_game, unseat_player
+)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'room_logs')
+CLOSED_DIR_NAME = 'closed'
+# Closed logs past their retention are looked for at most this often, when a log is archived.
+PRUNE_INTERVAL_SECONDS = 3600
+
+# Sentinel that tells the writer thread to write what is queued and stop.
+_STOP = object()
+
+
+class RoomLog:
+    """
+    Writes and reads the room logs kept in one directory. With background=False
+    every record is written before append() returns.
+    """
+
+    def __init__(self, directory, background=True, batch_wait=0.05, keep_closed_seconds=None):
+        self.directory = directory
+        self.closed_directory = os.path.join(directory, CLOSED_DIR_NAME)
+        os.makedirs(self.closed_directory, exist_ok=True)
+        self.batch_wait = batch_wait
+        self.keep_closed_seconds = keep_closed_seconds
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.write_errors = 0
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='room-log-writer', daemon=True)
+            self._thread.start()
+
+    def path(self, room_id):
+        return os.path.join(self.directory, f"{room_id}.log")
+
+    def append(self, room_id, created_at, code, *fields):
+        """
+        Appends one record. Callers hold the room's lock, so a room's records are
+        queued, and written, in the order its changes were made.
+        """
+        record = [code, round((time.time() - created_at) * 1000)]
+        record.extend(fields)
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        if self._thread is None:
+            self._write(room_id, line)
+        else:
+            self.queue.put((room_id, line, None))
+
+    def archive(self, room_id, created_at):
+        """Moves a deleted room's log to closed/, named so a reused room ID never overwrites it."""
+        if self._thread is None:
+            self._archive(room_id, created_at)
+        else:
+            self.queue.put((room_id, None, created_at))
+
+    def prune_closed(self, now=None):
+        """Deletes closed logs last written more than keep_closed_seconds ago. Returns how many went."""
+        if self.keep_closed_seconds is None:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.keep_closed_seconds
+        removed = 0
+        for entry in os.scandir(self.closed_directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def flush(self):
+        """Waits until everything appended or archived so far is on disk."""
+        if self._thread is not None:
+            self.queue.join()
+
+    def close(self):
+        """Writes everything queued so far and stops the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Let the batch fill up: under load most rooms get several records per write.
+            time.sleep(self.batch_wait)
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is _STOP for item in batch)
+            self._write_batch([item for item in batch if item is not _STOP])
+            for _ in batch:
+                self.queue.task_done()
+            if stopping:
+                break
+
+    def _write_batch(self, batch):
+        """Writes a batch in queue order per room: each room's lines go out in one write, before any archive of it."""
+        lines_by_room = {}
+        for room_id, line, created_at in batch:
+            if line is not None:
+                lines_by_room.setdefault(room_id, []).append(line)
+                continue
+            lines = lines_by_room.pop(room_id, None)
+            if lines:
+                self._write(room_id, b''.join(lines))
+            self._archive(room_id, created_at)
+        for room_id, lines in lines_by_room.items():
+            self._write(room_id, b''.join(lines))
+
+    def _write(self, room_id, data):
+        # O_APPEND: concurrent writers to one log never overwrite each other.
+        try:
+            fd = os.open(self.path(room_id), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError:
+            self.write_errors += 1
+
+    def _archive(self, room_id, created_at):
+        try:
+            os.replace(self.path(room_id),
+                       os.path.join(self.closed_directory, f"{room_id}-{int(created_at * 1000)}.log"))
+        except FileNotFoundError:
+            pass
+        now = time.time()
+        # Synchronous writers archive from many threads; one prune at a time is enough.
+        if self.keep_closed_seconds is not None and now >= self._next_prune and self._prune_lock.acquire(blocking=False):
+            try:
+                self._next_prune = now + PRUNE_INTERVAL_SECONDS
+                self.prune_closed(now)
+            finally:
+                self._prune_lock.release()
+
+    def room_ids(self):
+        """IDs of the rooms whose logs are still open, i.e. rooms that were never deleted."""
+        return [entry.name[:-4] for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith('.log')]
+
+    def read(self, room_id):
+        return read_records(self.path(room_id))
+
+
+def read_records(path):
+    """
+    Reads a log file into a list of records. A last line cut short by a crash is
+    dropped; it was never acknowledged to anyone.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        chunks = []
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    data = b''.join(chunks).decode()
+    # One parse for the whole file: the lines are already JSON values.
+    try:
+        return json.loads('[' + data.rstrip('\n').replace('\n', ',') + ']')
+    except ValueError:
+        records = []
+        for line in data.split('\n'):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        return records
+
+
+def replay(records, upto=None):
+    """
+    Rebuilds a room from its records, or from the first upto of them. Returns
+    the room dictionary, or None if the records do not open a room.
+    """
+    room_data = None
+    seat_sids = {}
+    calls = []
+    ms = 0
+    for record in records if upto is None else records[:upto]:
+        code, ms = record[0], record[1]
+        if code == 'O':
+            room_data = new_room(record[3], record[2])
+            continue
+        if room_data is None:
+            return None
+        if code == 'C':
+            # Most of a log is calls; each run of them is applied in one go.
+            calls.append(record[3])
+            last_caller_seat = record[2]
+            continue
+        if calls:
+            mark_numbers(room_data, calls, seat_sids[last_caller_seat])
+            calls = []
+        if code == 'W':
+            declare_winner(room_data, seat_sids[record[2]])
+        elif code == 'J':
+            _, _, seat, sid, protocol_version, token, player_name = record
+            if seat_player(room_data, sid, player_name, protocol_version, token) != seat:
+                raise ValueError(f"seat {seat} joins out of order")
+            seat_sids[seat] = sid
+        elif code == 'B':
+            room_data['engines'][seat_sids[record[2]]] = BoardEngine(bytes.fromhex(record[3]))
+        elif code == 'S':
+            start_game(room_data, record[2], record[3])
+        elif code == 'H':
+            room_data['host_sid'] = seat_sids[record[2]]
+        elif code == 'P':
+            room_data['play_again_requests'][seat_sids[record[2]]] = True
+        elif code == 'A':
+            room_data['play_again_responses'][seat_sids[record[2]]] = record[3]
+        elif code == 'X':
+            reset_game(room_data)
+        elif code == 'L':
+            unseat_player(room_data, seat_sids.pop(record[2]))
+        elif code == 'K':
+            seat, new_sid = record[2], record[3]
+            move_seat(room_data, seat_sids[seat], new_sid)
+            seat_sids[seat] = new_sid
+            room_data['disconnected'].pop(new_sid, None)
+            if len(record) > 4:
+                room_data['protocol_versions'][new_sid] = record[4]
+        elif code == 'D':
+            room_data['disconnected'][seat_sids[record[2]]] = record[3]
+        else:
+            raise ValueError(f"unknown log record {code!r}")
+    if calls:
+        mark_numbers(room_data, calls, seat_sids[last_caller_seat])
+    if room_data is not None:
+        room_data['last_activity'] = room_data['created_at'] + ms / 1000
+    return room_data
+
+
+def describe_room(room_data):
+    """The room as JSON-friendly data, with each board expanded to its numbers and marked grid."""
+    doc = dict(room_data)
+    doc['called_numbers'] = sorted(room_data['called_numbers'])
+    doc['engines'] = {
+        sid: {'board': engine.numbers(), 'marked': engine.marked_grid(), 'completed_lines': engine.completed_lines}
+        for sid, engine in room_data['engines'].items()
+    }
+    return doc
+
+
+def find_log(name, directory):
+    """A log path from a path, or from a room ID: its open log, else its most recently closed one."""
+    if os.path.isfile(name):
+        return name
+    path = os.path.join(directory, f"{name}.log")
+    if os.path.isfile(path):
+        return path
+    closed_directory = os.path.join(directory, CLOSED_DIR_NAME)
+    closed = sorted(entry for entry in os.listdir(closed_directory) if entry.startswith(f"{name}-"))
+    if not closed:
+        sys.exit(f"No log for room {name} in {directory}")
+    return os.path.join(closed_directory, closed[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prints a room's event log or replays it.")
+    parser.add_argument('room', help="room ID or path to a log file")
+    parser.add_argument('--dir', default=os.environ.get('BINGO_ROOM_LOG_DIR') or DEFAULT_DIR,
+                        help="room log directory (default: BINGO_ROOM_LOG_DIR or instance/room_logs)")
+    parser.add_argument('--upto', type=int, help="replay only the first N records")
+    parser.add_argument('--events', action='store_true', help="list the records instead of the replayed state")
+    args = parser.parse_args()
+
+    path = find_log(args.room, args.dir)
+    records = read_records(path)
+    if args.events:
+        for index, record in enumerate(records[:args.upto], start=1):
+            print(f"{index:5d} {record[1] / 1000:10.3f}s  {json.dumps(record[0:1] + record[2:])}")
+        return
+    room_data = replay(records, args.upto)
+    if room_data is None:
+        sys.exit(f"{path} does not open a room")
+    print(json.dumps(describe_room(room_data), indent=2, default=list))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+from room_store import InMemoryRoomStore
+
+
+class RoomRegistry:
+    """
+    Keeps the active rooms together with a SID -> room ID index and a
+    host SID -> room ID index so handlers can find their room in O(1)
+    instead of scanning every room.
+
+    The rooms and indexes live in a RoomStore. Membership methods take the
+    room data the caller already loaded, update it in place and keep the
+    indexes in step; the caller saves the room when it is done with it.
+    Every write stamps the room's 'last_activity' so idle rooms can be found.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else InMemoryRoomStore()
+
+    def __contains__(self, room_id):
+        return self.store.exists(room_id)
+
+    def __len__(self):
+        return self.store.count()
+
+    def get(self, room_id):
+        """Returns the room data for room_id, or None if it does not exist."""
+        if room_id is None:
+            return None
+        return self.store.load(room_id)
+
+    def save(self, room_id, room_data):
+        """Stores room data the caller has changed."""
+        room_data['last_activity'] = time.time()
+        self.store.save(room_id, room_data)
+
+    def update(self, room_id, mutate):
+        """Atomically applies mutate(room_data) to a room; see RoomStore.update."""
+        def touch_and_mutate(room_data):
+            room_data['last_activity'] = time.time()
+            return mutate(room_data)
+        return self.store.update(room_id, touch_and_mutate)
+
+    def room_ids(self):
+        return self.store.room_ids()
+
+    def count_in_game(self):
+        """Returns how many rooms have a game that has started and not been won yet."""
+        return self.store.count_in_game()
+
+    def idle_room_ids(self, state, before):
+        """IDs of the rooms in state ('waiting', 'in_game', 'finished') last written at or before the given time."""
+        return self.store.idle_room_ids(state, before)
+
+    def expiring_room_ids(self, before):
+        """IDs of the rooms holding a disconnected player's seat that expires at or before the given time."""
+        return self.store.expiring_room_ids(before)
+
+    def lock(self, room_id):
+        """Returns the room's lock; a no-op context manager when room_id is None or the room has no lock."""
+        room_lock = self.store.lock(room_id) if room_id is not None else None
+        return room_lock if room_lock is not None else nullcontext()
+
+    @contextmanager
+    def locked(self, room_id):
+        """Holds the room's lock and yields its freshly loaded data (None if it is gone)."""
+        with self.lock(room_id):
+            yield self.get(room_id)
+
+    def room_id_for_sid(self, sid):
+        """Returns the ID of the room the given SID is a member of, or None."""
+        return self.store.get_index('sid', sid)
+
+    def room_id_for_host(self, sid):
+        """Returns the ID of the room hosted by the given SID, or None."""
+        return self.store.get_index('host', sid)
+
+    def create_room(self, room_id, room_data):
+        """Registers a new room and indexes its host and initial members."""
+        room_data['last_activity'] = time.time()
+        self.store.save(room_id, room_data)
+        for sid in room_data['members']:
+            self.store.set_index('sid', sid, room_id)
+        if room_data.get('host_sid'):
+            self.store.set_index('host', room_data['host_sid'], room_id)
+
+    def add_member(self, room_id, room_data, sid):
+        """Adds a SID to a room's member list and indexes it."""
+        room_data['members'].append(sid)
+        self.store.set_index('sid', sid, room_id)
+
+    def remove_member(self, room_id, room_data, sid):
+        """Removes a SID from a room's member list and drops it from both indexes."""
+        if sid in room_data['members']:
+            room_data['members'].remove(sid)
+        self.store.delete_index('sid', sid, room_id)
+        self.store.delete_index('host', sid, room_id)
+
+    def rebind_member(self, room_id, room_data, old_sid, new_sid):
+        """Replaces a member's SID in place, keeping their position and host status."""
+        members = room_data['members']
+        members[members.index(old_sid)] = new_sid
+        self.store.delete_index('sid', old_sid, room_id)
+        self.store.set_index('sid', new_sid, room_id)
+        if room_data.get('host_sid') == old_sid:
+            room_data['host_sid'] = new_sid
+            self.store.delete_index('host', old_sid, room_id)
+            self.store.set_index('host', new_sid, room_id)
+
+    def assign_host(self, room_id, room_data, sid):
+        """Makes a member the room's host and indexes it as such."""
+        if room_data.get('host_sid'):
+            self.store.delete_index('host', room_data['host_sid'], room_id)
+        room_data['host_sid'] = sid
+        self.store.set_index('host', sid, room_id)
+
+    def delete_room(self, room_id, room_data=None):
+        """Deletes a room and every index entry that points at it."""
+        if room_data is None:
+            room_data = self.store.load(room_id)
+            if room_data is None:
+                return
+        self.store.delete(room_id)
+        for sid in room_data['members']:
+            self.store.delete_index('sid', sid, room_id)
+        if room_data.get('host_sid'):
+            self.store.delete_index('host', room_data['host_sid'], room_id)
+
+    def check_consistency(self):
+        """
+        Verifies that both indexes agree with the rooms they point at.
+        Returns a list of human-readable problems (empty when consistent).
+        """
+        problems = []
+        rooms = {room_id: self.store.load(room_id) for room_id in self.store.room_ids()}
+        for room_id, room_data in rooms.items():
+            for sid in room_data['members']:
+                if self.store.get_index('sid', sid) != room_id:
+                    problems.append(f"member {sid} of room {room_id} is not indexed to it")
+            host_sid = room_data.get('host_sid')
+            if host_sid in room_data['members'] and self.store.get_index('host', host_sid) != room_id:
+                problems.append(f"host {host_sid} of room {room_id} is not indexed to it")
+        for sid, room_id in self.store.index_items('sid'):
+            room_data = rooms.get(room_id)
+            if room_data is None:
+                problems.append(f"sid {sid} is indexed to missing room {room_id}")
+            elif sid not in room_data['members']:
+                problems.append(f"sid {sid} is indexed to room {room_id} but is not a member")
+        for sid, room_id in self.store.index_items('host'):
+            room_data = rooms.get(room_id)
+            if room_data is None:
+                problems.append(f"host {sid} is indexed to missing room {room_id}")
+            elif room_data.get('host_sid') != sid:
+                problems.append(f"host {sid} is indexed to room {room_id} it does not host")
+        return problems
@@ -0,0 +1,426 @@
+"""
+Storage backends for room state.
+
+InMemoryRoomStore keeps live room dictionaries in the process and is what a
+single worker uses. RedisRoomStore keeps each room as a JSON document in a
+Redis-protocol server so several Gunicorn workers can share rooms; it can be
+pointed at a real redis-server or at a fakeredis instance in tests.
+"""
+import heapq
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from bingo_engine import BoardEngine
+from game_rules import room_state
+
+ROOM_STATES = ('waiting', 'in_game', 'finished')
+
+try:
+    import redis
+except ImportError:  # Only needed when a Redis URL is configured
+    redis = None
+
+
+class RoomStore:
+    """
+    Interface every room storage backend implements.
+
+    Rooms are plain dictionaries (see the schema comment in app.py). Two
+    indexes map a SID to the room it plays in ('sid') and a host SID to the
+    room it created ('host').
+    """
+
+    def load(self, room_id):
+        """Returns the room's data, or None if it does not exist."""
+        raise NotImplementedError
+
+    def save(self, room_id, room_data):
+        """Stores the room's data, creating the room if needed."""
+        raise NotImplementedError
+
+    def delete(self, room_id):
+        """Deletes the room's data."""
+        raise NotImplementedError
+
+    def exists(self, room_id):
+        raise NotImplementedError
+
+    def room_ids(self):
+        """Returns a list of every stored room ID."""
+        raise NotImplementedError
+
+    def count(self):
+        """Returns how many rooms are stored."""
+        raise NotImplementedError
+
+    def count_in_game(self):
+        """
+        Returns how many stored rooms have a game in progress, without loading them:
+        save() and update() file every room under its state (see room_deadlines).
+        """
+        raise NotImplementedError
+
+    def idle_room_ids(self, state, before):
+        """Returns the IDs of the rooms in state whose 'last_activity' is at or before the given time."""
+        raise NotImplementedError
+
+    def expiring_room_ids(self, before):
+        """Returns the IDs of the rooms holding a disconnected player's seat that expires at or before the given time."""
+        raise NotImplementedError
+
+    def lock(self, room_id):
+        """
+        Returns a context manager that holds the room's lock. Events for one room
+        are serialized on it while events for different rooms run in parallel.
+        A store may return None for a room that does not exist: there is nothing
+        to serialize, and no lock is kept for IDs that were only guessed.
+        """
+        raise NotImplementedError
+
+    def update(self, room_id, mutate):
+        """
+        Atomically loads the room, applies mutate(room_data) and stores the result.
+        Returns whatever mutate returns, or None if the room does not exist.
+        mutate may be retried, so it must not have side effects beyond room_data.
+        """
+        raise NotImplementedError
+
+    def get_index(self, kind, key):
+        raise NotImplementedError
+
+    def set_index(self, kind, key, room_id):
+        raise NotImplementedError
+
+    def delete_index(self, kind, key, room_id=None):
+        """Deletes an index entry, only if it still points at room_id when one is given."""
+        raise NotImplementedError
+
+    def index_items(self, kind):
+        """Returns a list of (key, room_id) pairs for one index."""
+        raise NotImplementedError
+
+
+def room_deadlines(room_data):
+    """
+    (state, last activity, earliest expiry of a held seat or None) of a room: what
+    stores file it under so the reaper only visits rooms that are due.
+    """
+    expiries = room_data['disconnected'].values()
+    return (room_state(room_data), room_data.get('last_activity', time.time()),
+            min(expiries) if expiries else None)
+
+
+class InMemoryRoomStore(RoomStore):
+    """Keeps live room dictionaries in this process; load() returns the stored object itself."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.indexes = {'sid': {}, 'host': {}}
+        self.room_locks = {}
+        self._lock = threading.Lock()
+        # Per state, room ID -> last activity in the order rooms were last written, so oldest first.
+        self.activity = {state: OrderedDict() for state in ROOM_STATES}
+        # Room ID -> earliest seat expiry, and a heap of (expiry, room ID) whose outdated entries are skipped.
+        self.expiries = {}
+        self.expiry_heap = []
+        self._schedule_lock = threading.Lock()
+
+    def load(self, room_id):
+        return self.rooms.get(room_id)
+
+    def save(self, room_id, room_data):
+        if room_id not in self.room_locks:
+            with self._lock:
+                self.room_locks.setdefault(room_id, threading.RLock())
+        self.rooms[room_id] = room_data
+        self._track(room_id, room_data)
+
+    def _track(self, room_id, room_data):
+        state, last_activity, expires_at = room_deadlines(room_data)
+        with self._schedule_lock:
+            for other_state, rooms in self.activity.items():
+                if other_state != state:
+                    rooms.pop(room_id, None)
+            rooms = self.activity[state]
+            rooms[room_id] = last_activity
+            rooms.move_to_end(room_id)
+            if expires_at is None:
+                self.expiries.pop(room_id, None)
+            elif self.expiries.get(room_id) != expires_at:
+                self.expiries[room_id] = expires_at
+                heapq.heappush(self.expiry_heap, (expires_at, room_id))
+
+    def delete(self, room_id):
+        self.rooms.pop(room_id, None)
+        with self._schedule_lock:
+            for rooms in self.activity.values():
+                rooms.pop(room_id, None)
+            self.expiries.pop(room_id, None)
+        self.room_locks.pop(room_id, None)
+
+    def exists(self, room_id):
+        return room_id in self.rooms
+
+    def room_ids(self):
+        return list(self.rooms)
+
+    def count(self):
+        return len(self.rooms)
+
+    def count_in_game(self):
+        return len(self.activity['in_game'])
+
+    def idle_room_ids(self, state, before):
+        idle = []
+        with self._schedule_lock:
+            for room_id, last_activity in self.activity[state].items():
+                if last_activity > before:
+                    break
+                idle.append(room_id)
+        return idle
+
+    def expiring_room_ids(self, before):
+        due = {}
+        with self._schedule_lock:
+            heap = self.expiry_heap
+            while heap and heap[0][0] <= before:
+                expires_at, room_id = heapq.heappop(heap)
+                if self.expiries.get(room_id) == expires_at:
+                    due[room_id] = expires_at
+            # They stay due until the reaper's write refiles them, as they would in Redis.
+            for room_id, expires_at in due.items():
+                heapq.heappush(heap, (expires_at, room_id))
+        return list(due)
+
+    def lock(self, room_id):
+        # Locks are made when a room is first saved and dropped when it is deleted.
+        return self.room_locks.get(room_id)
+
+    def update(self, room_id, mutate):
+        room_lock = self.lock(room_id)
+        if room_lock is None:
+            return None
+        with room_lock:
+            room_data = self.rooms.get(room_id)
+            if room_data is None:
+                return None
+            result = mutate(room_data)
+            self._track(room_id, room_data)
+            return result
+
+    def get_index(self, kind, key):
+        return self.indexes[kind].get(key)
+
+    def set_index(self, kind, key, room_id):
+        self.indexes[kind][key] = room_id
+
+    def delete_index(self, kind, key, room_id=None):
+        index = self.indexes[kind]
+        if room_id is None or index.get(key) == room_id:
+            index.pop(key, None)
+
+    def index_items(self, kind):
+        return list(self.indexes[kind].items())
+
+
+def serialize_room(room_data):
+    """Encodes a room dictionary as JSON, flattening sets and board engines (board bytes as hex)."""
+    doc = dict(room_data)
+    doc['called_numbers'] = sorted(room_data['called_numbers'])
+    doc['engines'] = {
+        sid: [engine.board.hex(), engine.marked_mask] for sid, engine in room_data['engines'].items()
+    }
+    return json.dumps(doc, separators=(',', ':'))
+
+
+def deserialize_room(raw):
+    """Rebuilds a room dictionary from serialize_room output."""
+    room_data = json.loads(raw)
+    room_data['called_numbers'] = set(room_data['called_numbers'])
+    room_data['engines'] = {
+        sid: BoardEngine.from_state(bytes.fromhex(board), marked_mask)
+        for sid, (board, marked_mask) in room_data['engines'].items()
+    }
+    return room_data
+
+
+class RedisRoomLock:
+    """
+    A per-room mutual exclusion lock shared by every worker, built from SET NX PX.
+    The expiry frees the room if a worker dies while holding it. Not reentrant.
+    """
+
+    def __init__(self, client, key, timeout_ms=10000, poll_interval=0.002):
+        self.client = client
+        self.key = key
+        self.timeout_ms = timeout_ms
+        self.poll_interval = poll_interval
+        self.token = None
+
+    def __enter__(self):
+        token = secrets.token_hex(8)
+        while not self.client.set(self.key, token, nx=True, px=self.timeout_ms):
+            time.sleep(self.poll_interval)
+        self.token = token
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Only delete the key if it is still ours; it may have expired and been re-taken.
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.key)
+                    current = pipe.get(self.key)
+                    if current is None or current.decode() != self.token:
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.delete(self.key)
+                    pipe.execute()
+                    return False
+                except redis.WatchError:
+                    continue
+
+
+class RedisRoomStore(RoomStore):
+    """
+    Keeps rooms in a Redis-protocol server so every worker sees the same state.
+
+    Layout (all keys under the prefix):
+      room:<room_id>    JSON room document
+      rooms             set of room IDs
+      active:<state>    sorted set of the IDs of the rooms in each state, scored by last activity
+      expiries          sorted set of the IDs of rooms holding seats, scored by the earliest expiry
+      sid:<sid>         room ID the SID plays in
+      host:<sid>        room ID the SID hosts
+      lock:<room_id>    per-room lock held while an event is handled
+    """
+
+    def __init__(self, client, prefix='bingo:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, prefix='bingo:'):
+        if redis is None:
+            raise RuntimeError("The 'redis' package is required to use a Redis room store.")
+        return cls(redis.Redis.from_url(url), prefix=prefix)
+
+    def _room_key(self, room_id):
+        return f"{self.prefix}room:{room_id}"
+
+    def _index_key(self, kind, key):
+        return f"{self.prefix}{kind}:{key}"
+
+    def _track(self, pipe, room_id, room_data):
+        state, last_activity, expires_at = room_deadlines(room_data)
+        for other_state in ROOM_STATES:
+            if other_state != state:
+                pipe.zrem(f"{self.prefix}active:{other_state}", room_id)
+        pipe.zadd(f"{self.prefix}active:{state}", {room_id: last_activity})
+        if expires_at is None:
+            pipe.zrem(f"{self.prefix}expiries", room_id)
+        else:
+            pipe.zadd(f"{self.prefix}expiries", {room_id: expires_at})
+
+    def load(self, room_id):
+        raw = self.client.get(self._room_key(room_id))
+        return deserialize_room(raw) if raw is not None else None
+
+    def save(self, room_id, room_data):
+        pipe = self.client.pipeline()
+        pipe.set(self._room_key(room_id), serialize_room(room_data))
+        pipe.sadd(f"{self.prefix}rooms", room_id)
+        self._track(pipe, room_id, room_data)
+        pipe.execute()
+
+    def delete(self, room_id):
+        pipe = self.client.pipeline()
+        pipe.delete(self._room_key(room_id))
+        pipe.srem(f"{self.prefix}rooms", room_id)
+        for state in ROOM_STATES:
+            pipe.zrem(f"{self.prefix}active:{state}", room_id)
+        pipe.zrem(f"{self.prefix}expiries", room_id)
+        pipe.execute()
+
+    def exists(self, room_id):
+        return bool(self.client.exists(self._room_key(room_id)))
+
+    def room_ids(self):
+        return [room_id.decode() for room_id in self.client.smembers(f"{self.prefix}rooms")]
+
+    def count(self):
+        return self.client.scard(f"{self.prefix}rooms")
+
+    def count_in_game(self):
+        return self.client.zcard(f"{self.prefix}active:in_game")
+
+    def idle_room_ids(self, state, before):
+        return [room_id.decode() for room_id in
+                self.client.zrangebyscore(f"{self.prefix}active:{state}", '-inf', before)]
+
+    def expiring_room_ids(self, before):
+        return [room_id.decode() for room_id in self.client.zrangebyscore(f"{self.prefix}expiries", '-inf', before)]
+
+    def lock(self, room_id):
+        return RedisRoomLock(self.client, f"{self.prefix}lock:{room_id}")
+
+    def update(self, room_id, mutate):
+        key = self._room_key(room_id)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    # WATCH makes EXEC fail if another worker wrote the room in between.
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is None:
+                        pipe.unwatch()
+                        return None
+                    room_data = deserialize_room(raw)
+                    result = mutate(room_data)
+                    pipe.multi()
+                    pipe.set(key, serialize_room(room_data))
+                    self._track(pipe, room_id, room_data)
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    continue
+
+    def get_index(self, kind, key):
+        room_id = self.client.get(self._index_key(kind, key))
+        return room_id.decode() if room_id is not None else None
+
+    def set_index(self, kind, key, room_id):
+        self.client.set(self._index_key(kind, key), room_id)
+
+    def delete_index(self, kind, key, room_id=None):
+        index_key = self._index_key(kind, key)
+        if room_id is None:
+            self.client.delete(index_key)
+            return
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(index_key)
+                    current = pipe.get(index_key)
+                    if current is None or current.decode() != room_id:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.delete(index_key)
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue
+
+    def index_items(self, kind):
+        pattern_prefix = self._index_key(kind, '')
+        items = []
+        for index_key in self.client.scan_iter(match=f"{pattern_prefix}*"):
+            room_id = self.client.get(index_key)
+            if room_id is not None:
+                items.append((index_key.decode()[len(pattern_prefix):], room_id.decode()))
+        return items
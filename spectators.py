@@ -0,0 +1,75 @@
+"""
+Read-only spectator channels.
+
+Spectators of a room join a separate Socket.IO room (spectator_channel()), so
+the players' broadcasts to the game room never fan out to them. The call
+handlers only record what happened in a SpectatorFeed, which is a dictionary
+update under a short lock; a background task flushes the feed every interval
+and sends each watched room one coalesced 'spectator_update' carrying every
+number called since the last flush. Structural changes (a game starting, a
+player leaving, the room closing) mark the room for a full snapshot instead.
+"""
+import threading
+
+
+def spectator_channel(room_id):
+    """Name of the Socket.IO room a game's spectators are joined to."""
+    return f"{room_id}:spectators"
+
+
+class SpectatorFeed:
+    """
+    Collects per-room updates between flushes. emit(event, payload, to) sends to
+    a channel; snapshot(room_id) returns the room's full state, or None if the
+    room no longer exists.
+    """
+
+    def __init__(self, emit, snapshot):
+        self.emit = emit
+        self.snapshot = snapshot
+        # room ID -> update being coalesced: {'calls': [[seq, number], ...], ...}
+        self.pending = {}
+        # room IDs whose spectators get a full snapshot on the next flush
+        self.stale = set()
+        self._lock = threading.Lock()
+
+    def record_call(self, room_id, seq, number, next_turn, changed_progress):
+        with self._lock:
+            update = self.pending.get(room_id)
+            if update is None:
+                update = self.pending[room_id] = {'calls': [], 'progress': {}}
+            update['calls'].append([seq, number])
+            update['seq'] = seq
+            update['next_turn'] = next_turn
+            update['progress'].update(changed_progress)
+
+    def record_win(self, room_id, seq, winner_sid):
+        with self._lock:
+            update = self.pending.setdefault(room_id, {'calls': [], 'progress': {}})
+            update['seq'] = seq
+            update['winner_sid'] = winner_sid
+
+    def invalidate(self, room_id):
+        """Replaces whatever is pending for the room with a full snapshot."""
+        with self._lock:
+            self.stale.add(room_id)
+            self.pending.pop(room_id, None)
+
+    def flush(self):
+        """Sends everything recorded since the last flush. Returns how many rooms were sent to."""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            stale, self.stale = self.stale, set()
+
+        for room_id in stale:
+            snapshot = self.snapshot(room_id)
+            if snapshot is None:
+                self.emit('spectator_room_closed', {'room_id': room_id}, spectator_channel(room_id))
+            else:
+                self.emit('spectator_snapshot', snapshot, spectator_channel(room_id))
+        for room_id, update in pending.items():
+            if room_id in stale:
+                continue
+            update['room_id'] = room_id
+            self.emit('spectator_update', update, spectator_channel(room_id))
+        return len(stale) + len(pending)
@@ -0,0 +1,407 @@
+// Shared by the lobby and game pages: board rendering, validation and the
+// protocol 2 delta helpers.
+
+function bingoStringFor(lines) {
+    return 'BINGO'.slice(0, Math.min(lines || 0, 5));
+}
+
+function acceptSeq(seq) {
+    if (seq <= lastSeq) return false; // Already applied via a snapshot
+    if (seq !== lastSeq + 1) {
+        console.warn(`Missed broadcast (expected seq ${lastSeq + 1}, got ${seq}). Requesting snapshot.`);
+        socket.emit('request_game_snapshot');
+        return false;
+    }
+    lastSeq = seq;
+    return true;
+}
+
+function currentBingoStrings() {
+    const strings = {};
+    Object.keys(playerBoards).forEach(sid => strings[sid] = bingoStringFor(bingoProgress[sid]));
+    return strings;
+}
+
+function markedFor(board, numbers) {
+    const marked = Array(5).fill(0).map(() => Array(5).fill(false));
+    board.forEach((num, index) => {
+        if (numbers.has(num)) marked[Math.floor(index / 5)][index % 5] = true;
+    });
+    return marked;
+}
+
+function expandNumberCalled(data) {
+    Object.assign(bingoProgress, data.progress || {});
+    return {
+        number: data.number,
+        next_turn: data.next_turn,
+        called_numbers: [...calledNumbers, data.number],
+        bingo_progress: { ...bingoProgress },
+        bingo_string: currentBingoStrings(),
+        player_names: playerNames
+    };
+}
+
+function expandBingoWin(data) {
+    const finalMarked = {};
+    Object.keys(playerBoards).forEach(sid => finalMarked[sid] = markedFor(playerBoards[sid], calledNumbers));
+    return {
+        winner_sid: data.winner_sid,
+        final_boards: playerBoards,
+        final_marked_boards: finalMarked,
+        bingo_progress: { ...bingoProgress },
+        bingo_string: currentBingoStrings(),
+        called_numbers_final: [...calledNumbers],
+        player_names: playerNames
+    };
+}
+
+/**
+ * Updates the display of a Bingo board.
+ * @param {HTMLElement} boardDiv - The HTML element representing the board.
+ * @param {number[]} values - An array of numbers for the board cells.
+ * @param {boolean} isClickable - True if cells should be clickable (for current player's turn).
+ * @param {boolean} currentTurn - True if it's the current player's turn.
+ * @param {Set<number>} currentCalledNumbers - The set of numbers called so far.
+ */
+function updateBoardDisplay(boardDiv, values, isClickable = false, currentTurn = false, currentCalledNumbers = calledNumbers) {
+    boardDiv.innerHTML = '';
+    values.forEach((num, index) => {
+        const cell = document.createElement('div');
+        cell.classList.add('cell');
+        const span = document.createElement('span'); // Use span for centering text
+        span.innerText = num;
+        cell.appendChild(span);
+        cell.dataset.number = num;
+        cell.dataset.index = index;
+
+        const isCalled = currentCalledNumbers.has(parseInt(num));
+        if (isCalled) {
+            cell.classList.add('called');
+            cell.classList.add('disabled');
+        } else if (isClickable && currentTurn) {
+            cell.classList.remove('disabled');
+            cell.classList.add('clickable');
+            cell.addEventListener('click', () => {
+                socket.emit('call_number_from_board', { number: parseInt(num) });
+            });
+        } else {
+            cell.classList.add('disabled');
+            cell.classList.remove('clickable');
+            cell.onclick = null;
+        }
+        boardDiv.appendChild(cell);
+    });
+
+    if (boardDiv.id === 'local-player-board') {
+        setTimeout(() => {
+            highlightBingoLines();
+        }, 100);
+    }
+}
+
+/**
+ * Displays a placeholder board for the opponent during active gameplay.
+ * This hides the opponent's actual numbers for privacy.
+ * @param {HTMLElement} boardDiv - The HTML element representing the opponent's board.
+ */
+function displayOpponentPlaceholderBoard(boardDiv) {
+    boardDiv.innerHTML = '';
+    boardDiv.classList.add('board');
+    for (let i = 0; i < 25; i++) {
+        const cell = document.createElement('div');
+        cell.classList.add('cell');
+        cell.classList.add('disabled');
+        cell.style.backgroundColor = 'rgba(255, 255, 255, 0.05)';
+        cell.innerText = ''; // No text for placeholder
+        boardDiv.appendChild(cell);
+    }
+}
+
+/**
+ * Renders a board with its actual numbers and marked status. Used for post-game viewing.
+ * @param {HTMLElement} boardDiv - The HTML element for the board.
+ * @param {number[]} boardValues - The actual numbers on the board.
+ * @param {boolean[][]} markedValues - The 2D array indicating marked cells.
+ * @param {Set<number>} currentCalledNumbers - The set of all numbers called in the game.
+ */
+function renderFinalBoard(boardDiv, boardValues, markedValues, currentCalledNumbers) {
+    boardDiv.innerHTML = '';
+    boardDiv.classList.add('board');
+    boardValues.forEach((num, index) => {
+        const cell = document.createElement('div');
+        cell.classList.add('cell');
+        const span = document.createElement('span'); // Use span for centering text
+        span.innerText = num;
+        cell.appendChild(span);
+        cell.dataset.number = num;
+        cell.dataset.index = index;
+        cell.classList.add('disabled');
+
+        const row = Math.floor(index / 5);
+        const col = index % 5;
+
+        if (markedValues[row][col]) {
+            cell.classList.add('called');
+        }
+        boardDiv.appendChild(cell);
+    });
+
+    // Temporarily set global variables for highlightBingoLines to work
+    const originalLocalPlayerMarked = localPlayerMarked;
+    localPlayerMarked = markedValues;
+    const originalLocalBoardData = localPlayerBoardData;
+    localPlayerBoardData = boardValues;
+    const originalCalledNumbers = calledNumbers;
+    calledNumbers = currentCalledNumbers;
+    highlightBingoLines();
+    // Restore original global variables
+    localPlayerMarked = originalLocalPlayerMarked;
+    localPlayerBoardData = originalLocalBoardData;
+    calledNumbers = originalCalledNumbers;
+}
+
+/**
+ * Creates an input-enabled Bingo board for initial setup or a display-only board.
+ * @param {HTMLElement} boardDiv - The HTML element for the board.
+ * @param {number} playerId - Identifier for the player (e.g., 1 or 2).
+ * @param {boolean} isInput - True if cells should be input fields, false for display.
+ * @param {number[]} initialValues - Optional array of numbers to pre-fill the board.
+ */
+function createBingoBoard(boardDiv, playerId, isInput = true, initialValues = []) {
+    boardDiv.innerHTML = '';
+    boardDiv.classList.add('board');
+    const inputs = [];
+    const messageDiv = document.getElementById(`board-${playerId}-message`);
+    if (messageDiv) messageDiv.innerText = '';
+
+    boardDiv.tabIndex = 0;
+    boardDiv.style.outline = 'none';
+
+    for (let i = 0; i < 25; i++) {
+        const cellWrapper = document.createElement('div'); // Wrapper for the input cell
+        cellWrapper.classList.add('cell', 'input');
+        cellWrapper.dataset.index = i;
+
+        const cell = document.createElement('input');
+        cell.type = 'text';
+        cell.maxLength = 2;
+        cell.placeholder = ''; // Optional: add placeholder if desired
+        cell.addEventListener('input', function() {
+            const value = this.value.trim();
+            cellWrapper.classList.remove('invalid-input'); // Remove from wrapper
+            if (messageDiv) messageDiv.innerText = '';
+
+            if (value === '') return;
+
+            const num = parseInt(value);
+            if (isNaN(num) || num < 1 || num > 25) {
+                cellWrapper.classList.add('invalid-input'); // Add to wrapper
+                if (messageDiv) messageDiv.innerText = 'Enter numbers between 1 and 25.';
+            } else {
+                const currentBoardInputs = Array.from(boardDiv.querySelectorAll('input'));
+                const enteredValues = currentBoardInputs.map(input => input.value.trim()).filter(v => v !== '');
+                const isDuplicate = enteredValues.filter(v => v === value).length > 1;
+                if (isDuplicate) {
+                    cellWrapper.classList.add('invalid-input'); // Add to wrapper
+                    if (messageDiv) messageDiv.innerText = `Number ${value} has already been entered.`;
+                }
+            }
+        });
+        inputs.push(cell);
+        cellWrapper.appendChild(cell); // Append input to wrapper
+        boardDiv.appendChild(cellWrapper); // Append wrapper to board
+    }
+
+    boardDiv.addEventListener('keydown', (event) => {
+        const activeElement = document.activeElement;
+        if (activeElement.tagName === 'INPUT' && activeElement.parentNode.classList.contains('cell')) { // Check parent for 'cell' class
+            const index = parseInt(activeElement.parentNode.dataset.index); // Get index from parent
+            let nextIndex = -1;
+
+            switch (event.key) {
+                case 'ArrowLeft':
+                    nextIndex = index > 0 ? index - 1 : -1;
+                    break;
+                case 'ArrowRight':
+                    nextIndex = index < 24 ? index + 1 : -1;
+                    break;
+                case 'ArrowUp':
+                    nextIndex = index >= 5 ? index - 5 : -1;
+                    break;
+                case 'ArrowDown':
+                    nextIndex = index < 20 ? index + 5 : -1;
+                    break;
+                case 'Enter':
+                    nextIndex = index < 24 ? index + 1 : -1;
+                    break;
+            }
+
+            if (nextIndex !== -1 && inputs[nextIndex]) {
+                inputs[nextIndex].focus();
+                event.preventDefault();
+            } else if (event.key === 'Enter' && nextIndex === -1 && activeElement === inputs[24]) {
+                 const submitButton = boardDiv.parentNode.querySelector('.submit-button-container button');
+                 if (submitButton && !submitButton.disabled) {
+                     submitButton.click();
+                 }
+                 event.preventDefault();
+            }
+        } else if (document.activeElement === boardDiv) {
+            inputs[0]?.focus();
+            event.preventDefault();
+        }
+    });
+
+    setTimeout(() => {
+        inputs[0]?.focus();
+    }, 0);
+
+    if (isInput) {
+        const submitButtonContainer = document.createElement('div');
+        submitButtonContainer.classList.add('submit-button-container');
+
+        const submitButton = document.createElement('button');
+        submitButton.innerText = `Submit Board`;
+        submitButton.addEventListener('click', () => {
+            const boardInputs = boardDiv.querySelectorAll('input');
+            const boardValues = Array.from(boardInputs).map(input => input.value);
+            const validationResult = validateBoard(boardValues);
+            if (validationResult.valid) {
+                const numericBoard = boardValues.map(v => parseInt(v));
+                socket.emit('board_submitted', { board: numericBoard });
+                submitButton.disabled = true;
+                boardInputs.forEach(input => input.disabled = true);
+                boardDiv.tabIndex = -1;
+                if (messageDiv) messageDiv.innerText = 'Board submitted. Waiting for opponent.';
+                // Hide the submit button container after submission
+                submitButtonContainer.style.display = 'none';
+            } else {
+                displayMessage('Error', validationResult.message);
+                // Ensure modal buttons are reset to default after error message
+                modalOkButton.onclick = () => modal.style.display = 'none';
+                closeButton.onclick = () => modal.style.display = 'none';
+            }
+        });
+        submitButtonContainer.appendChild(submitButton);
+        boardDiv.parentNode.appendChild(submitButtonContainer);
+    }
+}
+
+function validateBoard(boardValues) {
+    if (boardValues.some(value => value.trim() === '')) {
+        return { valid: false, message: 'Please fill all the cells.' };
+    }
+    const numbers = boardValues.map(value => parseInt(value));
+    if (numbers.some(isNaN) || numbers.some(num => num < 1 || num > 25)) {
+        return { valid: false, message: 'Please enter numbers between 1 and 25.' };
+    }
+    const uniqueNumbers = [...new Set(numbers)];
+    if (uniqueNumbers.length !== 25) {
+        return { valid: false, message: 'Please enter 25 unique numbers.' };
+    }
+    return { valid: true };
+}
+
+function renamePlayerSid(oldSid, newSid) {
+    [playerNames, playerBoards, bingoProgress].forEach(map => {
+        if (oldSid in map) {
+            map[newSid] = map[oldSid];
+            delete map[oldSid];
+        }
+    });
+    if (currentTurnSid === oldSid) currentTurnSid = newSid;
+    if (playAgainRequesterSid === oldSid) playAgainRequesterSid = newSid;
+}
+
+/**
+ * Highlights completed Bingo lines on the local player's board.
+ * This function is called after the local board display is updated.
+ */
+function highlightBingoLines() {
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (!localBoardDiv || localPlayerBoardData.length === 0) return;
+
+    const cells = Array.from(localBoardDiv.children);
+
+    cells.forEach(cell => cell.classList.remove('bingo-line'));
+
+    console.log('Checking for bingo lines. Current localPlayerMarked:', JSON.stringify(localPlayerMarked));
+
+    for (let r = 0; r < 5; r++) {
+        if (localPlayerMarked[r].every(cellMarked => cellMarked)) {
+            console.log('Row ' + r + ' is complete!');
+            for (let c = 0; c < 5; c++) {
+                const cellToHighlight = cells[r * 5 + c];
+                cellToHighlight.classList.add('bingo-line');
+                console.log(`Row highlight: Cell at [${r}][${c}] (number ${cellToHighlight.dataset.number}) has classes: ${cellToHighlight.className}`);
+                setTimeout(() => {
+                    const computedStyle = window.getComputedStyle(cellToHighlight);
+                    console.log(`Row highlight: Computed background-color for cell ${cellToHighlight.dataset.number}: ${computedStyle.backgroundColor}`);
+                }, 10);
+            }
+        }
+    }
+
+    for (let c = 0; c < 5; c++) {
+        let columnComplete = true;
+        for (let r = 0; r < 5; r++) {
+            if (!localPlayerMarked[r][c]) {
+                columnComplete = false;
+                break;
+            }
+        }
+        if (columnComplete) {
+            console.log('Column ' + c + ' is complete!');
+            for (let r = 0; r < 5; r++) {
+                const cellToHighlight = cells[r * 5 + c];
+                cellToHighlight.classList.add('bingo-line');
+                console.log(`Column highlight: Cell at [${r}][${c}] (number ${cellToHighlight.dataset.number}) has classes: ${cellToHighlight.className}`);
+                setTimeout(() => {
+                    const computedStyle = window.getComputedStyle(cellToHighlight);
+                    console.log(`Column highlight: Computed background-color for cell ${cellToHighlight.dataset.number}: ${computedStyle.backgroundColor}`);
+                }, 10);
+            }
+        }
+    }
+
+    let diagonal1Complete = true;
+    for (let i = 0; i < 5; i++) {
+        if (!localPlayerMarked[i][i]) {
+            diagonal1Complete = false;
+            break;
+        }
+    }
+    if (diagonal1Complete) {
+        console.log('Main diagonal is complete!');
+        for (let i = 0; i < 5; i++) {
+            const cellToHighlight = cells[i * 5 + i];
+            cellToHighlight.classList.add('bingo-line');
+            console.log(`Main diagonal highlight: Cell at [${i}][${i}] (number ${cellToHighlight.dataset.number}) has classes: ${cellToHighlight.className}`);
+            setTimeout(() => {
+                const computedStyle = window.getComputedStyle(cellToHighlight);
+                console.log(`Main diagonal highlight: Computed background-color for cell ${cellToHighlight.dataset.number}: ${computedStyle.backgroundColor}`);
+                }, 10);
+        }
+    }
+
+    let diagonal2Complete = true;
+    for (let i = 0; i < 5; i++) {
+        if (!localPlayerMarked[i][4 - i]) {
+            diagonal2Complete = false;
+            break;
+        }
+    }
+    if (diagonal2Complete) {
+        console.log('Anti-diagonal is complete!');
+        for (let i = 0; i < 5; i++) {
+            const cellToHighlight = cells[i * 5 + (4 - i)];
+            cellToHighlight.classList.add('bingo-line');
+            console.log(`Anti-diagonal highlight: Cell at [${i}][${4-i}] (number ${cellToHighlight.dataset.number}) has classes: ${cellToHighlight.className}`);
+            setTimeout(() => {
+                const computedStyle = window.getComputedStyle(cellToHighlight);
+                console.log(`Anti-diagonal highlight: Computed background-color for cell ${cellToHighlight.dataset.number}: ${computedStyle.backgroundColor}`);
+            }, 10);
+        }
+    }
+}
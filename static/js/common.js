@@ -0,0 +1,7 @@
+// Shared by every page: the message modal.
+
+function displayMessage(title, message) {
+    modalTitle.innerText = title;
+    modalBody.innerText = message;
+    modal.style.display = 'flex';
+}
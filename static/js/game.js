@@ -0,0 +1,645 @@
+const socket = io();
+const gameArea = document.getElementById('game-area');
+const gameInfoContainer = document.getElementById('game-info-container');
+const gameStatusDiv = document.getElementById('game-status');
+const postGameOptionsDiv = document.getElementById('post-game-options');
+const viewOpponentBoardBtn = document.getElementById('view-opponent-board-btn');
+const playAgainBtn = document.getElementById('play-again-btn');
+
+const playAgainResponseOptionsDiv = document.getElementById('play-again-response-options');
+const playAgainRequestMessage = document.getElementById('play-again-request-message');
+const acceptPlayAgainBtn = document.getElementById('accept-play-again-btn');
+const rejectPlayAgainBtn = document.getElementById('reject-play-again-btn');
+
+const numberCallSound = document.getElementById('number-call-sound');
+const bingoSound = document.getElementById('bingo-sound');
+const loseSound = document.getElementById('lose-sound');
+
+let startGameButton;
+let playerSid;
+let currentRoomId;
+let isHost = false; // This will be determined by the backend on game.html load
+let currentTurnSid = null;
+let localPlayerBoardData = [];
+let remotePlayerBoardData = [];
+let calledNumbers = new Set();
+let localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+let remotePlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+let playerNames = {};
+let playAgainRequesterSid = null;
+
+const modal = document.getElementById('message-modal');
+const modalTitle = document.getElementById('modal-title');
+const modalBody = document.getElementById('modal-body');
+const modalOkButton = document.getElementById('modal-ok-button');
+const closeButton = document.querySelector('.close-button');
+
+modalOkButton.onclick = () => modal.style.display = 'none';
+closeButton.onclick = () => modal.style.display = 'none';
+
+
+// Protocol 2: the server sends delta-encoded number_called/bingo_win broadcasts
+// tagged with a sequence number. The full payload shape is rebuilt locally from
+// the state we already hold, and a snapshot is requested if a broadcast is missed.
+const PROTOCOL_VERSION = 2;
+let lastSeq = 0;
+let playerBoards = {};
+let bingoProgress = {};
+
+// Parse URL parameters to get room_id and player_name
+const urlParams = new URLSearchParams(window.location.search);
+currentRoomId = urlParams.get('room_id');
+const playerName = decodeURIComponent(urlParams.get('player_name') || 'Player');
+
+if (!currentRoomId || !playerName) {
+    displayMessage('Error', 'Room ID or Player Name missing. Please go back to the room selection page.');
+    modalOkButton.onclick = () => window.location.href = '/room.html';
+    closeButton.onclick = () => window.location.href = '/room.html';
+} else {
+    document.addEventListener('DOMContentLoaded', () => {
+        playerSid = socket.id; // Ensure playerSid is set on connect
+        console.log('Connected client SID:', playerSid);
+        // Re-join the room on the game page
+        socket.emit('rejoin_game_room', {
+            room_id: currentRoomId,
+            player_name: playerName,
+            reconnect_token: sessionStorage.getItem('bingo_reconnect_token'),
+            protocol_version: PROTOCOL_VERSION
+        });
+        document.getElementById('room-id-display').innerText = `Room ID: ${currentRoomId}`;
+        gameStatusDiv.innerText = `Welcome ${playerName}! Waiting for game to start...`;
+
+        const player1BoardContainer = document.createElement('div');
+        player1BoardContainer.id = 'local-player-board-container';
+        player1BoardContainer.innerHTML = `<h3>Your Board (${playerName})</h3><div id="local-player-board" class="board"></div><div id="local-player-bingo-progress">Bingo Progress: </div><div id="board-1-message" style="color: red; margin-top: 5px;"></div>`;
+        gameArea.appendChild(player1BoardContainer);
+        createBingoBoard(document.getElementById('local-player-board'), 1);
+
+        const remotePlayerBoardContainer = document.createElement('div');
+        remotePlayerBoardContainer.id = 'remote-player-board-container';
+        remotePlayerBoardContainer.innerHTML = '<h3>Opponent\'s Board</h3><div id="remote-player-board" class="board"></div><div id="remote-player-bingo-progress">Bingo Progress: </div><div id="board-2-message" style="color: red; margin-top: 5px;"></div>';
+        remotePlayerBoardContainer.style.display = 'none';
+        gameArea.appendChild(remotePlayerBoardContainer);
+    });
+}
+
+
+// Function to reset UI to initial state for a new game within the same room
+function resetGameUI() {
+    gameArea.innerHTML = ''; // Clear existing boards
+    postGameOptionsDiv.style.display = 'none';
+    playAgainResponseOptionsDiv.style.display = 'none';
+    playAgainRequesterSid = null;
+    localPlayerBoardData = [];
+    remotePlayerBoardData = [];
+    calledNumbers = new Set();
+    localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+    remotePlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+    playerNames = {}; // Reset player names for a new game
+    currentTurnSid = null;
+
+    // Re-create boards for input
+    const player1BoardContainer = document.createElement('div');
+    player1BoardContainer.id = 'local-player-board-container';
+    player1BoardContainer.innerHTML = `<h3>Your Board (${playerName})</h3><div id="local-player-board" class="board"></div><div id="local-player-bingo-progress">Bingo Progress: </div><div id="board-1-message" style="color: red; margin-top: 5px;"></div>`;
+    gameArea.appendChild(player1BoardContainer);
+    createBingoBoard(document.getElementById('local-player-board'), 1);
+
+    const remotePlayerBoardContainer = document.createElement('div');
+    remotePlayerBoardContainer.id = 'remote-player-board-container';
+    remotePlayerBoardContainer.innerHTML = '<h3>Opponent\'s Board</h3><div id="remote-player-board" class="board"></div><div id="remote-player-bingo-progress">Bingo Progress: </div><div id="board-2-message" style="color: red; margin-top: 5px;"></div>';
+    remotePlayerBoardContainer.style.display = 'none';
+    gameArea.appendChild(remotePlayerBoardContainer);
+
+    gameInfoContainer.style.display = 'flex';
+    gameStatusDiv.innerText = 'Both players need to submit new boards...';
+    if (startGameButton) {
+        startGameButton.style.display = 'none';
+        startGameButton.disabled = true;
+    }
+    playAgainBtn.disabled = false; // Re-enable play again button for future use
+}
+
+// After a dropped connection, reclaim our seat again with the stored token.
+socket.on('connect', () => {
+    const previousSid = playerSid;
+    playerSid = socket.id;
+    if (previousSid && previousSid !== playerSid && currentRoomId) {
+        socket.emit('rejoin_game_room', {
+            room_id: currentRoomId,
+            reconnect_token: sessionStorage.getItem('bingo_reconnect_token'),
+            protocol_version: PROTOCOL_VERSION
+        });
+    }
+});
+
+socket.on('room_expired', data => {
+    sessionStorage.removeItem('bingo_reconnect_token');
+    displayMessage('Room Closed', data.message);
+    modalOkButton.onclick = () => window.location.href = '/room.html';
+    closeButton.onclick = () => window.location.href = '/room.html';
+});
+
+socket.on('rejoin_game_room_failed', data => {
+    sessionStorage.removeItem('bingo_reconnect_token');
+    displayMessage('Connection Lost', data.message);
+    modalOkButton.onclick = () => window.location.href = '/room.html';
+    closeButton.onclick = () => window.location.href = '/room.html';
+});
+
+socket.on('player_disconnected', data => {
+    const name = playerNames[data.sid] || data.player_name || 'Opponent';
+    gameStatusDiv.innerText = `${name} lost connection. Waiting up to ${data.grace_seconds}s for them to rejoin...`;
+});
+
+socket.on('player_rejoined', data => {
+    console.log('Event: player_rejoined', data);
+    renamePlayerSid(data.old_sid, data.sid);
+    const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+    gameStatusDiv.innerText = currentTurnSid
+        ? `${data.player_name} rejoined. It's ${turnName} turn.`
+        : `${data.player_name} rejoined.`;
+});
+
+// Rooms with more than two players carry on when someone leaves.
+socket.on('player_left', data => {
+    console.log('Event: player_left', data);
+    const name = playerNames[data.sid] || data.player_name || 'A player';
+    delete playerNames[data.sid];
+    isHost = data.host_sid === playerSid;
+    currentTurnSid = data.current_turn;
+    const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+    gameStatusDiv.innerText = currentTurnSid
+        ? `${name} left the room. It's ${turnName} turn.`
+        : `${name} left the room.`;
+});
+
+socket.on('rejoin_game_room_success', data => {
+    console.log('Successfully re-joined game room:', data);
+    playerSid = socket.id;
+    sessionStorage.setItem('bingo_reconnect_token', data.reconnect_token);
+    isHost = data.is_host;
+    playerNames = data.player_names; // Update player names from backend
+    currentRoomId = data.room_id; // Ensure currentRoomId is set from backend
+    playerBoards = data.boards || {};
+    bingoProgress = data.bingo_progress || {};
+    lastSeq = data.seq || 0;
+    document.getElementById('room-id-display').innerText = `Room ID: ${currentRoomId}`;
+
+    // If game is already in progress, update boards and status
+    if (data.game_started) {
+        localPlayerBoardData = data.boards[playerSid];
+        remotePlayerBoardData = data.boards[Object.keys(data.boards).find(sid => sid !== playerSid)];
+        calledNumbers = new Set(data.called_numbers);
+        localPlayerMarked = data.marked_boards[playerSid];
+        remotePlayerMarked = data.marked_boards[Object.keys(data.marked_boards).find(sid => sid !== playerSid)];
+        currentTurnSid = data.current_turn;
+
+        const localBoardDiv = document.getElementById('local-player-board');
+        const remoteBoardDiv = document.getElementById('remote-player-board');
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid, calledNumbers);
+        displayOpponentPlaceholderBoard(remoteBoardDiv);
+
+        const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+        if (localBingoProgressDiv && data.bingo_string) {
+            localBingoProgressDiv.innerText = `Bingo Progress: ${data.bingo_string[playerSid]}`;
+        }
+
+        gameStatusDiv.innerText = `Game in progress. Number Called: ${data.last_called_number || 'None'}. It's ${playerNames[currentTurnSid]}'s turn.`;
+        if (startGameButton) startGameButton.style.display = 'none';
+
+    } else if (data.boards_submitted) {
+        localPlayerBoardData = data.boards[playerSid];
+        remotePlayerBoardData = data.boards[Object.keys(data.boards).find(sid => sid !== playerSid)];
+        const localBoardDiv = document.getElementById('local-player-board');
+        const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, false, false); // Not clickable yet
+        displayOpponentPlaceholderBoard(remotePlayerBoardContainer.querySelector('.board'));
+
+        // Show start game button if host and both boards are submitted
+        startGameButton = document.getElementById('start-game-button');
+        if (isHost) {
+            startGameButton.style.display = 'block';
+            startGameButton.disabled = false;
+            startGameButton.onclick = () => {
+                socket.emit('start_game_button_clicked');
+                startGameButton.disabled = true;
+                startGameButton.style.display = 'none';
+            };
+            gameStatusDiv.innerText = 'Both boards submitted. Click "Start Game" to begin!';
+        } else {
+            gameStatusDiv.innerText = 'Both boards submitted. Waiting for host to start the game...';
+        }
+    } else {
+        gameStatusDiv.innerText = 'Waiting for all players to submit boards...';
+    }
+});
+
+
+// The server re-checks every board; unlock ours for editing if it was refused.
+socket.on('invalid_board', data => {
+    const boardDiv = document.getElementById('local-player-board');
+    if (boardDiv) {
+        boardDiv.querySelectorAll('input').forEach(input => input.disabled = false);
+        boardDiv.tabIndex = 0;
+        const submitButtonContainer = boardDiv.parentNode.querySelector('.submit-button-container');
+        if (submitButtonContainer) {
+            submitButtonContainer.style.display = '';
+            submitButtonContainer.querySelector('button').disabled = false;
+        }
+    }
+    displayMessage('Invalid Board', data.message);
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+});
+
+socket.on('opponent_board_submitted', data => {
+    console.log('Opponent board submitted', data);
+    playerNames = data.player_names || {};
+    remotePlayerBoardData = data.opponent_board; // Store opponent's board data
+    const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+    const opponentName = playerNames[opponentSid] || 'Opponent';
+
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    if (remotePlayerBoardContainer) {
+        remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+    }
+
+    startGameButton = document.getElementById('start-game-button');
+    if (isHost && localPlayerBoardData.length === 25) { // Check if local board is also submitted
+        if (startGameButton) {
+            startGameButton.style.display = 'block';
+            startGameButton.disabled = false;
+            gameStatusDiv.innerText = 'Both boards submitted. Click "Start Game" to begin!';
+        }
+    } else if (!isHost) {
+        gameStatusDiv.innerText = 'Opponent has submitted their board. Waiting for host to start the game...';
+    }
+});
+
+
+socket.on('game_start_signal', data => {
+    console.log('Game start signal received', data);
+    lastSeq = data.seq || 0;
+    bingoProgress = {};
+    playerNames = data.player_names || {};
+    const localPlayerName = playerNames[playerSid] || 'You';
+    const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+    const opponentName = playerNames[opponentSid] || 'Opponent';
+
+    gameStatusDiv.innerText = `Game Started! It's ${data.current_turn === playerSid ? localPlayerName : opponentName}'s turn.`;
+
+    document.getElementById('local-player-board-container').querySelector('h3').innerText = `Your Board (${localPlayerName})`;
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    if (remotePlayerBoardContainer) {
+        remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+        remotePlayerBoardContainer.style.display = 'none';
+    }
+
+    currentTurnSid = data.current_turn;
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+
+    startGameButton = document.getElementById('start-game-button');
+    if (startGameButton) {
+        startGameButton.style.display = 'none';
+    }
+    playAgainResponseOptionsDiv.style.display = 'none';
+});
+
+socket.on('number_called', data => {
+    if (data.seq !== undefined) {
+        if (!acceptSeq(data.seq)) return;
+        data = expandNumberCalled(data);
+    }
+    const calledNumber = data.number;
+    const nextTurnSid = data.next_turn;
+    calledNumbers.add(calledNumber);
+    playerNames = data.player_names || {};
+
+    if (numberCallSound) {
+        numberCallSound.currentTime = 0;
+        numberCallSound.play().catch(e => console.error("Error playing sound:", e));
+    }
+
+    const localPlayerName = playerNames[playerSid] || 'You';
+    const nextTurnName = playerNames[nextTurnSid] || (nextTurnSid === playerSid ? 'Your' : 'Opponent\'s');
+
+    const indexInLocalBoard = localPlayerBoardData.indexOf(calledNumber);
+    if (indexInLocalBoard !== -1) {
+        const row = Math.floor(indexInLocalBoard / 5);
+        const col = indexInLocalBoard % 5;
+        localPlayerMarked[row][col] = true;
+        console.log(`Number ${calledNumber} marked at [${row}][${col}]. localPlayerMarked:`, JSON.stringify(localPlayerMarked));
+    }
+
+    gameStatusDiv.innerText = `Number Called: ${calledNumber}. It's ${nextTurnName} turn.`;
+    currentTurnSid = nextTurnSid;
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    const remoteBoardDiv = document.getElementById('remote-player-board');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+    displayOpponentPlaceholderBoard(remoteBoardDiv);
+
+    if (data.bingo_string && localBingoProgressDiv) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+    if (remoteBingoProgressDiv) {
+        remoteBingoProgressDiv.style.display = 'none';
+    }
+});
+
+function showBingoWin(data) {
+    playerNames = data.player_names || {};
+    const winnerId = data.winner_sid;
+    const winnerName = playerNames[winnerId] || 'The Winner';
+    const localPlayerName = playerNames[playerSid] || 'You';
+
+    let winnerMessage;
+    if (winnerId === playerSid) {
+        winnerMessage = `BINGO! You (${localPlayerName}) won!`;
+        if (bingoSound) {
+            bingoSound.currentTime = 0;
+            bingoSound.play().catch(e => console.error("Error playing win sound:", e));
+        }
+    } else {
+        winnerMessage = `BINGO! ${winnerName} won! You lost.`;
+        if (loseSound) {
+            loseSound.currentTime = 0;
+            loseSound.play().catch(e => console.error("Error playing lose sound:", e));
+        }
+    }
+    displayMessage('Game Over', winnerMessage);
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'block';
+    playAgainBtn.style.display = 'block';
+    playAgainResponseOptionsDiv.style.display = 'none';
+
+    const sids = Object.keys(data.final_boards);
+    const player1Sid = sids[0];
+    const player2Sid = sids[1];
+
+    const finalLocalBoardData = (playerSid === player1Sid) ? data.final_boards[player1Sid] : data.final_boards[player2Sid];
+    const finalLocalMarked = (playerSid === player1Sid) ? data.final_marked_boards[player1Sid] : data.final_marked_boards[player2Sid];
+    const finalRemoteBoardData = (playerSid === player1Sid) ? data.final_boards[player2Sid] : data.final_boards[player1Sid];
+    const finalRemoteMarked = (playerSid === player1Sid) ? data.final_marked_boards[player2Sid] : data.final_marked_boards[player1Sid];
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    renderFinalBoard(localBoardDiv, finalLocalBoardData, finalLocalMarked, new Set(data.called_numbers_final));
+
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    const remoteBoardDiv = document.getElementById('remote-player-board');
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+
+    remotePlayerBoardContainer.style.display = 'block';
+    const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+    const opponentName = playerNames[opponentSid] || 'Opponent';
+    remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+
+    renderFinalBoard(remoteBoardDiv, finalRemoteBoardData, finalRemoteMarked, new Set(data.called_numbers_final));
+    if (remoteBingoProgressDiv && data.bingo_string) {
+        const remoteProgress = (playerSid === player1Sid) ? data.bingo_string[player2Sid] : data.bingo_string[player1Sid];
+        remoteBingoProgressDiv.innerText = `Bingo Progress: ${remoteProgress}`;
+        remoteBingoProgressDiv.style.display = 'block';
+    }
+    if (localBingoProgressDiv && data.bingo_string) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+
+    viewOpponentBoardBtn.onclick = () => {
+        remotePlayerBoardContainer.style.display = 'block';
+        displayMessage('Opponent\'s Board', `This is ${opponentName}'s final board.`);
+        modalOkButton.onclick = () => modal.style.display = 'none';
+        closeButton.onclick = () => modal.style.display = 'none';
+    };
+    playAgainBtn.onclick = () => {
+        socket.emit('request_play_again');
+        displayMessage('Play Again Request Sent', 'Waiting for your opponent to respond...');
+        modalOkButton.onclick = () => modal.style.display = 'none';
+        closeButton.onclick = () => modal.style.display = 'none';
+        playAgainBtn.disabled = true;
+    };
+}
+
+socket.on('bingo_win', data => {
+    if (data.seq !== undefined) {
+        if (!acceptSeq(data.seq)) return;
+        data = expandBingoWin(data);
+    }
+    showBingoWin(data);
+});
+
+socket.on('game_snapshot', data => {
+    console.log('Event: game_snapshot', data);
+    lastSeq = data.seq;
+    playerNames = data.player_names || playerNames;
+    playerBoards = data.boards || playerBoards;
+    bingoProgress = data.bingo_progress || {};
+    calledNumbers = new Set(data.called_numbers);
+    currentTurnSid = data.current_turn;
+    if (playerBoards[playerSid]) {
+        localPlayerBoardData = playerBoards[playerSid];
+        localPlayerMarked = markedFor(localPlayerBoardData, calledNumbers);
+    }
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+    if (localBingoProgressDiv) {
+        localBingoProgressDiv.innerText = `Bingo Progress: ${bingoStringFor(bingoProgress[playerSid])}`;
+    }
+
+    if (data.winner_sid) {
+        showBingoWin(expandBingoWin(data));
+    } else if (data.game_started) {
+        const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+        gameStatusDiv.innerText = `Game resynchronised. It's ${turnName} turn.`;
+    }
+});
+
+socket.on('game_over', data => {
+    playerNames = data.player_names || {};
+    const winnerSid = data.winner_sid;
+    const winnerName = playerNames[winnerSid] || 'The Winner';
+    const localPlayerName = playerNames[playerSid] || 'You';
+
+    let gameOverMessage;
+    if (winnerSid === playerSid) {
+        gameOverMessage = `Game Over: You (${localPlayerName}) won! ${data.message}`;
+        if (bingoSound) {
+            bingoSound.currentTime = 0;
+            bingoSound.play().catch(e => console.error("Error playing win sound:", e));
+        }
+    } else {
+        gameOverMessage = `Game Over: You lost! ${winnerName} won. ${data.message}`;
+        if (loseSound) {
+            loseSound.currentTime = 0;
+            loseSound.play().catch(e => console.error("Error playing lose sound:", e));
+        }
+    }
+
+    displayMessage('Game Over', gameOverMessage);
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'none';
+    playAgainBtn.style.display = 'block';
+    playAgainResponseOptionsDiv.style.display = 'none';
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        const finalLocalBoardData = data.final_boards[playerSid] || localPlayerBoardData;
+        const finalLocalMarked = data.final_marked_boards[playerSid] || localPlayerMarked;
+        renderFinalBoard(localBoardDiv, finalLocalBoardData, finalLocalMarked, new Set(data.called_numbers_final));
+    }
+
+    playAgainBtn.onclick = () => {
+        socket.emit('request_play_again');
+        displayMessage('Play Again Request Sent', 'Waiting for your opponent to respond...');
+        modalOkButton.onclick = () => modal.style.display = 'none';
+        closeButton.onclick = () => modal.style.display = 'none';
+        playAgainBtn.disabled = true;
+    };
+
+    if (data.final_boards && Object.keys(data.final_boards).length > 1) {
+        const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+        const finalRemoteBoardData = data.final_boards[opponentSid];
+        const finalRemoteMarked = data.final_marked_boards[opponentSid];
+        const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+        const remoteBoardDiv = document.getElementById('remote-player-board');
+
+        if (remotePlayerBoardContainer && remoteBoardDiv && finalRemoteBoardData && finalRemoteMarked) {
+            remotePlayerBoardContainer.style.display = 'block';
+            const opponentName = playerNames[opponentSid] || 'Opponent';
+            remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+            renderFinalBoard(remoteBoardDiv, finalRemoteBoardData, finalRemoteMarked, new Set(data.called_numbers_final));
+        }
+    }
+
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+
+    if (remoteBingoProgressDiv && data.bingo_string) {
+        const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+        const remoteProgress = data.bingo_string[opponentSid];
+        if (remoteProgress !== undefined) {
+            remoteBingoProgressDiv.innerText = `Bingo Progress: ${remoteProgress}`;
+            remoteBingoProgressDiv.style.display = 'block';
+        } else {
+            remoteBingoProgressDiv.style.display = 'none';
+        }
+    }
+    if (localBingoProgressDiv && data.bingo_string) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+});
+
+socket.on('play_again_requested', data => {
+    console.log('Event: play_again_requested', data);
+    playAgainRequesterSid = data.requester_sid;
+    const requesterName = data.requester_name || 'Opponent';
+
+    postGameOptionsDiv.style.display = 'none';
+    playAgainResponseOptionsDiv.style.display = 'flex';
+    playAgainRequestMessage.innerText = `${requesterName} wants to play again!`;
+    modal.style.display = 'none';
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+});
+
+socket.on('play_again_rejected', data => {
+    console.log('Event: play_again_rejected', data);
+    const rejecterName = data.rejecter_name || 'Opponent';
+    displayMessage('Play Again Rejected', `${rejecterName} rejected your request to play again. They have left the room.`);
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Go back to home page
+    };
+    closeButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Go back to home page
+    };
+});
+
+socket.on('play_again_response_status', data => {
+    console.log('Event: play_again_response_status', data);
+    const responderName = data.responder_name || 'Opponent';
+    if (data.status === 'accepted_waiting') {
+        displayMessage('Play Again Accepted', `${responderName} accepted your request! Waiting for them to confirm.`);
+        modalOkButton.onclick = () => modal.style.display = 'none';
+        closeButton.onclick = () => modal.style.display = 'none';
+        playAgainBtn.disabled = true;
+    }
+});
+
+socket.on('game_reset_for_play_again', data => {
+    console.log('Event: game_reset_for_play_again', data);
+    displayMessage('Game Reset', 'Both players are ready! Starting a new game...');
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        resetGameUI(); // Reset UI for a new game in the same room
+    };
+    closeButton.onclick = modalOkButton.onclick;
+});
+
+acceptPlayAgainBtn.addEventListener('click', () => {
+    socket.emit('respond_play_again', { response: 'accept', requester_sid: playAgainRequesterSid });
+    displayMessage('Play Again Accepted', 'Waiting for opponent to accept...');
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+    playAgainResponseOptionsDiv.style.display = 'none';
+});
+
+rejectPlayAgainBtn.addEventListener('click', () => {
+    socket.emit('respond_play_again', { response: 'reject', requester_sid: playAgainRequesterSid });
+    displayMessage('Play Again Rejected', 'You have rejected the request and left the room.');
+    playAgainResponseOptionsDiv.style.display = 'none';
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Go back to home page
+    };
+    closeButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Go back to home page
+    };
+});
+
+socket.on('user_left', data => {
+    const disconnectedPlayerName = playerNames[data.sid] || 'Opponent';
+    displayMessage('Opponent Left', `${disconnectedPlayerName} disconnected. Game ended.`);
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Redirect to home page
+    };
+    closeButton.onclick = () => {
+        modal.style.display = 'none';
+        window.location.href = '/'; // Redirect to home page
+    };
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'none'; // Opponent's board might not be fully available on disconnect
+    playAgainBtn.style.display = 'block';
+    playAgainBtn.onclick = () => {
+        // If opponent left, playing again means starting a new game from scratch
+        window.location.href = '/'; // Redirect to home page
+    };
+});
+
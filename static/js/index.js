@@ -0,0 +1,821 @@
+const socket = io();
+const modeSelection = document.getElementById('mode-selection');
+const roomOptions = document.getElementById('room-options');
+const createRoomBtn = document.getElementById('create-room-btn');
+const joinRoomBtn = document.getElementById('join-room-btn');
+const roomIdInput = document.getElementById('room-id-input');
+const playerNameInput = document.getElementById('player-name-input');
+const roomMessage = document.getElementById('room-message');
+const gameArea = document.getElementById('game-area');
+const gameInfoContainer = document.getElementById('game-info-container');
+const gameStatusDiv = document.getElementById('game-status');
+const postGameOptionsDiv = document.getElementById('post-game-options');
+const viewOpponentBoardBtn = document.getElementById('view-opponent-board-btn');
+const playAgainBtn = document.getElementById('play-again-btn');
+const gameInstructionsDiv = document.getElementById('game-instructions'); // New instruction div reference
+
+// New elements for Play Again response
+const playAgainResponseOptionsDiv = document.getElementById('play-again-response-options');
+const playAgainRequestMessage = document.getElementById('play-again-request-message');
+const acceptPlayAgainBtn = document.getElementById('accept-play-again-btn');
+const rejectPlayAgainBtn = document.getElementById('reject-play-again-btn');
+
+// Get references to the audio elements
+const numberCallSound = document.getElementById('number-call-sound');
+const bingoSound = document.getElementById('bingo-sound');
+const loseSound = document.getElementById('lose-sound');
+
+let startGameButton;
+let playerSid;
+let currentRoomId;
+let isHost = false;
+let currentTurnSid = null;
+let localPlayerBoardData = [];
+let remotePlayerBoardData = [];
+let calledNumbers = new Set();
+let localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+let remotePlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+let playerNames = {};
+let playAgainRequesterSid = null; // To store who requested play again
+let reconnectToken = null; // Lets us reclaim our seat if the connection drops
+let playVsComputer = false; // The room we create gets a computer opponent instead of a second player
+
+const modal = document.getElementById('message-modal');
+const modalTitle = document.getElementById('modal-title');
+const modalBody = document.getElementById('modal-body');
+const modalOkButton = document.getElementById('modal-ok-button');
+const closeButton = document.querySelector('.close-button');
+
+// Default modal button behavior (used when no specific behavior is assigned)
+modalOkButton.onclick = () => modal.style.display = 'none';
+closeButton.onclick = () => modal.style.display = 'none';
+
+
+// Protocol 2: the server sends delta-encoded number_called/bingo_win broadcasts
+// tagged with a sequence number. The full payload shape is rebuilt locally from
+// the state we already hold, and a snapshot is requested if a broadcast is missed.
+const PROTOCOL_VERSION = 2;
+let lastSeq = 0;
+let playerBoards = {};
+let bingoProgress = {};
+
+
+socket.on('connect', () => {
+    const previousSid = playerSid;
+    playerSid = socket.id;
+    console.log('Connected client SID:', playerSid);
+    // After a dropped connection, reclaim our seat with the token the server issued.
+    if (previousSid && previousSid !== playerSid && currentRoomId && reconnectToken) {
+        socket.emit('rejoin_game_room', {
+            room_id: currentRoomId,
+            reconnect_token: reconnectToken,
+            protocol_version: PROTOCOL_VERSION
+        });
+    }
+});
+
+// Function to reset UI to initial state
+function resetUI() {
+    gameInstructionsDiv.style.display = 'block'; // Show instructions on reset
+    modeSelection.style.display = 'flex';
+    roomOptions.style.display = 'none';
+    gameArea.style.display = 'none';
+    gameInfoContainer.style.display = 'none';
+    postGameOptionsDiv.style.display = 'none';
+    playAgainResponseOptionsDiv.style.display = 'none'; // Hide play again options
+    roomMessage.innerText = '';
+    document.getElementById('local-player-board-container')?.remove();
+    document.getElementById('remote-player-board-container')?.remove();
+    playAgainRequesterSid = null; // Clear requester SID
+    // Reset game state variables
+    localPlayerBoardData = [];
+    remotePlayerBoardData = [];
+    calledNumbers = new Set();
+    localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+    remotePlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+    playerNames = {};
+    currentRoomId = null;
+    reconnectToken = null;
+    isHost = false;
+    currentTurnSid = null;
+    playVsComputer = false;
+    joinRoomBtn.parentNode.style.display = '';
+}
+
+document.getElementById('play-online').addEventListener('click', () => {
+    gameInstructionsDiv.style.display = 'none'; // Hide instructions
+    modeSelection.style.display = 'none';
+    roomOptions.style.display = 'flex';
+    playVsComputer = false;
+    joinRoomBtn.parentNode.style.display = '';
+});
+
+// Same as creating a room online, except the server adds a computer player as soon as the room exists.
+document.getElementById('play-computer').addEventListener('click', () => {
+    gameInstructionsDiv.style.display = 'none'; // Hide instructions
+    modeSelection.style.display = 'none';
+    roomOptions.style.display = 'flex';
+    playVsComputer = true;
+    joinRoomBtn.parentNode.style.display = 'none'; // Nobody else joins this room
+});
+
+createRoomBtn.addEventListener('click', () => {
+    const playerName = playerNameInput.value.trim();
+    if (!playerName) {
+        displayMessage('Name Required', 'Please enter your name to create a room.');
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        return;
+    }
+    socket.emit('create_room', { player_name: playerName, protocol_version: PROTOCOL_VERSION });
+    isHost = true;
+    roomOptions.style.display = 'none';
+    gameArea.style.display = 'flex';
+    const player1BoardContainer = document.createElement('div');
+    player1BoardContainer.id = 'local-player-board-container';
+    player1BoardContainer.innerHTML = `<h3>Your Board (${playerName})</h3><div id="local-player-board" class="board"></div><div id="local-player-bingo-progress">Bingo Progress: </div><div id="board-1-message" style="color: red; margin-top: 5px;"></div>`;
+    gameArea.appendChild(player1BoardContainer);
+    createBingoBoard(document.getElementById('local-player-board'), 1);
+
+    const remotePlayerBoardContainer = document.createElement('div');
+    remotePlayerBoardContainer.id = 'remote-player-board-container';
+    remotePlayerBoardContainer.innerHTML = '<h3>Opponent\'s Board</h3><div id="remote-player-board" class="board"></div><div id="remote-player-bingo-progress">Bingo Progress: </div><div id="board-2-message" style="color: red; margin-top: 5px;"></div>';
+    remotePlayerBoardContainer.style.display = 'none';
+    gameArea.appendChild(remotePlayerBoardContainer);
+
+    gameInfoContainer.style.display = 'flex';
+    gameStatusDiv.innerText = 'Waiting for opponent to join and submit their board...';
+    startGameButton = document.getElementById('start-game-button');
+    if (startGameButton) {
+        startGameButton.style.display = 'none';
+    }
+});
+
+joinRoomBtn.addEventListener('click', () => {
+    const roomId = roomIdInput.value.trim();
+    const playerName = playerNameInput.value.trim();
+    if (!playerName) {
+        displayMessage('Name Required', 'Please enter your name to join a room.');
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        return;
+    }
+    if (roomId) {
+        socket.emit('join_room', { 'room_id': roomId, 'player_name': playerName, 'protocol_version': PROTOCOL_VERSION });
+        isHost = false;
+        roomOptions.style.display = 'none';
+        gameArea.style.display = 'flex';
+        const player1BoardContainer = document.createElement('div');
+        player1BoardContainer.id = 'local-player-board-container';
+        player1BoardContainer.innerHTML = `<h3>Your Board (${playerName})</h3><div id="local-player-board" class="board"></div><div id="local-player-bingo-progress">Bingo Progress: </div><div id="board-1-message" style="color: red; margin-top: 5px;"></div>`;
+        gameArea.appendChild(player1BoardContainer);
+        createBingoBoard(document.getElementById('local-player-board'), 1);
+
+        const remotePlayerBoardContainer = document.createElement('div');
+        remotePlayerBoardContainer.id = 'remote-player-board-container';
+        remotePlayerBoardContainer.innerHTML = '<h3>Opponent\'s Board</h3><div id="remote-player-board" class="board"></div><div id="remote-player-bingo-progress">Bingo Progress: </div><div id="board-2-message" style="color: red; margin-top: 5px;"></div>';
+        remotePlayerBoardContainer.style.display = 'none';
+        gameArea.appendChild(remotePlayerBoardContainer);
+
+        gameInfoContainer.style.display = 'flex';
+        gameStatusDiv.innerText = 'Waiting for you to submit your board...';
+        startGameButton = document.getElementById('start-game-button');
+        if (startGameButton) {
+            startGameButton.style.display = 'none';
+        }
+    } else {
+        displayMessage('Input Required', 'Please enter a Room ID.');
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    }
+});
+
+socket.on('room_created', data => {
+    console.log('Event: room_created', data);
+    currentRoomId = data.room_id;
+    reconnectToken = data.reconnect_token;
+    if (playVsComputer) {
+        socket.emit('add_bot');
+        document.getElementById('room-id-display').innerText = 'Playing against the computer.';
+        return;
+    }
+    document.getElementById('room-id-display').innerText = `Room ID: " ${data.room_id} " Share this with opponent.`;
+});
+
+socket.on('room_joined', data => {
+    console.log('Event: room_joined', data);
+    currentRoomId = data.room_id;
+    reconnectToken = data.reconnect_token;
+    document.getElementById('room-id-display').innerText = `Joined Room ID: ${data.room_id}.`;
+});
+
+// The server re-checks every board; unlock ours for editing if it was refused.
+socket.on('invalid_board', data => {
+    const boardDiv = document.getElementById('local-player-board');
+    if (boardDiv) {
+        boardDiv.querySelectorAll('input').forEach(input => input.disabled = false);
+        boardDiv.tabIndex = 0;
+        const submitButtonContainer = boardDiv.parentNode.querySelector('.submit-button-container');
+        if (submitButtonContainer) {
+            submitButtonContainer.style.display = '';
+            submitButtonContainer.querySelector('button').disabled = false;
+        }
+    }
+    displayMessage('Invalid Board', data.message);
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+});
+
+socket.on('room_full', data => {
+    displayMessage('Room Full', `Room ${data.room_id} is full.`);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('invalid_room', data => {
+    displayMessage('Invalid Room', `Invalid Room ID: ${data.room_id}.`);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('game_already_started', data => {
+    displayMessage('Game In Progress', `The game in room ${data.room_id} has already started.`);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('already_in_room', data => {
+    displayMessage('Already In Room', `You are already in room ${data.room_id}.`);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('invalid_player_count', data => {
+    displayMessage('Invalid Room Size', data.message);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('room_limit_reached', data => {
+    displayMessage('Server Full', data.message);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+});
+
+socket.on('room_expired', data => {
+    currentRoomId = null;
+    reconnectToken = null;
+    displayMessage('Room Closed', data.message);
+    modalOkButton.onclick = () => window.location.reload();
+    closeButton.onclick = () => window.location.reload();
+});
+
+socket.on('user_joined', data => {
+    const opponentName = data.player_name || 'Opponent';
+    roomMessage.innerText = `Opponent (${opponentName}) joined! Submit your board.`;
+    playerNames[data.sid] = opponentName;
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    if (remotePlayerBoardContainer) {
+        remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+    }
+
+    if(isHost) {
+        gameStatusDiv.innerText = `${opponentName} has joined the room having ID ${currentRoomId}. Waiting for opponent to submit the board.`;
+    }
+
+    // This condition is crucial for the glitch fix: only show start button if both boards are submitted
+    // and it's the host. The 'boards_received' event will handle the actual board display.
+    if (isHost && localPlayerBoardData.length === 25 && remotePlayerBoardData.length === 25) {
+        if (startGameButton) {
+            startGameButton.style.display = 'block';
+            startGameButton.disabled = false;
+            gameStatusDiv.innerText = 'Both boards submitted. Host can start the game.';
+        }
+    } else if (!isHost) {
+        // For the joining player, ensure their board is ready for input
+        const localBoardDiv = document.getElementById('local-player-board');
+        if (localBoardDiv && localPlayerBoardData.length === 0) { // Only if board not yet submitted
+            createBingoBoard(localBoardDiv, 1); // Re-create input board
+            gameStatusDiv.innerText = 'Waiting for you to submit your board...';
+        }
+    }
+});
+
+socket.on('user_left', data => {
+    const disconnectedPlayerName = playerNames[data.sid] || 'Opponent';
+    displayMessage('Opponent Left', `${disconnectedPlayerName} disconnected. Game ended. You win!`);
+    modalOkButton.onclick = () => { // Set specific handler
+        modal.style.display = 'none';
+        resetUI();
+    };
+    closeButton.onclick = () => { // Set specific handler
+        modal.style.display = 'none';
+        resetUI();
+    };
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'none';
+    playAgainBtn.style.display = 'block';
+    playAgainBtn.onclick = () => resetUI(); // Reset UI to initial state
+});
+
+socket.on('boards_received', data => {
+    console.log('Event: boards_received', data);
+    playerBoards = data.boards;
+    roomOptions.style.display = 'none';
+    gameArea.style.display = 'flex';
+
+    const sids = Object.keys(data.boards);
+    const player1Sid = sids[0];
+    const player2Sid = sids[1];
+
+    localPlayerBoardData = (playerSid === player1Sid) ? data.boards[player1Sid] : data.boards[player2Sid];
+    remotePlayerBoardData = (playerSid === player1Sid) ? data.boards[player2Sid] : data.boards[player1Sid];
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    const remoteBoardDiv = document.getElementById('remote-player-board');
+
+    updateBoardDisplay(localBoardDiv, localPlayerBoardData);
+    displayOpponentPlaceholderBoard(remoteBoardDiv);
+
+    localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+    console.log('localPlayerMarked initialized:', JSON.stringify(localPlayerMarked));
+
+    gameInfoContainer.style.display = 'flex';
+    startGameButton = document.getElementById('start-game-button');
+
+    // Clear the "Board submitted. Waiting for opponent." message
+    const board1MessageDiv = document.getElementById('board-1-message');
+    const board2MessageDiv = document.getElementById('board-2-message');
+    if (board1MessageDiv) board1MessageDiv.innerText = '';
+    if (board2MessageDiv) board2MessageDiv.innerText = '';
+    if (roomMessage) roomMessage.innerText = ''; // Clear general room message too
+
+    if (startGameButton) {
+        startGameButton.addEventListener('click', () => {
+            if (isHost) {
+                socket.emit('start_game_button_clicked');
+                startGameButton.disabled = true;
+                startGameButton.style.display = 'none';
+            }
+        });
+        if (isHost) {
+            startGameButton.style.display = 'block';
+            startGameButton.disabled = false;
+            gameStatusDiv.innerText = 'Both boards submitted. Click "Start Game" to begin!';
+        } else {
+            startGameButton.style.display = 'none';
+            gameStatusDiv.innerText = 'Both boards submitted. Waiting for host to start the game...';
+        }
+    }
+});
+
+socket.on('game_start_signal', data => {
+    console.log('Game start signal received', data);
+    lastSeq = data.seq || 0;
+    bingoProgress = {};
+    playerNames = data.player_names || {};
+    const localPlayerName = playerNames[playerSid] || 'You';
+    const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+    const opponentName = playerNames[opponentSid] || 'Opponent';
+
+    gameStatusDiv.innerText = `Game Started! It's ${data.current_turn === playerSid ? localPlayerName : opponentName}'s turn.`;
+
+    document.getElementById('local-player-board-container').querySelector('h3').innerText = `Your Board (${localPlayerName})`;
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    if (remotePlayerBoardContainer) {
+        remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+        remotePlayerBoardContainer.style.display = 'none';
+    }
+
+    currentTurnSid = data.current_turn;
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+
+    if (startGameButton) {
+        startGameButton.style.display = 'none';
+    }
+    // Hide play again options if they were visible from a previous game
+    playAgainResponseOptionsDiv.style.display = 'none';
+
+    // Clear the "Board submitted. Waiting for opponent." message
+    const board1MessageDiv = document.getElementById('board-1-message');
+    const board2MessageDiv = document.getElementById('board-2-message');
+    if (board1MessageDiv) board1MessageDiv.innerText = '';
+    if (board2MessageDiv) board2MessageDiv.innerText = '';
+    if (roomMessage) roomMessage.innerText = ''; // Clear general room message too
+});
+
+socket.on('number_called', data => {
+    if (data.seq !== undefined) {
+        if (!acceptSeq(data.seq)) return;
+        data = expandNumberCalled(data);
+    }
+    const calledNumber = data.number;
+    const nextTurnSid = data.next_turn;
+    calledNumbers.add(calledNumber);
+    playerNames = data.player_names || {};
+
+    if (numberCallSound) {
+        numberCallSound.currentTime = 0;
+        numberCallSound.play().catch(e => console.error("Error playing sound:", e));
+    }
+
+    const localPlayerName = playerNames[playerSid] || 'You';
+    const nextTurnName = playerNames[nextTurnSid] || (nextTurnSid === playerSid ? 'Your' : 'Opponent\'s');
+
+    const indexInLocalBoard = localPlayerBoardData.indexOf(calledNumber);
+    if (indexInLocalBoard !== -1) {
+        const row = Math.floor(indexInLocalBoard / 5);
+        const col = indexInLocalBoard % 5;
+        localPlayerMarked[row][col] = true;
+        console.log(`Number ${calledNumber} marked at [${row}][${col}]. localPlayerMarked:`, JSON.stringify(localPlayerMarked));
+    }
+
+    gameStatusDiv.innerText = `Number Called: ${calledNumber}. It's ${nextTurnName} turn.`;
+    currentTurnSid = nextTurnSid;
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    const remoteBoardDiv = document.getElementById('remote-player-board');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+    displayOpponentPlaceholderBoard(remoteBoardDiv);
+
+    if (data.bingo_string && localBingoProgressDiv) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+    if (remoteBingoProgressDiv) {
+        remoteBingoProgressDiv.style.display = 'none';
+    }
+});
+
+function showBingoWin(data) {
+    playerNames = data.player_names || {};
+    const winnerId = data.winner_sid;
+    const winnerName = playerNames[winnerId] || 'The Winner';
+    const localPlayerName = playerNames[playerSid] || 'You';
+
+    let winnerMessage;
+    if (winnerId === playerSid) {
+        winnerMessage = `BINGO! You (${localPlayerName}) won!`;
+        if (bingoSound) {
+            bingoSound.currentTime = 0;
+            bingoSound.play().catch(e => console.error("Error playing win sound:", e));
+        }
+    } else {
+        winnerMessage = `BINGO! ${winnerName} won! You lost.`;
+        if (loseSound) {
+            loseSound.currentTime = 0;
+            loseSound.play().catch(e => console.error("Error playing lose sound:", e));
+        }
+    }
+    displayMessage('Game Over', winnerMessage);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'block';
+    playAgainBtn.style.display = 'block';
+    playAgainResponseOptionsDiv.style.display = 'none'; // Ensure play again options are hidden
+
+    const sids = Object.keys(data.final_boards);
+    const player1Sid = sids[0];
+    const player2Sid = sids[1];
+
+    const finalLocalBoardData = (playerSid === player1Sid) ? data.final_boards[player1Sid] : data.final_boards[player2Sid];
+    const finalLocalMarked = (playerSid === player1Sid) ? data.final_marked_boards[player1Sid] : data.final_marked_boards[player2Sid];
+    const finalRemoteBoardData = (playerSid === player1Sid) ? data.final_boards[player2Sid] : data.final_boards[player1Sid];
+    const finalRemoteMarked = (playerSid === player1Sid) ? data.final_marked_boards[player2Sid] : data.final_marked_boards[player1Sid];
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    renderFinalBoard(localBoardDiv, finalLocalBoardData, finalLocalMarked, new Set(data.called_numbers_final));
+
+    const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+    const remoteBoardDiv = document.getElementById('remote-player-board');
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+
+    remotePlayerBoardContainer.style.display = 'block';
+    const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+    const opponentName = playerNames[opponentSid] || 'Opponent';
+    remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+
+    renderFinalBoard(remoteBoardDiv, finalRemoteBoardData, finalRemoteMarked, new Set(data.called_numbers_final));
+    if (remoteBingoProgressDiv && data.bingo_string) {
+        const remoteProgress = (playerSid === player1Sid) ? data.bingo_string[player2Sid] : data.bingo_string[player1Sid];
+        remoteBingoProgressDiv.innerText = `Bingo Progress: ${remoteProgress}`;
+        remoteBingoProgressDiv.style.display = 'block';
+    }
+    if (localBingoProgressDiv && data.bingo_string) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+
+    viewOpponentBoardBtn.onclick = () => {
+        remotePlayerBoardContainer.style.display = 'block';
+        displayMessage('Opponent\'s Board', `This is ${opponentName}'s final board.`);
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    };
+    // Modified playAgainBtn.onclick to send request
+    playAgainBtn.onclick = () => {
+        socket.emit('request_play_again');
+        displayMessage('Play Again Request Sent', 'Waiting for your opponent to respond...');
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        playAgainBtn.disabled = true; // Disable button after sending request
+    };
+}
+
+socket.on('bingo_win', data => {
+    if (data.seq !== undefined) {
+        if (!acceptSeq(data.seq)) return;
+        data = expandBingoWin(data);
+    }
+    showBingoWin(data);
+});
+
+socket.on('game_snapshot', data => {
+    console.log('Event: game_snapshot', data);
+    applyGameSnapshot(data);
+});
+
+socket.on('rejoin_game_room_success', data => {
+    console.log('Event: rejoin_game_room_success', data);
+    isHost = data.is_host;
+    reconnectToken = data.reconnect_token;
+    applyGameSnapshot(data);
+    if (!data.game_started) {
+        gameStatusDiv.innerText = 'Reconnected. Waiting for the game to start...';
+    }
+});
+
+socket.on('rejoin_game_room_failed', data => {
+    displayMessage('Connection Lost', data.message);
+    modalOkButton.onclick = () => { // Set specific handler
+        modal.style.display = 'none';
+        resetUI();
+    };
+    closeButton.onclick = modalOkButton.onclick;
+});
+
+socket.on('player_disconnected', data => {
+    const name = playerNames[data.sid] || data.player_name || 'Opponent';
+    gameStatusDiv.innerText = `${name} lost connection. Waiting up to ${data.grace_seconds}s for them to rejoin...`;
+});
+
+socket.on('player_rejoined', data => {
+    console.log('Event: player_rejoined', data);
+    renamePlayerSid(data.old_sid, data.sid);
+    const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+    gameStatusDiv.innerText = currentTurnSid
+        ? `${data.player_name} rejoined. It's ${turnName} turn.`
+        : `${data.player_name} rejoined.`;
+});
+
+// Rooms with more than two players carry on when someone leaves.
+socket.on('player_left', data => {
+    console.log('Event: player_left', data);
+    const name = playerNames[data.sid] || data.player_name || 'A player';
+    delete playerNames[data.sid];
+    isHost = data.host_sid === playerSid;
+    currentTurnSid = data.current_turn;
+    const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+    gameStatusDiv.innerText = currentTurnSid
+        ? `${name} left the room. It's ${turnName} turn.`
+        : `${name} left the room.`;
+});
+
+function applyGameSnapshot(data) {
+    lastSeq = data.seq;
+    playerNames = data.player_names || playerNames;
+    playerBoards = data.boards || playerBoards;
+    bingoProgress = data.bingo_progress || {};
+    calledNumbers = new Set(data.called_numbers);
+    currentTurnSid = data.current_turn;
+    if (playerBoards[playerSid]) {
+        localPlayerBoardData = playerBoards[playerSid];
+        localPlayerMarked = markedFor(localPlayerBoardData, calledNumbers);
+    }
+
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        updateBoardDisplay(localBoardDiv, localPlayerBoardData, true, currentTurnSid === playerSid);
+    }
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+    if (localBingoProgressDiv) {
+        localBingoProgressDiv.innerText = `Bingo Progress: ${bingoStringFor(bingoProgress[playerSid])}`;
+    }
+
+    if (data.winner_sid) {
+        showBingoWin(expandBingoWin(data));
+    } else if (data.game_started) {
+        const turnName = currentTurnSid === playerSid ? 'your' : `${playerNames[currentTurnSid] || 'Opponent'}'s`;
+        gameStatusDiv.innerText = `Game resynchronised. It's ${turnName} turn.`;
+    }
+}
+
+socket.on('game_over', data => {
+    playerNames = data.player_names || {};
+    const winnerSid = data.winner_sid;
+    const winnerName = playerNames[winnerSid] || 'The Winner';
+    const localPlayerName = playerNames[playerSid] || 'You';
+
+    let gameOverMessage;
+    if (winnerSid === playerSid) {
+        gameOverMessage = `Game Over: You (${localPlayerName}) won! ${data.message}`;
+        if (bingoSound) {
+            bingoSound.currentTime = 0;
+            bingoSound.play().catch(e => console.error("Error playing win sound:", e));
+        }
+    } else {
+        gameOverMessage = `Game Over: You lost! ${winnerName} won. ${data.message}`;
+        if (loseSound) {
+            loseSound.currentTime = 0;
+            loseSound.play().catch(e => console.error("Error playing lose sound:", e));
+        }
+    }
+
+    displayMessage('Game Over', gameOverMessage);
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+
+    postGameOptionsDiv.style.display = 'flex';
+    viewOpponentBoardBtn.style.display = 'none'; // Opponent's board might not be fully available on disconnect
+    playAgainBtn.style.display = 'block';
+    playAgainResponseOptionsDiv.style.display = 'none'; // Ensure play again options are hidden
+
+    // Ensure local player's board is always displayed, even if opponent disconnected/rejected
+    const localBoardDiv = document.getElementById('local-player-board');
+    if (localBoardDiv && localPlayerBoardData.length > 0) {
+        // Use the last known localPlayerBoardData and localPlayerMarked for rendering
+        // If data.final_boards for local player exists, use that, otherwise rely on current state
+        const finalLocalBoardData = data.final_boards[playerSid] || localPlayerBoardData;
+        const finalLocalMarked = data.final_marked_boards[playerSid] || localPlayerMarked;
+        renderFinalBoard(localBoardDiv, finalLocalBoardData, finalLocalMarked, new Set(data.called_numbers_final));
+    }
+
+
+    // Modified playAgainBtn.onclick to send request
+    playAgainBtn.onclick = () => {
+        socket.emit('request_play_again');
+        displayMessage('Play Again Request Sent', 'Waiting for your opponent to respond...');
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        playAgainBtn.disabled = true; // Disable button after sending request
+    };
+
+    // This block for remote board display might need adjustment if opponent's data is truly absent
+    // For now, if final_boards has remote data, display it, otherwise keep it hidden.
+    if (data.final_boards && Object.keys(data.final_boards).length > 1) {
+        const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+        const finalRemoteBoardData = data.final_boards[opponentSid];
+        const finalRemoteMarked = data.final_marked_boards[opponentSid];
+        const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+        const remoteBoardDiv = document.getElementById('remote-player-board');
+
+        if (remotePlayerBoardContainer && remoteBoardDiv && finalRemoteBoardData && finalRemoteMarked) {
+            remotePlayerBoardContainer.style.display = 'block';
+            const opponentName = playerNames[opponentSid] || 'Opponent';
+            remotePlayerBoardContainer.querySelector('h3').innerText = `Opponent's Board (${opponentName})`;
+            renderFinalBoard(remoteBoardDiv, finalRemoteBoardData, finalRemoteMarked, new Set(data.called_numbers_final));
+        }
+    }
+
+
+    const remoteBingoProgressDiv = document.getElementById('remote-player-bingo-progress');
+    const localBingoProgressDiv = document.getElementById('local-player-bingo-progress');
+
+    if (remoteBingoProgressDiv && data.bingo_string) {
+        const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+        const remoteProgress = data.bingo_string[opponentSid];
+        if (remoteProgress !== undefined) { // Check if opponent's progress exists
+            remoteBingoProgressDiv.innerText = `Bingo Progress: ${remoteProgress}`;
+            remoteBingoProgressDiv.style.display = 'block';
+        } else {
+            remoteBingoProgressDiv.style.display = 'none'; // Hide if no opponent progress
+        }
+    }
+    if (localBingoProgressDiv && data.bingo_string) {
+        const localProgress = data.bingo_string[playerSid];
+        localBingoProgressDiv.innerText = `Bingo Progress: ${localProgress}`;
+    }
+});
+
+// New Socket.IO event handlers for Play Again feature
+socket.on('play_again_requested', data => {
+    console.log('Event: play_again_requested', data);
+    playAgainRequesterSid = data.requester_sid;
+    const requesterName = data.requester_name || 'Opponent';
+
+    // Hide post-game options and show play again response options
+    postGameOptionsDiv.style.display = 'none';
+    playAgainResponseOptionsDiv.style.display = 'flex';
+    playAgainRequestMessage.innerText = `${requesterName} wants to play again!`;
+    // Close any open modal
+    modal.style.display = 'none';
+    // Ensure modal buttons are reset to default after this message
+    modalOkButton.onclick = () => modal.style.display = 'none';
+    closeButton.onclick = () => modal.style.display = 'none';
+});
+
+socket.on('play_again_rejected', data => {
+    console.log('Event: play_again_rejected', data);
+    const rejecterName = data.rejecter_name || 'Opponent';
+    displayMessage('Play Again Rejected', `${rejecterName} rejected your request to play again. They have left the room.`);
+    // Reset UI to initial state after rejection
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        resetUI();
+    };
+    closeButton.onclick = () => {
+        modal.style.display = 'none';
+        resetUI();
+    };
+});
+
+socket.on('play_again_response_status', data => {
+    console.log('Event: play_again_response_status', data);
+    const responderName = data.responder_name || 'Opponent';
+    if (data.status === 'accepted_waiting') {
+        displayMessage('Play Again Accepted', `${responderName} accepted your request! Waiting for them to confirm.`);
+        modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+        playAgainBtn.disabled = true; // Keep disabled
+    }
+});
+
+socket.on('game_reset_for_play_again', data => {
+    console.log('Event: game_reset_for_play_again', data);
+    displayMessage('Game Reset', 'Both players are ready! Starting a new game...');
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        // Reset game variables
+        localPlayerBoardData = [];
+        remotePlayerBoardData = [];
+        calledNumbers = new Set();
+        localPlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+        remotePlayerMarked = Array(5).fill(0).map(() => Array(5).fill(false));
+        playAgainRequesterSid = null; // Clear requester SID
+
+        // Hide post-game options and play again response options
+        postGameOptionsDiv.style.display = 'none';
+        playAgainResponseOptionsDiv.style.display = 'none';
+
+        // Re-create boards for input
+        const localPlayerBoardContainer = document.getElementById('local-player-board-container');
+        const remotePlayerBoardContainer = document.getElementById('remote-player-board-container');
+
+        if (localPlayerBoardContainer) {
+            const localPlayerName = playerNames[playerSid] || 'You';
+            localPlayerBoardContainer.innerHTML = `<h3>Your Board (${localPlayerName})</h3><div id="local-player-board" class="board"></div><div id="local-player-bingo-progress">Bingo Progress: </div><div id="board-1-message" style="color: red; margin-top: 5px;"></div>`;
+            createBingoBoard(document.getElementById('local-player-board'), 1);
+        }
+        if (remotePlayerBoardContainer) {
+            const opponentSid = Object.keys(playerNames).find(sid => sid !== playerSid);
+            const opponentName = playerNames[opponentSid] || 'Opponent';
+            remotePlayerBoardContainer.innerHTML = `<h3>Opponent's Board (${opponentName})</h3><div id="remote-player-board" class="board"></div><div id="remote-player-bingo-progress">Bingo Progress: </div><div id="board-2-message" style="color: red; margin-top: 5px;"></div>`;
+            remotePlayerBoardContainer.style.display = 'none'; // Keep hidden until opponent submits board
+        }
+
+        gameInfoContainer.style.display = 'flex';
+        gameStatusDiv.innerText = 'Both players need to submit new boards...';
+        if (startGameButton) {
+            startGameButton.style.display = 'none'; // Hide start game button initially
+        }
+        playAgainBtn.disabled = false; // Re-enable play again button for future use
+    };
+    closeButton.onclick = modalOkButton.onclick; // Make close button do the same
+});
+
+// Event listeners for new Play Again buttons
+acceptPlayAgainBtn.addEventListener('click', () => {
+    socket.emit('respond_play_again', { response: 'accept', requester_sid: playAgainRequesterSid });
+    displayMessage('Play Again Accepted', 'Waiting for opponent to accept...');
+    modalOkButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    closeButton.onclick = () => modal.style.display = 'none'; // Set specific handler
+    playAgainResponseOptionsDiv.style.display = 'none'; // Hide options after responding
+});
+
+rejectPlayAgainBtn.addEventListener('click', () => {
+    socket.emit('respond_play_again', { response: 'reject', requester_sid: playAgainRequesterSid });
+    displayMessage('Play Again Rejected', 'You have rejected the request and left the room.');
+    playAgainResponseOptionsDiv.style.display = 'none'; // Hide options after responding
+    // The backend will handle the opponent's notification and room cleanup
+    modalOkButton.onclick = () => {
+        modal.style.display = 'none';
+        resetUI(); // Reset UI to initial state after rejection
+    };
+    closeButton.onclick = () => {
+        modal.style.display = 'none';
+        resetUI(); // Reset UI to initial state after rejection
+    };
+});
+
@@ -0,0 +1,108 @@
+const socket = io();
+const createRoomBtn = document.getElementById('create-room-btn');
+const joinRoomBtn = document.getElementById('join-room-btn');
+const roomIdInput = document.getElementById('room-id-input');
+const playerNameInput = document.getElementById('player-name-input');
+const roomMessage = document.getElementById('room-message');
+
+let playerSid;
+let isHost = false;
+
+const modal = document.getElementById('message-modal');
+const modalTitle = document.getElementById('modal-title');
+const modalBody = document.getElementById('modal-body');
+const modalOkButton = document.getElementById('modal-ok-button');
+const closeButton = document.querySelector('.close-button');
+
+modalOkButton.onclick = () => modal.style.display = 'none';
+closeButton.onclick = () => modal.style.display = 'none';
+
+socket.on('connect', () => {
+    playerSid = socket.id;
+    console.log('Connected client SID:', playerSid);
+});
+
+createRoomBtn.addEventListener('click', () => {
+    const playerName = playerNameInput.value.trim();
+    if (!playerName) {
+        displayMessage('Name Required', 'Please enter your name to create a room.');
+        return;
+    }
+    socket.emit('create_room', { player_name: playerName });
+    isHost = true;
+    roomMessage.innerText = 'Creating room...';
+});
+
+joinRoomBtn.addEventListener('click', () => {
+    const roomId = roomIdInput.value.trim();
+    const playerName = playerNameInput.value.trim();
+    if (!playerName) {
+        displayMessage('Name Required', 'Please enter your name to join a room.');
+        return;
+    }
+    if (roomId) {
+        socket.emit('join_room', { 'room_id': roomId, 'player_name': playerName });
+        isHost = false;
+        roomMessage.innerText = 'Attempting to join room...';
+    } else {
+        displayMessage('Input Required', 'Please enter a Room ID.');
+    }
+});
+
+socket.on('room_created', data => {
+    console.log('Event: room_created', data);
+    const roomId = data.room_id;
+    const playerName = playerNameInput.value.trim();
+    // game.html presents this token to reclaim the seat held for us after this page unloads
+    sessionStorage.setItem('bingo_reconnect_token', data.reconnect_token);
+    roomMessage.innerText = `Room ID: "${roomId}" created. Share this with opponent. Waiting for opponent to join...`;
+    // Redirect to game.html with room ID and player name
+    window.location.href = `/game.html?room_id=${roomId}&player_name=${encodeURIComponent(playerName)}`;
+});
+
+socket.on('room_joined', data => {
+    console.log('Event: room_joined', data);
+    const roomId = data.room_id;
+    const playerName = playerNameInput.value.trim();
+    sessionStorage.setItem('bingo_reconnect_token', data.reconnect_token);
+    roomMessage.innerText = `Joined Room ID: ${roomId}. Waiting for host to start game...`;
+    // Redirect to game.html with room ID and player name
+    window.location.href = `/game.html?room_id=${roomId}&player_name=${encodeURIComponent(playerName)}`;
+});
+
+socket.on('room_full', data => {
+    displayMessage('Room Full', `Room ${data.room_id} is full.`);
+    roomMessage.innerText = `Room ${data.room_id} is full. Try another ID or create a new room.`;
+});
+
+socket.on('invalid_room', data => {
+    displayMessage('Invalid Room', `Invalid Room ID: ${data.room_id}.`);
+    roomMessage.innerText = `Invalid Room ID: ${data.room_id}. Please check the ID and try again.`;
+});
+
+socket.on('game_already_started', data => {
+    displayMessage('Game In Progress', `The game in room ${data.room_id} has already started.`);
+    roomMessage.innerText = `Room ${data.room_id} is mid-game. Try another ID or create a new room.`;
+});
+
+socket.on('already_in_room', data => {
+    displayMessage('Already In Room', `You are already in room ${data.room_id}.`);
+    roomMessage.innerText = `You are already in room ${data.room_id}.`;
+});
+
+socket.on('invalid_player_count', data => {
+    displayMessage('Invalid Room Size', data.message);
+    roomMessage.innerText = data.message;
+});
+
+socket.on('room_limit_reached', data => {
+    displayMessage('Server Full', data.message);
+    roomMessage.innerText = data.message;
+});
+
+socket.on('user_joined', data => {
+     // This event is primarily for updating the host's view.
+     // The joining player is already redirected by 'room_joined'.
+     // The host will be redirected by 'room_created' and then 'boards_received' will trigger game setup.
+     console.log(`Opponent (${data.player_name}) joined the room.`);
+});